@@ -0,0 +1,163 @@
+import pandas as pd
+from sqlalchemy import create_engine
+import logging
+import os
+from typing import Dict, List
+import time
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+# Columns of ACCORD_DATA that the backtests actually use
+ACCORD_COLUMNS = [
+    'A_Date', 'NSE_Symbol', 'A_Open', 'A_Close', 'MCAP_Crs',
+    'Sharpe_30', 'Sharpe_90', 'Sharpe_180', 'Sharpe_365'
+]
+
+DEFAULT_STORE_PATH = '../data/accord_store'
+
+
+def export_accord_snapshot(connection_string: str, store_path: str, years: List[int]) -> None:
+    """
+    One-time export of ACCORD_DATA into a Parquet store partitioned by year.
+
+    Each year is written to {store_path}/year={year}/data.parquet so that
+    single years can be refreshed without rewriting the whole store.
+    """
+    engine = create_engine(connection_string)
+    columns_str = ', '.join(ACCORD_COLUMNS)
+
+    for year in years:
+        year_start_time = time.time()
+        query = f"""
+        SELECT {columns_str}
+        FROM ACCORD_DATA_SUBSET.dbo.ACCORD_DATA
+        WHERE A_Date BETWEEN '{year}-01-01' AND '{year}-12-31'
+        ORDER BY A_Date, NSE_Symbol;
+        """
+        df = pd.read_sql_query(query, engine)
+        if df.empty:
+            logger.info(f"No data found for {year}, skipping")
+            continue
+
+        df['A_Date'] = pd.to_datetime(df['A_Date'])
+        partition_dir = os.path.join(store_path, f"year={year}")
+        os.makedirs(partition_dir, exist_ok=True)
+        df.to_parquet(os.path.join(partition_dir, 'data.parquet'), index=False)
+
+        logger.info(f"Exported {len(df)} rows for {year} | Processing Time: {time.time() - year_start_time:.2f} seconds")
+
+
+class AccordStore:
+    """
+    Read-only access to a Parquet snapshot written by export_accord_snapshot.
+
+    Mirrors the queries StockAnalyzer runs against SQL Server so that
+    backtests can run offline. Year partitions are loaded lazily and kept
+    in memory for the lifetime of the store.
+    """
+    def __init__(self, store_path: str = DEFAULT_STORE_PATH):
+        if not os.path.isdir(store_path):
+            raise FileNotFoundError(f"ACCORD store not found at {store_path}")
+        self.store_path = store_path
+        self._frames: Dict[int, pd.DataFrame] = {}
+
+    def available_years(self) -> List[int]:
+        years = []
+        for name in os.listdir(self.store_path):
+            if name.startswith('year='):
+                years.append(int(name.split('=', 1)[1]))
+        return sorted(years)
+
+    def partition_id(self, year: int) -> str:
+        """
+        Fingerprint of one year partition; changes only when that year is re-exported.
+        """
+        path = os.path.join(self.store_path, f"year={year}", 'data.parquet')
+        if not os.path.exists(path):
+            return f"{year}:missing"
+        stat = os.stat(path)
+        return f"{year}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    def trading_dates(self) -> pd.Series:
+        """
+        Distinct A_Date values across all partitions, reading only that column.
+        """
+        dates = []
+        for year in self.available_years():
+            path = os.path.join(self.store_path, f"year={year}", 'data.parquet')
+            dates.append(pd.read_parquet(path, columns=['A_Date'])['A_Date'])
+        if not dates:
+            return pd.Series([], dtype='datetime64[ns]')
+        return pd.Series(pd.to_datetime(pd.concat(dates)).unique())
+
+    def load_year(self, year: int) -> pd.DataFrame:
+        """
+        Load one year partition, indexed and sorted by A_Date.
+        """
+        if year not in self._frames:
+            path = os.path.join(self.store_path, f"year={year}", 'data.parquet')
+            if os.path.exists(path):
+                df = pd.read_parquet(path)
+                df['A_Date'] = pd.to_datetime(df['A_Date'])
+                df = df.set_index('A_Date', drop=False).sort_index(kind='stable')
+            else:
+                df = pd.DataFrame(columns=ACCORD_COLUMNS).set_index('A_Date', drop=False)
+            self._frames[year] = df
+        return self._frames[year]
+
+    def load_range(self, start_date: str, end_date: str) -> pd.DataFrame:
+        """
+        Return all rows with start_date <= A_Date <= end_date.
+        """
+        start = pd.Timestamp(start_date)
+        end = pd.Timestamp(end_date)
+        frames = [self.load_year(year) for year in range(start.year, end.year + 1)]
+        frames = [df.loc[start:end] for df in frames if not df.empty]
+        if not frames:
+            return pd.DataFrame(columns=ACCORD_COLUMNS)
+        return pd.concat(frames).reset_index(drop=True)
+
+    def get_month_end_dates(self, year: int) -> pd.DataFrame:
+        df = self.load_range(f"{year-1}-12-01", f"{year+1}-01-31")
+        dates = pd.Series(df['A_Date'].unique())
+        month_ends = dates.groupby([dates.dt.year, dates.dt.month]).max().sort_values()
+        return pd.DataFrame({'Last_Date_Of_Month': month_ends.values})
+
+    def get_top_stocks(self, current_date_str: str, portfolio_size: int,
+                       universe_size: int = 500, rank_column: str = 'Sharpe_365') -> pd.DataFrame:
+        """
+        Top portfolio_size symbols by rank_column among the universe_size
+        largest companies by MCAP_Crs on current_date_str.
+        """
+        day = self.load_range(current_date_str, current_date_str)
+        ranked = day[day[rank_column].notna()].drop_duplicates(['NSE_Symbol', 'MCAP_Crs'])
+        universe = ranked.sort_values('MCAP_Crs', ascending=False, kind='stable').head(universe_size)
+
+        in_universe = day[day['NSE_Symbol'].isin(universe['NSE_Symbol'])]
+        avg_rank = in_universe.groupby('NSE_Symbol', sort=False)[rank_column].mean()
+        top = avg_rank.sort_values(ascending=False, kind='stable').head(portfolio_size)
+        return pd.DataFrame({'NSE_Symbol': top.index.tolist()})
+
+    def get_daily_closes(self, symbols: List[str], start_date: str, end_date: str) -> pd.DataFrame:
+        df = self.load_range(start_date, end_date)
+        df = df[df['NSE_Symbol'].isin(symbols)]
+        return df[['A_Date', 'NSE_Symbol', 'A_Close']].sort_values(['A_Date', 'NSE_Symbol']).reset_index(drop=True)
+
+    def get_open_values(self, date: str, symbols: List[str]) -> pd.DataFrame:
+        df = self.load_range(date, date)
+        return df.loc[df['NSE_Symbol'].isin(symbols), ['A_Date', 'NSE_Symbol', 'A_Open']].reset_index(drop=True)
+
+
+def main():
+    connection_string = 'mssql+pyodbc://@DELL-123456789\\MSSQLSERVER01/ACCORD_DATA_SUBSET?driver=ODBC+Driver+17+for+SQL+Server'
+
+    # Backtests need December of the previous year and January of the next
+    years = list(range(2010, 2025))
+
+    export_accord_snapshot(connection_string, DEFAULT_STORE_PATH, years)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import pandas as pd
+from sqlalchemy import text
+import logging
+from typing import Dict, List, Tuple
+import time
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_TABLE = 'ACCORD_DATA_SUBSET.dbo.ACCORD_DATA'
+WINDOWS_TABLE = '#price_windows'
+
+
+def merge_windows(windows: List[Tuple[str, pd.Timestamp, pd.Timestamp]]) -> List[Tuple[str, pd.Timestamp, pd.Timestamp]]:
+    """
+    Collapse overlapping or touching (symbol, start, end) windows per symbol,
+    e.g. consecutive months that share a month-end date.
+    """
+    merged = []
+    for symbol, start, end in sorted(windows):
+        if merged and merged[-1][0] == symbol and start <= merged[-1][2] + pd.Timedelta(days=1):
+            merged[-1] = (symbol, merged[-1][1], max(end, merged[-1][2]))
+        else:
+            merged.append((symbol, start, end))
+    return merged
+
+
+class BulkPriceLoader:
+    """
+    Fetch A_Close for many (symbol, date window) pairs in one set-based query.
+
+    Windows are registered with add_window, merged per symbol and loaded
+    into a session temp table that is joined against the fact table. The
+    result is kept in memory and sliced per month by get_closes, replacing
+    one IN (...) query per month (or one query per symbol per month).
+    """
+    def __init__(self, engine, table: str = DEFAULT_TABLE, chunk_size: int = 1000):
+        self.engine = engine
+        self.table = table
+        self.chunk_size = chunk_size
+        self._pending: List[Tuple[str, pd.Timestamp, pd.Timestamp]] = []
+        self._fetched: Dict[str, List[Tuple[pd.Timestamp, pd.Timestamp]]] = {}
+        self._prices: Dict[str, pd.DataFrame] = {}
+
+    def add_window(self, symbols: List[str], start_date: str, end_date: str) -> None:
+        start = pd.Timestamp(start_date)
+        end = pd.Timestamp(end_date)
+        for symbol in symbols:
+            if not self._is_covered(symbol, start, end):
+                self._pending.append((symbol, start, end))
+
+    def _is_covered(self, symbol: str, start: pd.Timestamp, end: pd.Timestamp) -> bool:
+        return any(s <= start and end <= e for s, e in self._fetched.get(symbol, []))
+
+    def covers(self, symbols: List[str], start_date: str, end_date: str) -> bool:
+        start = pd.Timestamp(start_date)
+        end = pd.Timestamp(end_date)
+        return all(self._is_covered(symbol, start, end) for symbol in symbols)
+
+    def fetch(self) -> int:
+        """
+        Load every pending window with a single join query. Returns the number of rows fetched.
+        """
+        windows = merge_windows(self._pending)
+        self._pending = []
+        if not windows:
+            return 0
+
+        fetch_start_time = time.time()
+        rows = [
+            {'NSE_Symbol': symbol, 'Start_Date': start.strftime('%Y-%m-%d'), 'End_Date': end.strftime('%Y-%m-%d')}
+            for symbol, start, end in windows
+        ]
+        query = f"""
+        SELECT
+            a.A_Date,
+            a.NSE_Symbol,
+            a.A_Close
+        FROM {self.table} a
+        INNER JOIN {WINDOWS_TABLE} w
+            ON a.NSE_Symbol = w.NSE_Symbol
+            AND a.A_Date BETWEEN w.Start_Date AND w.End_Date
+        ORDER BY a.NSE_Symbol, a.A_Date;
+        """
+
+        # The temp table only lives as long as this connection
+        with self.engine.begin() as conn:
+            conn.execute(text(f"CREATE TABLE {WINDOWS_TABLE} (NSE_Symbol VARCHAR(64), Start_Date DATE, End_Date DATE)"))
+            insert = text(f"INSERT INTO {WINDOWS_TABLE} (NSE_Symbol, Start_Date, End_Date) VALUES (:NSE_Symbol, :Start_Date, :End_Date)")
+            for i in range(0, len(rows), self.chunk_size):
+                conn.execute(insert, rows[i:i + self.chunk_size])
+            df = pd.read_sql_query(text(query), conn)
+            conn.execute(text(f"DROP TABLE {WINDOWS_TABLE}"))
+
+        df['A_Date'] = pd.to_datetime(df['A_Date'])
+        for symbol, symbol_df in df.groupby('NSE_Symbol', sort=False):
+            symbol_df = symbol_df.set_index('A_Date', drop=False).rename_axis(None)
+            if symbol in self._prices:
+                symbol_df = pd.concat([self._prices[symbol], symbol_df])
+                symbol_df = symbol_df[~symbol_df.index.duplicated(keep='last')]
+            self._prices[symbol] = symbol_df.sort_index()
+        for symbol, start, end in windows:
+            self._fetched.setdefault(symbol, []).append((start, end))
+
+        logger.info(f"Fetched {len(df)} closes for {len(windows)} windows | Processing Time: {time.time() - fetch_start_time:.2f} seconds")
+        return len(df)
+
+    def get_closes(self, symbols: List[str], start_date: str, end_date: str) -> pd.DataFrame:
+        """
+        Same rows as the per-month SELECT A_Date, NSE_Symbol, A_Close query, served from memory.
+        """
+        start = pd.Timestamp(start_date)
+        end = pd.Timestamp(end_date)
+        frames = [self._prices[symbol].loc[start:end] for symbol in symbols if symbol in self._prices]
+        frames = [df for df in frames if not df.empty]
+        if not frames:
+            return pd.DataFrame(columns=['A_Date', 'NSE_Symbol', 'A_Close'])
+        return pd.concat(frames).sort_values(['A_Date', 'NSE_Symbol']).reset_index(drop=True)
@@ -0,0 +1,187 @@
+import pandas as pd
+import json
+import logging
+import os
+from typing import Dict, List, Tuple
+import time
+from optimised_backtest_return_drawdown import StockAnalyzer
+from metrics_accumulator import StreamingMetrics
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_DIR = '../results/incremental'
+
+
+def load_checkpoint(state_dir: str) -> Dict:
+    path = os.path.join(state_dir, 'checkpoint.json')
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def save_checkpoint(state_dir: str, checkpoint: Dict) -> None:
+    """
+    Write the checkpoint atomically so a crash never leaves a half-written file.
+    """
+    path = os.path.join(state_dir, 'checkpoint.json')
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def file_size(path: str) -> int:
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def truncate_to_checkpoint(path: str, size: int) -> None:
+    """
+    Drop whatever was appended to path after the checkpoint recorded its
+    size, i.e. the rows of a month whose checkpoint was never saved, so a
+    rerun does not write that month twice.
+    """
+    if size is not None and file_size(path) > size:
+        logger.info(f"Removing rows written after the last checkpoint from {path}")
+        with open(path, 'r+') as f:
+            f.truncate(size)
+
+
+def pending_months(analyzer: StockAnalyzer, last_rebalance_date: str) -> List[Tuple[str, str]]:
+    """
+    (selection date, next selection date) pairs after last_rebalance_date.
+
+    Like analyze_top_stocks, a month is only processed once the month after
+    it has data, so a partially loaded month is never chained into the NAV.
+    """
+    month_ends = analyzer.calendar.all_month_ends()
+    month_ends = month_ends[month_ends >= pd.Timestamp(last_rebalance_date)]
+    return [
+        (month_ends[i].strftime('%Y-%m-%d'), month_ends[i + 1].strftime('%Y-%m-%d'))
+        for i in range(len(month_ends) - 2)
+    ]
+
+
+def run_incremental(analyzer: StockAnalyzer, start_year: int, portfolio_size: int,
+                    universe_size: int = 500, rank_column: str = 'Sharpe_365',
+                    state_dir: str = DEFAULT_STATE_DIR) -> Dict:
+    """
+    Extend the chained portfolio NAV with the months that are not yet in the
+    checkpoint, saving the state after every month.
+
+    The checkpoint holds current_portfolio_value, the last rebalance date, the
+    holdings and the running StreamingMetrics state; the daily values are
+    appended to daily_portfolio_returns.csv and the monthly returns to
+    monthly_returns.csv in state_dir. The checkpoint also records the size
+    of both files, and anything past it is cut off on resume.
+    """
+    if analyzer.calendar is None:
+        raise ValueError("Incremental mode needs a StockAnalyzer with a trading calendar")
+
+    os.makedirs(state_dir, exist_ok=True)
+    params = {
+        'start_year': start_year,
+        'portfolio_size': portfolio_size,
+        'universe_size': universe_size,
+        'rank_column': rank_column
+    }
+
+    checkpoint = load_checkpoint(state_dir)
+    if checkpoint is None:
+        first_month_end = analyzer.calendar.month_end(start_year - 1, 12)
+        if first_month_end is None:
+            raise ValueError(f"No data for December {start_year - 1} to start the backtest from")
+        checkpoint = {
+            **params,
+            'current_portfolio_value': 1,
+            'last_rebalance_date': first_month_end.strftime('%Y-%m-%d'),
+            'holdings': [],
+            'months_completed': 0,
+            'metrics': StreamingMetrics().to_dict(),
+            'daily_file_size': 0,
+            'monthly_file_size': 0
+        }
+    elif any(checkpoint[key] != value for key, value in params.items()):
+        raise ValueError(f"Checkpoint in {state_dir} was created with different parameters: "
+                         f"{ {key: checkpoint[key] for key in params} }")
+
+    metrics = StreamingMetrics.from_dict(checkpoint['metrics'])
+    daily_file = os.path.join(state_dir, 'daily_portfolio_returns.csv')
+    monthly_file = os.path.join(state_dir, 'monthly_returns.csv')
+    truncate_to_checkpoint(daily_file, checkpoint.get('daily_file_size'))
+    truncate_to_checkpoint(monthly_file, checkpoint.get('monthly_file_size'))
+
+    months = pending_months(analyzer, checkpoint['last_rebalance_date'])
+    logger.info(f"{len(months)} new months to process since {checkpoint['last_rebalance_date']}")
+    analyzer.load_selection_fingerprints([start for start, _ in months], rank_column)
+
+    for portfolio_selection_date_str, next_portfolio_selection_date_str in months:
+        month_start_time = time.time()
+
+        df_top_15 = analyzer.get_top_stocks(portfolio_selection_date_str, portfolio_size, universe_size, rank_column)
+        if df_top_15.empty:
+            logger.info(f"No data found for the top {portfolio_size} symbols on {portfolio_selection_date_str}")
+        else:
+            current_portfolio = df_top_15['NSE_Symbol'].tolist()
+            portfolio_values, _ = analyzer.get_daily_portfolio_value(
+                current_portfolio,
+                portfolio_selection_date_str,
+                next_portfolio_selection_date_str
+            )
+
+            if not portfolio_values.empty:
+                # Same chaining as get_full_portfolio_series
+                scaled_values = portfolio_values['Total_Value'] * (checkpoint['current_portfolio_value'] / portfolio_size)
+                metrics.update(scaled_values)
+                scaled_values.to_csv(daily_file, mode='a', header=file_size(daily_file) == 0, index=True)
+
+                start_value = portfolio_values['Total_Value'].iloc[0]
+                end_value = portfolio_values['Total_Value'].iloc[-1]
+                monthly_portfolio_return = ((end_value - start_value) / start_value) * 100
+                pd.DataFrame([{
+                    'Date': portfolio_selection_date_str,
+                    'Return': monthly_portfolio_return,
+                    'Symbols': ','.join(current_portfolio)
+                }]).to_csv(monthly_file, mode='a', header=file_size(monthly_file) == 0, index=False)
+
+                checkpoint['current_portfolio_value'] = float(scaled_values.iloc[-1])
+                checkpoint['holdings'] = current_portfolio
+
+        checkpoint['last_rebalance_date'] = next_portfolio_selection_date_str
+        checkpoint['months_completed'] += 1
+        checkpoint['metrics'] = metrics.to_dict()
+        checkpoint['daily_file_size'] = file_size(daily_file)
+        checkpoint['monthly_file_size'] = file_size(monthly_file)
+        save_checkpoint(state_dir, checkpoint)
+
+        logger.info(f"Processed month {portfolio_selection_date_str} | Processing Time: {time.time() - month_start_time:.2f} seconds")
+
+    return checkpoint
+
+
+def main():
+    connection_string = 'mssql+pyodbc://@DELL-123456789\\MSSQLSERVER01/ACCORD_DATA_SUBSET?driver=ODBC+Driver+17+for+SQL+Server'
+
+    # Set to the accord_store.py export (e.g. '../data/accord_store') to run offline
+    store_path = None
+
+    #enter the start year and portfolio size
+    start_year = 2011
+    portfolio_size = 10
+
+    analyzer = StockAnalyzer(connection_string, store_path=store_path)
+    checkpoint = run_incremental(analyzer, start_year, portfolio_size)
+
+    logger.info(f"Portfolio value as of {checkpoint['last_rebalance_date']}: {checkpoint['current_portfolio_value']:.4f}")
+    logger.info(f"Holdings: {', '.join(checkpoint['holdings'])}")
+
+    metrics = StreamingMetrics.from_dict(checkpoint['metrics'])
+    logger.info(f"CAGR: {metrics.cagr:.2f}% | Maximum Drawdown: {metrics.max_drawdown:.2f}% "
+                f"({metrics.drawdown_peak_date} to {metrics.drawdown_trough_date}) | "
+                f"Volatility: {metrics.volatility:.2f}% | Sharpe: {metrics.sharpe:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import pandas as pd
+from typing import Dict
+import numpy as np
+
+
+class StreamingMetrics:
+    """
+    Running portfolio metrics over a NAV series fed in chunks (e.g. one month
+    at a time), using constant memory.
+
+    Tracks the running peak, maximum drawdown with its peak/trough dates, the
+    first and last values for total return and CAGR, and the mean/variance of
+    daily returns (Chan et al. parallel update) for volatility and Sharpe.
+    Values are taken in the order given; NaNs are skipped like the
+    expanding().max() in calculate_max_drawdown.
+    """
+    def __init__(self, trading_days_per_year: int = 252):
+        self.trading_days_per_year = trading_days_per_year
+        self.count = 0
+        self.first_value = None
+        self.first_date = None
+        self.last_value = None
+        self.last_date = None
+        self.peak = None
+        self.peak_date = None
+        self.max_drawdown_fraction = 0.0
+        self.drawdown_peak_date = None
+        self.drawdown_trough_date = None
+        self.return_count = 0
+        self.return_mean = 0.0
+        self.return_m2 = 0.0
+
+    def update(self, values, dates=None) -> None:
+        """
+        Ingest the next chunk of NAV values. A pandas Series supplies its own
+        index as dates.
+        """
+        if isinstance(values, pd.Series):
+            if dates is None:
+                dates = values.index
+            values = values.to_numpy(dtype=float)
+        values = np.asarray(values, dtype=float)
+        dates = np.asarray(dates) if dates is not None else np.full(len(values), None)
+
+        valid = ~np.isnan(values)
+        values = values[valid]
+        dates = dates[valid]
+        if len(values) == 0:
+            return
+
+        if self.first_value is None:
+            self.first_value = values[0]
+            self.first_date = dates[0]
+            self.peak = values[0]
+            self.peak_date = dates[0]
+
+        # Drawdown against the running peak carried over from earlier chunks
+        running_peak = np.maximum.accumulate(np.maximum(values, self.peak))
+        is_peak = values >= running_peak
+        # Position of the running peak for every value; -1 means the carried-over peak
+        peak_position = np.maximum.accumulate(np.where(is_peak, np.arange(len(values)), -1))
+        drawdowns = (values - running_peak) / running_peak
+
+        trough = int(np.argmin(drawdowns))
+        if drawdowns[trough] < self.max_drawdown_fraction:
+            self.max_drawdown_fraction = float(drawdowns[trough])
+            self.drawdown_trough_date = dates[trough]
+            self.drawdown_peak_date = dates[peak_position[trough]] if peak_position[trough] >= 0 else self.peak_date
+
+        if peak_position[-1] >= 0:
+            self.peak = float(values[peak_position[-1]])
+            self.peak_date = dates[peak_position[-1]]
+
+        # Daily returns, including the step from the previous chunk's last value
+        previous = np.concatenate([[self.last_value], values[:-1]]) if self.last_value is not None else values[:-1]
+        current = values if self.last_value is not None else values[1:]
+        if len(current):
+            returns = current / previous - 1
+            n_b = len(returns)
+            mean_b = float(returns.mean())
+            m2_b = float(((returns - mean_b) ** 2).sum())
+            n_a = self.return_count
+            delta = mean_b - self.return_mean
+            total = n_a + n_b
+            self.return_mean += delta * n_b / total
+            self.return_m2 += m2_b + delta ** 2 * n_a * n_b / total
+            self.return_count = total
+
+        self.count += len(values)
+        self.last_value = float(values[-1])
+        self.last_date = dates[-1]
+
+    @property
+    def max_drawdown(self) -> float:
+        """
+        Maximum drawdown in %, as returned by calculate_max_drawdown.
+        """
+        return self.max_drawdown_fraction * 100
+
+    @property
+    def total_return(self) -> float:
+        if self.first_value is None:
+            return 0.0
+        return (self.last_value - self.first_value) / self.first_value * 100
+
+    @property
+    def cagr(self) -> float:
+        if self.first_value is None or self.first_date is None:
+            return 0.0
+        years = (pd.Timestamp(self.last_date) - pd.Timestamp(self.first_date)).days / 365.25
+        if years <= 0:
+            return 0.0
+        return (((self.last_value / self.first_value) ** (1 / years)) - 1) * 100
+
+    @property
+    def volatility(self) -> float:
+        """
+        Annualised volatility of daily returns in %.
+        """
+        if self.return_count < 2:
+            return 0.0
+        return float(np.sqrt(self.return_m2 / (self.return_count - 1) * self.trading_days_per_year) * 100)
+
+    @property
+    def sharpe(self) -> float:
+        """
+        Annualised Sharpe ratio of daily returns with a zero risk-free rate.
+        """
+        if self.return_count < 2 or self.return_m2 == 0:
+            return 0.0
+        daily_std = np.sqrt(self.return_m2 / (self.return_count - 1))
+        return float(self.return_mean / daily_std * np.sqrt(self.trading_days_per_year))
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            'total_return': self.total_return,
+            'cagr': self.cagr,
+            'max_drawdown': self.max_drawdown,
+            'volatility': self.volatility,
+            'sharpe': self.sharpe
+        }
+
+    def to_dict(self) -> Dict:
+        """
+        JSON-serialisable state, e.g. for the incremental backtest checkpoint.
+        """
+        state = dict(self.__dict__)
+        for key in ('first_date', 'last_date', 'peak_date', 'drawdown_peak_date', 'drawdown_trough_date'):
+            if state[key] is not None:
+                state[key] = pd.Timestamp(state[key]).strftime('%Y-%m-%d')
+        for key in ('first_value', 'last_value', 'peak'):
+            if state[key] is not None:
+                state[key] = float(state[key])
+        return state
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'StreamingMetrics':
+        metrics = cls(state['trading_days_per_year'])
+        metrics.__dict__.update(state)
+        for key in ('first_date', 'last_date', 'peak_date', 'drawdown_peak_date', 'drawdown_trough_date'):
+            if state[key] is not None:
+                setattr(metrics, key, pd.Timestamp(state[key]))
+        return metrics
@@ -4,6 +4,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.pool import QueuePool
 import logging
 from typing import List, Tuple
+from bulk_prices import BulkPriceLoader
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
@@ -28,6 +29,9 @@ class StockAnalyzer:
             logger.error(f"Database connection error: {e}")
             raise
 
+        # Closes for all months are fetched in one join query instead of per symbol
+        self.price_loader = BulkPriceLoader(self.engine, table='ACCORD_DATA.dbo.ACCORD_DATA')
+
     def get_month_end_dates(self, year: int) -> pd.DataFrame:
         """
         Fetch the last date of each month for a given year.
@@ -59,7 +63,8 @@ class StockAnalyzer:
             monthly_returns = []
             monthly_portfolio = []
 
-            # Process each month
+            # Select the top 15 companies for each month
+            monthly_selections = []
             for i in range(months_in_year):
                 i=i+1
                 current_date = month_end_dates.iloc[i]['Last_Date_Of_Month']
@@ -84,22 +89,26 @@ class StockAnalyzer:
                 
                 # Select top 15 companies by Sharpe_365
                 df_top_15 = df_top_500.nlargest(15, 'Sharpe_365')
-                monthly_portfolio.append(df_top_15['NSE_Symbol'].tolist())
+                symbols = df_top_15['NSE_Symbol'].tolist()
+                monthly_portfolio.append(symbols)
+                monthly_selections.append((i, current_date, next_date, symbols))
+                self.price_loader.add_window(symbols, current_date_str, next_date_str)
+
+            # Fetch closing prices of every month and symbol in one query
+            self.price_loader.fetch()
+
+            # Process each month
+            for i, current_date, next_date, symbols in monthly_selections:
+                current_date_str = current_date.strftime('%Y-%m-%d')
+                next_date_str = next_date.strftime('%Y-%m-%d')
+                df_month = self.price_loader.get_closes(symbols, current_date_str, next_date_str)
+                df_month = df_month[df_month['A_Date'].isin([current_date, next_date])]
 
                 # Calculate percentage changes for top 15 companies
                 monthly_percentage_changes = []
                 
-                for _, row in df_top_15.iterrows():
-                    symbol = row['NSE_Symbol']
-                    
-                    # Fetch closing prices for current and next month
-                    close_query = f"""
-                    SELECT A_Date, A_Close
-                    FROM ACCORD_DATA.dbo.ACCORD_DATA
-                    WHERE NSE_Symbol = '{symbol}' AND A_Date IN ('{current_date_str}', '{next_date_str}')
-                    ORDER BY A_Date;
-                    """
-                    df_closes = pd.read_sql_query(close_query, self.engine)
+                for symbol in symbols:
+                    df_closes = df_month[df_month['NSE_Symbol'] == symbol]
                     
                     if len(df_closes) == 2:
                         current_close = df_closes.loc[df_closes['A_Date'] == current_date, 'A_Close'].iloc[0]
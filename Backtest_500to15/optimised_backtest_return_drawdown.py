@@ -7,6 +7,11 @@ from typing import List, Tuple
 import time
 import numpy as np
 import matplotlib.pyplot as plt
+from accord_store import AccordStore
+from trading_calendar import TradingCalendar, DEFAULT_CALENDAR_PATH
+from metrics_accumulator import StreamingMetrics
+from bulk_prices import BulkPriceLoader
+from selection_cache import SelectionCache, DEFAULT_SELECTION_CACHE_DIR, selection_cache_path
 
 
 # Configure logging
@@ -14,7 +19,20 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(m
 logger = logging.getLogger(__name__)
 
 class StockAnalyzer:
-    def __init__(self, connection_string: str):
+    def __init__(self, connection_string: str = None, store_path: str = None,
+                 calendar_path: str = DEFAULT_CALENDAR_PATH,
+                 selection_cache_dir: str = DEFAULT_SELECTION_CACHE_DIR,
+                 calendar: TradingCalendar = None):
+        # Serve all queries from a local Parquet snapshot when store_path is given
+        self.store = AccordStore(store_path) if store_path else None
+        if self.store is not None:
+            self.engine = None
+            self.price_loader = None
+            self.calendar = calendar if calendar is not None else TradingCalendar.from_store(self.store)
+            self.selection_cache = (SelectionCache('store', selection_cache_path('store', selection_cache_dir))
+                                    if selection_cache_dir else None)
+            return
+
         try:
             self.engine = create_engine(
                 connection_string, 
@@ -26,7 +44,26 @@ class StockAnalyzer:
             logger.error(f"Database connection error: {e}")
             raise
 
+        # Daily closes for a whole year are fetched in one join query by analyze_top_stocks
+        self.price_loader = BulkPriceLoader(self.engine)
+
+        # Month ends come from the saved trading calendar instead of a GROUP BY per year;
+        # a calendar passed in (e.g. by a pool worker) is used as is, without touching the file
+        if calendar is not None:
+            self.calendar = calendar
+        else:
+            self.calendar = TradingCalendar.load_or_build(self.engine, calendar_path) if calendar_path else None
+
+        # A selection only reads its own date's rows; their fingerprints are fetched
+        # for all rebalance dates at once by load_selection_fingerprints
+        self.selection_cache = (SelectionCache('sql', selection_cache_path('sql', selection_cache_dir))
+                                if selection_cache_dir else None)
+        self.selection_fingerprints = {}
+
     def get_month_end_dates(self, year: int) -> pd.DataFrame:
+        if self.calendar is not None:
+            return self.calendar.month_end_dates(year)
+
         y1 = year-1
         y2 = year+1
         query = f"""
@@ -42,19 +79,24 @@ class StockAnalyzer:
         """
         Calculate daily portfolio value for given symbols between dates.
         """
-        symbols_str = "','".join(symbols)
-        query = f"""
-        SELECT 
-            A_Date,
-            NSE_Symbol,
-            A_Close
-        FROM ACCORD_DATA_SUBSET.dbo.ACCORD_DATA
-        WHERE NSE_Symbol IN ('{symbols_str}')
-        --AND A_Date BETWEEN DATEADD(day,1,'{start_date}') AND '{end_date}'
-        AND A_Date BETWEEN '{start_date}' AND '{end_date}'
-        ORDER BY A_Date, NSE_Symbol;
-        """
-        df = pd.read_sql_query(query, self.engine)
+        if self.store is not None:
+            df = self.store.get_daily_closes(symbols, start_date, end_date)
+        elif self.price_loader.covers(symbols, start_date, end_date):
+            df = self.price_loader.get_closes(symbols, start_date, end_date)
+        else:
+            symbols_str = "','".join(symbols)
+            query = f"""
+            SELECT 
+                A_Date,
+                NSE_Symbol,
+                A_Close
+            FROM ACCORD_DATA_SUBSET.dbo.ACCORD_DATA
+            WHERE NSE_Symbol IN ('{symbols_str}')
+            --AND A_Date BETWEEN DATEADD(day,1,'{start_date}') AND '{end_date}'
+            AND A_Date BETWEEN '{start_date}' AND '{end_date}'
+            ORDER BY A_Date, NSE_Symbol;
+            """
+            df = pd.read_sql_query(query, self.engine)
         
         # Pivot to get daily closing prices
         portfolio_value = df.pivot(index='A_Date', columns='NSE_Symbol', values='A_Close')
@@ -146,6 +188,9 @@ class StockAnalyzer:
         """
         Fetch the opening value for the given date and symbols.
         """
+        if self.store is not None:
+            return self.store.get_open_values(date, symbols)['A_Open'].sum()
+
         # Join all but last symbol with comma
         # symbols_str = ','.join(symbols[:-1])
         symbols_str = "','".join(symbols)
@@ -230,15 +275,76 @@ class StockAnalyzer:
         plt.close()    
         return total_return    
 
-    def get_top_stocks(self, current_date_str: str, portfolio_size: int) -> List[str]:
+    def get_top_stocks(self, current_date_str: str, portfolio_size: int,
+                       universe_size: int = 500, rank_column: str = 'Sharpe_365') -> List[str]:
+        if self.selection_cache is not None:
+            source_version = self.selection_source_version(current_date_str, rank_column)
+            cached_symbols = self.selection_cache.get(current_date_str, universe_size, rank_column,
+                                                      portfolio_size, source_version)
+            if cached_symbols is not None:
+                return pd.DataFrame({'NSE_Symbol': cached_symbols})
+
+        if self.store is not None:
+            df_top_15 = self.store.get_top_stocks(current_date_str, portfolio_size, universe_size, rank_column)
+        else:
+            df_top_15 = self.query_top_stocks(current_date_str, portfolio_size, universe_size, rank_column)
+
+        if self.selection_cache is not None:
+            self.selection_cache.put(current_date_str, universe_size, rank_column, portfolio_size,
+                                     df_top_15['NSE_Symbol'].tolist(), source_version)
+        return df_top_15
+
+    def selection_source_version(self, current_date_str: str, rank_column: str = 'Sharpe_365') -> str:
+        """
+        Version of the data a selection on current_date_str reads: the
+        fingerprint of that date's year partition in the store, or in SQL
+        mode the row count and a checksum of the ranked columns for that
+        date, so corrected or backfilled rows invalidate the cached entry.
+        SQL fingerprints come from load_selection_fingerprints when the
+        dates were loaded up front, otherwise from a query for this date.
+        """
+        if self.store is not None:
+            return self.store.partition_id(pd.Timestamp(current_date_str).year)
+        key = (rank_column, current_date_str)
+        if key not in self.selection_fingerprints:
+            self.load_selection_fingerprints([current_date_str], rank_column)
+        return self.selection_fingerprints[key]
+
+    def load_selection_fingerprints(self, dates: List[str], rank_column: str = 'Sharpe_365') -> None:
+        """
+        Fetch the SQL-mode fingerprints of all given selection dates in one
+        grouped query and keep them for selection_source_version.
+        """
+        if self.store is not None or self.selection_cache is None:
+            return
+        dates = [d for d in dates if (rank_column, d) not in self.selection_fingerprints]
+        if not dates:
+            return
+        date_list = ", ".join(f"'{d}'" for d in dates)
+        fingerprint_query = f"""
+                SELECT CONVERT(varchar(10), A_Date, 23) AS A_Date,
+                    COUNT(*) AS row_count,
+                    CHECKSUM_AGG(CHECKSUM(NSE_Symbol, MCAP_Crs, {rank_column})) AS row_checksum
+                FROM ACCORD_DATA_SUBSET.dbo.ACCORD_DATA
+                WHERE A_Date IN ({date_list})
+                GROUP BY A_Date
+                """
+        df = pd.read_sql_query(fingerprint_query, self.engine)
+        fingerprints = {row.A_Date: f"ACCORD_DATA:{row.row_count}:{row.row_checksum}" for row in df.itertuples()}
+        for d in dates:
+            # A date with no rows yet gets its own version, replaced once rows arrive
+            self.selection_fingerprints[(rank_column, d)] = fingerprints.get(d, 'ACCORD_DATA:0:')
+
+    def query_top_stocks(self, current_date_str: str, portfolio_size: int,
+                         universe_size: int = 500, rank_column: str = 'Sharpe_365') -> pd.DataFrame:
         top_500_query = f"""
                 WITH RankedCompanies AS (
-                    SELECT DISTINCT TOP 500 
+                    SELECT DISTINCT TOP {universe_size} 
                         NSE_Symbol,
                         MCAP_Crs
                     FROM ACCORD_DATA_SUBSET.dbo.ACCORD_DATA
                     WHERE A_Date = '{current_date_str}'
-                    AND Sharpe_365 IS NOT NULL
+                    AND {rank_column} IS NOT NULL
                     ORDER BY MCAP_Crs DESC
                 ),
                 LastFiveDays AS (
@@ -246,7 +352,7 @@ class StockAnalyzer:
                         a.NSE_Symbol,
                         a.A_Date,
                         a.A_Close,
-                        a.Sharpe_365,
+                        a.{rank_column},
                         a.MCAP_Crs,
                         ROW_NUMBER() OVER (PARTITION BY a.NSE_Symbol ORDER BY a.A_Date DESC) as rn
                     FROM ACCORD_DATA_SUBSET.dbo.ACCORD_DATA a
@@ -263,7 +369,7 @@ class StockAnalyzer:
                 FROM LastFiveDays
                 GROUP BY NSE_Symbol
                 -- HAVING COUNT(*) = 5
-                ORDER BY AVG(Sharpe_365) DESC;
+                ORDER BY AVG({rank_column}) DESC;
                 """
                 
         # df_top_500 = pd.read_sql_query(top_500_query, self.engine)
@@ -271,11 +377,13 @@ class StockAnalyzer:
         df_top_15 = pd.read_sql_query(top_500_query, self.engine)
         return df_top_15
     
-    def analyze_top_stocks(self, year: int, portfolio_size: int) -> Tuple[List[List[str]], List[Tuple[str, float]], float, float]:
+    def analyze_top_stocks(self, year: int, portfolio_size: int,
+                           universe_size: int = 500, rank_column: str = 'Sharpe_365') -> Tuple[List[List[str]], List[Tuple[str, float]], float, float]:
         monthly_returns = []
         monthly_portfolio = []
         monthly_portfolio_values = []  # New list to store portfolio values
-        all_portfolio_values = pd.DataFrame()
+        # Running drawdown over the year without concatenating the monthly DataFrames
+        year_metrics = StreamingMetrics()
         monthly_individual_stock_returns = []
         
         try:
@@ -283,26 +391,38 @@ class StockAnalyzer:
             month_end_dates = self.get_month_end_dates(year)
             months_in_year = len(month_end_dates)-2
             
-            # Process each month
+            # Step 2: Get top stocks on every portfolio_selection_date
+            self.load_selection_fingerprints(
+                [d.strftime('%Y-%m-%d') for d in month_end_dates['Last_Date_Of_Month'].iloc[:months_in_year]],
+                rank_column
+            )
+            monthly_selections = []
             for i in range(months_in_year):
-                month_start_time = time.time()
-
                 portfolio_selection_date = month_end_dates.iloc[i]['Last_Date_Of_Month']
                 next_portfolio_selection_date = month_end_dates.iloc[i + 1]['Last_Date_Of_Month']
                 
                 portfolio_selection_date_str = portfolio_selection_date.strftime('%Y-%m-%d')
                 next_portfolio_selection_date_str = next_portfolio_selection_date.strftime('%Y-%m-%d')
 
-                # Step 2: Get top 15 stocks on portfolio_selection_date
-                df_top_15 = self.get_top_stocks(portfolio_selection_date_str, portfolio_size)
+                df_top_15 = self.get_top_stocks(portfolio_selection_date_str, portfolio_size, universe_size, rank_column)
 
                 if df_top_15.empty:
-                    logger.info("No data found for the top 15 symbols on {current_date_str}")
-                    logger.info("Current date: {current_date_str}")
+                    logger.info(f"No data found for the top {portfolio_size} symbols on {portfolio_selection_date_str}")
                     continue
 
-
                 current_portfolio = df_top_15['NSE_Symbol'].tolist()
+                monthly_selections.append((i, portfolio_selection_date_str, next_portfolio_selection_date_str, current_portfolio))
+
+            # Fetch the daily closes of all months in one query
+            if self.price_loader is not None:
+                for _, start_date_str, end_date_str, current_portfolio in monthly_selections:
+                    self.price_loader.add_window(current_portfolio, start_date_str, end_date_str)
+                self.price_loader.fetch()
+
+            # Process each month
+            for i, portfolio_selection_date_str, next_portfolio_selection_date_str, current_portfolio in monthly_selections:
+                month_start_time = time.time()
+
                 monthly_portfolio.append(current_portfolio)
 
                 # Step 3: Get daily portfolio values for current month
@@ -315,7 +435,7 @@ class StockAnalyzer:
                 # Store the monthly portfolio values
                 monthly_portfolio_values.append(portfolio_values)
 
-                all_portfolio_values = pd.concat([all_portfolio_values, portfolio_values])
+                year_metrics.update(portfolio_values['Total_Value'])
                 monthly_individual_stock_returns.append(individual_stock_returns)
                 
                 # Step 4: Calculate monthly return
@@ -331,8 +451,8 @@ class StockAnalyzer:
                 logger.info(f"Processed month {i+1}/{months_in_year} | Processing Time: {month_processing_time:.2f} seconds")
             
             # Step 5: Calculate maximum drawdown
-            if not all_portfolio_values.empty:
-                max_drawdown = self.calculate_max_drawdown(all_portfolio_values['Total_Value'])
+            if year_metrics.count > 0:
+                max_drawdown = year_metrics.max_drawdown
             else:
                 max_drawdown = 0.0
 
@@ -381,12 +501,15 @@ class StockAnalyzer:
 
 def main():
     connection_string = 'mssql+pyodbc://@DELL-123456789\\MSSQLSERVER01/ACCORD_DATA_SUBSET?driver=ODBC+Driver+17+for+SQL+Server'
+
+    # Set to the accord_store.py export (e.g. '../data/accord_store') to run offline
+    store_path = None
     
     #enter the period and portfolio size
     years = list(range(2011,2014))
     portfolio_size = 10
     
-    analyzer = StockAnalyzer(connection_string)
+    analyzer = StockAnalyzer(connection_string, store_path=store_path)
     portfolio_drawdown = []
 
     # Lists to store all monthly data
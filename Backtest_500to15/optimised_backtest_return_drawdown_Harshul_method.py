@@ -6,13 +6,15 @@ import logging
 from typing import List, Tuple
 import time
 import numpy as np
+from trading_calendar import TradingCalendar, DEFAULT_CALENDAR_PATH
+from metrics_accumulator import StreamingMetrics
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
 class StockAnalyzer:
-    def __init__(self, connection_string: str):
+    def __init__(self, connection_string: str, calendar_path: str = DEFAULT_CALENDAR_PATH):
         try:
             self.engine = create_engine(
                 connection_string, 
@@ -24,23 +26,29 @@ class StockAnalyzer:
             logger.error(f"Database connection error: {e}")
             raise
 
-    def get_month_end_dates(self, year: int) -> pd.DataFrame:
-        y1 = year-1
-        y2 = year+1
-        query = f"""
-        SELECT DISTINCT MAX(A_Date) AS Last_Date_Of_Month
-        FROM ACCORD_DATA_SUBSET.dbo.ACCORD_DATA
-        WHERE A_Date BETWEEN '{y1}-12-01' AND '{y2}-01-31'
-        GROUP BY YEAR(A_Date), MONTH(A_Date)
-        ORDER BY Last_Date_Of_Month;
+        # Month ends and next trading days come from the saved trading calendar
+        # instead of GROUP BY / MIN(A_Date) subqueries over the whole table
+        self.calendar = TradingCalendar.load_or_build(self.engine, calendar_path)
+
+    def next_trading_day_str(self, date_str: str) -> str:
         """
-        return pd.read_sql_query(query, self.engine)
+        First trading day after date_str; the last available date if there is none.
+        """
+        next_day = self.calendar.next_trading_day(date_str)
+        if next_day is None:
+            next_day = self.calendar.last_date
+        return next_day.strftime('%Y-%m-%d')
+
+    def get_month_end_dates(self, year: int) -> pd.DataFrame:
+        return self.calendar.month_end_dates(year)
 
     def get_daily_portfolio_value(self, symbols: List[str], start_date: str, end_date: str) -> pd.DataFrame:
         """
         Calculate daily portfolio value for given symbols between dates.
         """
         symbols_str = "','".join(symbols)
+        window_start = self.next_trading_day_str((pd.Timestamp(start_date) + pd.Timedelta(days=1)).strftime('%Y-%m-%d'))
+        window_end = self.next_trading_day_str((pd.Timestamp(end_date) + pd.Timedelta(days=1)).strftime('%Y-%m-%d'))
         query = f"""
         SELECT 
             A_Date,
@@ -48,8 +56,7 @@ class StockAnalyzer:
             A_Close
         FROM ACCORD_DATA_SUBSET.dbo.ACCORD_DATA
         WHERE NSE_Symbol IN ('{symbols_str}')
-        AND A_Date >= (SELECT MIN(A_Date) FROM ACCORD_DATA_SUBSET.dbo.ACCORD_DATA WHERE A_Date > DATEADD(day,1,'{start_date}'))
-        AND A_Date <= (SELECT MIN(A_Date) FROM ACCORD_DATA_SUBSET.dbo.ACCORD_DATA WHERE A_Date > DATEADD(day,1,'{end_date}'))
+        AND A_Date BETWEEN '{window_start}' AND '{window_end}'
         --AND A_Date BETWEEN DATEADD(day,1,'{start_date}') AND '{end_date}'
         ORDER BY A_Date, NSE_Symbol;
         """
@@ -81,7 +88,8 @@ class StockAnalyzer:
     def analyze_top_stocks(self, year: int, portfolio_size: int) -> Tuple[List[List[str]], List[Tuple[str, float]], float, float]:
         monthly_returns = []
         monthly_portfolio = []
-        all_portfolio_values = pd.DataFrame()
+        # Running drawdown over the year without concatenating the monthly DataFrames
+        year_metrics = StreamingMetrics()
 
         try:
             # Step 1: Get month end dates for the year
@@ -97,6 +105,7 @@ class StockAnalyzer:
                 
                 current_date_str = current_date.strftime('%Y-%m-%d')
                 next_date_str = next_date.strftime('%Y-%m-%d')
+                selection_date_str = self.next_trading_day_str(current_date_str)
 
                 # Your existing top 500 query remains the same
                 top_500_query = f"""
@@ -105,7 +114,7 @@ class StockAnalyzer:
                         NSE_Symbol,
                         MCAP_Crs
                     FROM ACCORD_DATA_SUBSET.dbo.ACCORD_DATA
-                    WHERE A_Date = (SELECT MIN(A_Date) FROM ACCORD_DATA_SUBSET.dbo.ACCORD_DATA WHERE A_Date > '{current_date_str}')
+                    WHERE A_Date = '{selection_date_str}'
                     --WHERE A_Date = '{current_date_str}'
                     AND Sharpe_365 IS NOT NULL
                     ORDER BY MCAP_Crs DESC
@@ -120,7 +129,7 @@ class StockAnalyzer:
                         ROW_NUMBER() OVER (PARTITION BY a.NSE_Symbol ORDER BY a.A_Date DESC) as rn
                     FROM ACCORD_DATA_SUBSET.dbo.ACCORD_DATA a
                     INNER JOIN RankedCompanies r ON a.NSE_Symbol = r.NSE_Symbol
-                    WHERE A_Date = (SELECT MIN(A_Date) FROM ACCORD_DATA_SUBSET.dbo.ACCORD_DATA WHERE A_Date > '{current_date_str}')
+                    WHERE A_Date = '{selection_date_str}'
                     --WHERE a.A_Date = '{current_date_str}'
                     --AND a.A_Date > DATEADD(day, -5, '{current_date_str}')
                 )
@@ -154,7 +163,7 @@ class StockAnalyzer:
                     next_date_str
                 )
                 
-                all_portfolio_values = pd.concat([all_portfolio_values, portfolio_values])
+                year_metrics.update(portfolio_values['Total_Value'])
                 
                 # Calculate monthly return
                 if not portfolio_values.empty:
@@ -167,11 +176,8 @@ class StockAnalyzer:
                 month_processing_time = time.time() - month_start_time
                 logger.info(f"Processed month {i+1}/{months_in_year} | Processing Time: {month_processing_time:.2f} seconds")
             # Calculate total return and maximum drawdown
-            if not all_portfolio_values.empty:
-                # total_return = ((all_portfolio_values['Total_Value'].iloc[-1] - 
-                #                all_portfolio_values['Total_Value'].iloc[0]) /
-                #               all_portfolio_values['Total_Value'].iloc[0] )* 100
-                max_drawdown = self.calculate_max_drawdown(all_portfolio_values['Total_Value'])
+            if year_metrics.count > 0:
+                max_drawdown = year_metrics.max_drawdown
             else:
                 total_return = max_drawdown = 0.0
             total_return = sum([mr[1] for mr in monthly_returns])
@@ -0,0 +1,110 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Tuple
+import time
+import numpy as np
+from optimised_backtest_return_drawdown import StockAnalyzer
+from trading_calendar import TradingCalendar, DEFAULT_CALENDAR_PATH
+from selection_cache import DEFAULT_SELECTION_CACHE_DIR
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+# One StockAnalyzer (engine or store) per worker process, created by _init_worker
+_analyzer = None
+
+
+def _init_worker(connection_string: str, store_path: str, calendar_path: str, selection_cache_dir: str) -> None:
+    global _analyzer
+    # The parent has already written the calendar, so workers only read it
+    calendar = TradingCalendar.load(calendar_path) if store_path is None and calendar_path else None
+    _analyzer = StockAnalyzer(connection_string, store_path=store_path, calendar_path=None,
+                              selection_cache_dir=selection_cache_dir, calendar=calendar)
+
+
+def _analyze_year(year: int, portfolio_size: int, universe_size: int, rank_column: str) -> Tuple[int, Tuple, float]:
+    year_start_time = time.time()
+    results = _analyzer.analyze_top_stocks(year, portfolio_size, universe_size, rank_column)
+    return year, results, time.time() - year_start_time
+
+
+def run_years_parallel(connection_string: str, years: List[int], portfolio_size: int,
+                       universe_size: int = 500, rank_column: str = 'Sharpe_365',
+                       store_path: str = None, max_workers: int = None,
+                       calendar_path: str = DEFAULT_CALENDAR_PATH,
+                       selection_cache_dir: str = DEFAULT_SELECTION_CACHE_DIR) -> Dict[int, Tuple]:
+    """
+    Run analyze_top_stocks for every year in a separate worker process.
+
+    Years are independent until get_full_portfolio_series chains them, so
+    the per-year results are returned keyed by year for the caller to
+    stitch back together in order. The trading calendar and the selection
+    cache file are set up once here before the pool starts, so workers
+    never race to rebuild or create them.
+    """
+    analyzer = StockAnalyzer(connection_string, store_path=store_path, calendar_path=calendar_path,
+                             selection_cache_dir=selection_cache_dir)
+    if analyzer.selection_cache is not None:
+        analyzer.selection_cache.close()
+
+    results_by_year = {}
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(connection_string, store_path, calendar_path, selection_cache_dir)) as executor:
+        futures = {
+            executor.submit(_analyze_year, year, portfolio_size, universe_size, rank_column): year
+            for year in years
+        }
+        for future in as_completed(futures):
+            try:
+                year, results, year_processing_time = future.result()
+                results_by_year[year] = results
+                logger.info(f"Total processing time for {year}: {year_processing_time:.2f} seconds")
+            except Exception as e:
+                logger.error(f"Failed to process year {futures[future]}: {e}")
+    return results_by_year
+
+
+def main():
+    connection_string = 'mssql+pyodbc://@DELL-123456789\\MSSQLSERVER01/ACCORD_DATA_SUBSET?driver=ODBC+Driver+17+for+SQL+Server'
+
+    # Set to the accord_store.py export (e.g. '../data/accord_store') to run offline
+    store_path = None
+
+    #enter the period and portfolio size
+    years = list(range(2011, 2024))
+    portfolio_size = 10
+
+    run_start_time = time.time()
+    results_by_year = run_years_parallel(connection_string, years, portfolio_size, store_path=store_path)
+    logger.info(f"Parallel processing time: {time.time() - run_start_time:.2f} seconds")
+
+    # Stitch the yearly segments back together in chronological order
+    analyzer = StockAnalyzer(connection_string, store_path=store_path)
+    portfolio_drawdown = []
+    all_monthly_portfolio_values = []
+    processed_years = [year for year in years if year in results_by_year]
+
+    for year in processed_years:
+        monthly_portfolio, monthly_returns, annual_return, max_drawdown, monthly_individual_stock_returns, monthly_portfolio_values = (
+            results_by_year[year]
+        )
+        all_monthly_portfolio_values.extend(monthly_portfolio_values)
+        portfolio_drawdown.append(max_drawdown)
+        analyzer.write_results(year, monthly_portfolio, monthly_returns, annual_return, max_drawdown, monthly_individual_stock_returns)
+
+    if not processed_years:
+        logger.error("No years were processed")
+        return
+
+    total_portfolio_return = analyzer.plot_portfolio_performance(
+        all_monthly_portfolio_values, processed_years[0], processed_years[-1], portfolio_size, min(portfolio_drawdown)
+    )
+
+    logger.info(f"For the period {processed_years[0]}-{processed_years[-1]}:")
+    logger.info(f"Total Return: {total_portfolio_return:.2f}%")
+    logger.info(f"Maximum Drawdown: {np.min(portfolio_drawdown):.2f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import pandas as pd
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+from typing import Dict, List, Tuple
+import time
+import os
+from vectorized_backtest import VectorizedBacktest, portfolio_summary
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+# Loaded once per worker process by _init_worker
+_backtest = None
+
+
+def _init_worker(backtest: VectorizedBacktest) -> None:
+    global _backtest
+    _backtest = backtest
+
+
+def _run_combination(params: Tuple[int, int, str, int, int]) -> Dict:
+    portfolio_size, universe_size, rank_column, start_year, end_year = params
+    full_portfolio_series, _ = _backtest.run(
+        list(range(start_year, end_year + 1)), portfolio_size, universe_size, rank_column
+    )
+    return {
+        'portfolio_size': portfolio_size,
+        'universe_size': universe_size,
+        'rank_column': rank_column,
+        'start_year': start_year,
+        'end_year': end_year,
+        **portfolio_summary(full_portfolio_series)
+    }
+
+
+def run_parameter_sweep(backtest: VectorizedBacktest,
+                        portfolio_sizes: List[int],
+                        universe_sizes: List[int],
+                        rank_columns: List[str],
+                        year_ranges: List[Tuple[int, int]],
+                        max_workers: int = None) -> pd.DataFrame:
+    """
+    Evaluate every combination of the StockAnalyzer parameters (portfolio size,
+    TOP-N MCAP universe, Sharpe column) over the given (start_year, end_year)
+    ranges. The already-loaded backtest is shipped once to each worker process.
+    """
+    combinations = list(product(portfolio_sizes, universe_sizes, rank_columns, year_ranges))
+    combinations = [(p, u, r, start, end) for p, u, r, (start, end) in combinations]
+    logger.info(f"Total combinations to process: {len(combinations)}")
+
+    results = []
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(backtest,)) as executor:
+        futures = {executor.submit(_run_combination, params): params for params in combinations}
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logger.error(f"Failed to process combination {futures[future]}: {e}")
+
+    results_df = pd.DataFrame(results)
+    if not results_df.empty:
+        results_df = results_df.sort_values(
+            ['start_year', 'end_year', 'rank_column', 'universe_size', 'portfolio_size']
+        ).reset_index(drop=True)
+    return results_df
+
+
+def main():
+    store_path = '../data/accord_store'
+
+    #enter the parameter grids
+    portfolio_sizes = [5, 10, 15, 20]
+    universe_sizes = [100, 200, 500]
+    rank_columns = ['Sharpe_30', 'Sharpe_90', 'Sharpe_180', 'Sharpe_365']
+    year_ranges = [(2011, 2023), (2011, 2016), (2017, 2023)]
+
+    load_start_time = time.time()
+    first_year = min(start for start, _ in year_ranges)
+    last_year = max(end for _, end in year_ranges)
+    backtest = VectorizedBacktest.from_store(store_path, first_year, last_year, rank_columns)
+    logger.info(f"Data loaded | Processing Time: {time.time() - load_start_time:.2f} seconds")
+
+    sweep_start_time = time.time()
+    results_df = run_parameter_sweep(backtest, portfolio_sizes, universe_sizes, rank_columns, year_ranges)
+    logger.info(f"Sweep processing time: {time.time() - sweep_start_time:.2f} seconds")
+
+    os.makedirs('../results', exist_ok=True)
+    results_df.to_csv('../results/parameter_sweep.csv', index=False)
+    logger.info("Results written to ../results/parameter_sweep.csv")
+    print(results_df.sort_values('cagr', ascending=False).head(10).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
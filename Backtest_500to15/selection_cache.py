@@ -0,0 +1,87 @@
+import sqlite3
+import logging
+import os
+from typing import List, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_SELECTION_CACHE_DIR = '../data'
+
+
+def selection_cache_path(source_kind: str, cache_dir: str = DEFAULT_SELECTION_CACHE_DIR) -> str:
+    """
+    Cache file for one kind of source ('sql' or 'store'), so backtests run
+    against SQL Server and against the Parquet store never share a file.
+    """
+    return os.path.join(cache_dir, f'selection_cache_{source_kind}.sqlite')
+
+
+class SelectionCache:
+    """
+    On-disk cache of get_top_stocks results.
+
+    Entries are keyed by source kind, rebalance date, universe size, ranking
+    column and portfolio size, and tagged with the version of the data the
+    selection was read from (for the store, the fingerprint of that date's
+    year partition; for SQL Server, a checksum of that date's rows). A
+    lookup only hits when the version still matches, so
+    re-exporting one year or appending new days leaves the selections of
+    every other date in place; a stale entry is overwritten when its date
+    is selected again.
+    """
+    def __init__(self, source_kind: str, path: Optional[str] = None):
+        path = path or selection_cache_path(source_kind)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.source_kind = source_kind
+        self.path = path
+        # Worker processes share the file, so wait for locks instead of failing
+        self.conn = sqlite3.connect(path, timeout=60)
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS selections (
+                    source_kind TEXT NOT NULL,
+                    source_version TEXT NOT NULL,
+                    selection_date TEXT NOT NULL,
+                    universe_size INTEGER NOT NULL,
+                    rank_column TEXT NOT NULL,
+                    portfolio_size INTEGER NOT NULL,
+                    symbols TEXT NOT NULL,
+                    PRIMARY KEY (source_kind, selection_date, universe_size, rank_column, portfolio_size)
+                )
+            """)
+
+    def get(self, selection_date: str, universe_size: int, rank_column: str,
+            portfolio_size: int, source_version: str) -> Optional[List[str]]:
+        """
+        Cached symbols in ranking order, or None if the selection was never
+        computed or was computed from another version of its data.
+        """
+        row = self.conn.execute(
+            """
+            SELECT symbols FROM selections
+            WHERE source_kind = ? AND source_version = ? AND selection_date = ?
+            AND universe_size = ? AND rank_column = ? AND portfolio_size = ?
+            """,
+            (self.source_kind, source_version, selection_date, universe_size, rank_column, portfolio_size)
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0].split(',') if row[0] else []
+
+    def put(self, selection_date: str, universe_size: int, rank_column: str,
+            portfolio_size: int, symbols: List[str], source_version: str) -> None:
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO selections VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.source_kind, source_version, selection_date, universe_size, rank_column,
+                 portfolio_size, ','.join(symbols))
+            )
+
+    def clear(self) -> None:
+        with self.conn:
+            self.conn.execute("DELETE FROM selections")
+
+    def close(self) -> None:
+        self.conn.close()
@@ -0,0 +1,158 @@
+import pandas as pd
+import logging
+import os
+from datetime import date
+from typing import List, Optional, Union
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_CALENDAR_PATH = '../data/trading_calendar.csv'
+
+DateLike = Union[str, date, pd.Timestamp]
+
+
+def _to_date(value: DateLike) -> date:
+    if isinstance(value, pd.Timestamp):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return pd.Timestamp(value).date()
+
+
+class TradingCalendar:
+    """
+    Index of the distinct A_Date values in ACCORD_DATA.
+
+    Every calendar day between the first and last trading date is mapped to
+    the position of the first trading day on or after it, so month-end,
+    next/previous trading day and N-day offsets are dictionary lookups
+    instead of GROUP BY / MIN(A_Date) subqueries against the fact table.
+    """
+    def __init__(self, trading_dates: List[DateLike]):
+        self.dates = pd.DatetimeIndex(pd.to_datetime(pd.Series(trading_dates)).dt.normalize().unique()).sort_values()
+        if len(self.dates) == 0:
+            raise ValueError("Trading calendar needs at least one date")
+
+        self._days = [d.date() for d in self.dates]
+        all_days = pd.date_range(self.dates[0], self.dates[-1], freq='D')
+        positions = np.searchsorted(self.dates.values, all_days.values, side='left')
+        self._on_or_after = dict(zip(all_days.date, positions.tolist()))
+
+        month_key = self.dates.year * 12 + self.dates.month - 1
+        is_last = np.append(month_key[1:] != month_key[:-1], True)
+        self._month_ends = {
+            (d.year, d.month): d for d in self.dates[is_last]
+        }
+
+    @classmethod
+    def from_database(cls, engine) -> 'TradingCalendar':
+        query = """
+        SELECT DISTINCT A_Date
+        FROM ACCORD_DATA_SUBSET.dbo.ACCORD_DATA
+        ORDER BY A_Date;
+        """
+        return cls(pd.read_sql_query(query, engine)['A_Date'])
+
+    @classmethod
+    def from_store(cls, store) -> 'TradingCalendar':
+        return cls(store.trading_dates())
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_CALENDAR_PATH) -> 'TradingCalendar':
+        return cls(pd.read_csv(path, parse_dates=['A_Date'])['A_Date'])
+
+    def save(self, path: str = DEFAULT_CALENDAR_PATH) -> None:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        # Write next to the target and swap it in, so readers never see a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        pd.DataFrame({'A_Date': self.dates.strftime('%Y-%m-%d')}).to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load_or_build(cls, engine, path: str = DEFAULT_CALENDAR_PATH) -> 'TradingCalendar':
+        """
+        Load the saved calendar, rebuilding it when the database has dates
+        beyond the last one saved.
+        """
+        if os.path.exists(path):
+            calendar = cls.load(path)
+            latest = pd.read_sql_query(
+                "SELECT MAX(A_Date) AS Max_Date FROM ACCORD_DATA_SUBSET.dbo.ACCORD_DATA;", engine
+            )['Max_Date'].iloc[0]
+            if pd.isna(latest) or pd.Timestamp(latest) <= calendar.last_date:
+                return calendar
+            logger.info(f"Trading calendar at {path} is stale, rebuilding")
+
+        calendar = cls.from_database(engine)
+        calendar.save(path)
+        logger.info(f"Trading calendar with {len(calendar.dates)} dates written to {path}")
+        return calendar
+
+    @property
+    def first_date(self) -> pd.Timestamp:
+        return self.dates[0]
+
+    @property
+    def last_date(self) -> pd.Timestamp:
+        return self.dates[-1]
+
+    def _position_on_or_after(self, value: DateLike) -> int:
+        day = _to_date(value)
+        if day < self._days[0]:
+            return 0
+        if day > self._days[-1]:
+            return len(self._days)
+        return self._on_or_after[day]
+
+    def is_trading_day(self, value: DateLike) -> bool:
+        position = self._position_on_or_after(value)
+        return position < len(self._days) and self._days[position] == _to_date(value)
+
+    def next_trading_day(self, value: DateLike) -> Optional[pd.Timestamp]:
+        """
+        First trading day strictly after value, or None past the end of the data.
+        """
+        return self.offset(value, 1)
+
+    def previous_trading_day(self, value: DateLike) -> Optional[pd.Timestamp]:
+        """
+        Last trading day strictly before value, or None before the start of the data.
+        """
+        position = self._position_on_or_after(value) - 1
+        return self.dates[position] if position >= 0 else None
+
+    def offset(self, value: DateLike, n: int) -> Optional[pd.Timestamp]:
+        """
+        Trading day n sessions after (n > 0) or before (n < 0) value. A value
+        that is not a trading day counts from the trading day before it for
+        positive n and from the one after it for negative n.
+        """
+        position = self._position_on_or_after(value)
+        if n > 0 and not self.is_trading_day(value):
+            position -= 1
+        position += n
+        if position < 0 or position >= len(self._days):
+            return None
+        return self.dates[position]
+
+    def month_end(self, year: int, month: int) -> Optional[pd.Timestamp]:
+        return self._month_ends.get((year, month))
+
+    def all_month_ends(self) -> pd.DatetimeIndex:
+        """
+        Last trading day of every month in the calendar, in order. The final
+        entry is the last available date even if that month is still running.
+        """
+        return pd.DatetimeIndex(sorted(self._month_ends.values()))
+
+    def month_end_dates(self, year: int) -> pd.DataFrame:
+        """
+        Same result as StockAnalyzer.get_month_end_dates: the last trading
+        day of every month from December of year-1 to January of year+1.
+        """
+        months = [(year - 1, 12)] + [(year, month) for month in range(1, 13)] + [(year + 1, 1)]
+        month_ends = [self._month_ends[key] for key in months if key in self._month_ends]
+        return pd.DataFrame({'Last_Date_Of_Month': month_ends})
@@ -0,0 +1,231 @@
+import pandas as pd
+from sqlalchemy import create_engine
+import logging
+from typing import Dict, List, Tuple
+import time
+import numpy as np
+from accord_store import AccordStore
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+SHARPE_COLUMNS = ['Sharpe_30', 'Sharpe_90', 'Sharpe_180', 'Sharpe_365']
+
+
+def portfolio_summary(full_portfolio_series: pd.Series) -> Dict[str, float]:
+    """
+    Total return, CAGR and maximum drawdown (all in %) of a chained NAV series,
+    using the same formulas as StockAnalyzer.plot_portfolio_performance.
+    """
+    values = full_portfolio_series.to_numpy(dtype=float)
+    if len(values) == 0:
+        return {'total_return': 0.0, 'cagr': 0.0, 'max_drawdown': 0.0}
+
+    total_return = (values[-1] - values[0]) / values[0] * 100
+
+    days = (full_portfolio_series.index[-1] - full_portfolio_series.index[0]).days
+    years = days / 365.25
+    cagr = (((values[-1] / values[0]) ** (1 / years)) - 1) * 100 if years > 0 else 0.0
+
+    rolling_max = np.maximum.accumulate(values)
+    max_drawdown = float(((values - rolling_max) / rolling_max).min() * 100)
+
+    return {'total_return': float(total_return), 'cagr': float(cagr), 'max_drawdown': max_drawdown}
+
+
+class VectorizedBacktest:
+    """
+    Single-pass version of StockAnalyzer.analyze_top_stocks + get_full_portfolio_series.
+
+    The data is loaded once into wide date x symbol matrices of A_Close,
+    MCAP_Crs and the Sharpe columns. Universe ranking, top-N selection and the
+    equal-weight NAV path are then computed for every rebalance month with
+    NumPy array operations instead of two SQL queries and a pivot per month.
+    """
+    def __init__(self, data: pd.DataFrame, rank_columns: List[str] = SHARPE_COLUMNS):
+        data = data.drop_duplicates(['A_Date', 'NSE_Symbol'], keep='last')
+
+        close = data.pivot(index='A_Date', columns='NSE_Symbol', values='A_Close').sort_index()
+        self.dates = pd.DatetimeIndex(close.index)
+        self.symbols = np.asarray(close.columns)
+        self.close = close.to_numpy(dtype=float)
+        self.mcap = self._wide(data, 'MCAP_Crs')
+        self.rank = {col: self._wide(data, col) for col in rank_columns}
+
+        # Extra all-NaN column used as the "no symbol" slot in selections
+        self._close_padded = np.hstack([self.close, np.full((len(self.dates), 1), np.nan)])
+        self._month_end_idx = self._month_end_positions()
+
+    def _wide(self, data: pd.DataFrame, column: str) -> np.ndarray:
+        wide = data.pivot(index='A_Date', columns='NSE_Symbol', values=column)
+        return wide.reindex(index=self.dates, columns=self.symbols).to_numpy(dtype=float)
+
+    @classmethod
+    def from_store(cls, store_path: str, start_year: int, end_year: int,
+                   rank_columns: List[str] = SHARPE_COLUMNS) -> 'VectorizedBacktest':
+        store = AccordStore(store_path)
+        data = store.load_range(f"{start_year-1}-12-01", f"{end_year+1}-01-31")
+        return cls(data, rank_columns)
+
+    @classmethod
+    def from_database(cls, connection_string: str, start_year: int, end_year: int,
+                      rank_columns: List[str] = SHARPE_COLUMNS) -> 'VectorizedBacktest':
+        columns_str = ', '.join(['A_Date', 'NSE_Symbol', 'A_Close', 'MCAP_Crs'] + list(rank_columns))
+        query = f"""
+        SELECT {columns_str}
+        FROM ACCORD_DATA_SUBSET.dbo.ACCORD_DATA
+        WHERE A_Date BETWEEN '{start_year-1}-12-01' AND '{end_year+1}-01-31'
+        ORDER BY A_Date, NSE_Symbol;
+        """
+        data = pd.read_sql_query(query, create_engine(connection_string))
+        data['A_Date'] = pd.to_datetime(data['A_Date'])
+        return cls(data, rank_columns)
+
+    def _month_end_positions(self) -> np.ndarray:
+        month_key = self.dates.year * 12 + self.dates.month - 1
+        is_last = np.append(month_key[1:] != month_key[:-1], True)
+        return np.nonzero(is_last)[0]
+
+    def rebalance_windows(self, years: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Row indices of (selection date, next selection date) for every month,
+        built exactly like analyze_top_stocks does from get_month_end_dates.
+        """
+        month_end_dates = self.dates[self._month_end_idx]
+        month_key = month_end_dates.year * 12 + month_end_dates.month - 1
+
+        starts, ends = [], []
+        for year in years:
+            in_window = (month_key >= (year - 1) * 12 + 11) & (month_key <= (year + 1) * 12)
+            positions = self._month_end_idx[in_window]
+            months_in_year = len(positions) - 2
+            if months_in_year <= 0:
+                continue
+            starts.append(positions[:months_in_year])
+            ends.append(positions[1:months_in_year + 1])
+
+        if not starts:
+            return np.array([], dtype=int), np.array([], dtype=int)
+        return np.concatenate(starts), np.concatenate(ends)
+
+    def select(self, selection_idx: np.ndarray, portfolio_size: int,
+               universe_size: int = 500, rank_column: str = 'Sharpe_365') -> np.ndarray:
+        """
+        Column indices of the selected symbols for every rebalance row, shape
+        (months, portfolio_size), sorted by column. Empty slots hold len(symbols).
+        """
+        n_symbols = len(self.symbols)
+        score = self.rank[rank_column][selection_idx]
+        mcap = self.mcap[selection_idx]
+        eligible = ~np.isnan(score)
+
+        # Top universe_size by MCAP_Crs among symbols with a ranking value
+        mcap_key = np.where(np.isnan(mcap), np.inf, -mcap)
+        mcap_key[~eligible] = np.inf
+        by_mcap = np.argsort(mcap_key, axis=1, kind='stable')[:, :universe_size]
+        universe = np.zeros_like(eligible)
+        np.put_along_axis(universe, by_mcap, True, axis=1)
+        universe &= eligible
+
+        # Top portfolio_size of the universe by the ranking column
+        score_key = np.where(universe, -score, np.inf)
+        by_score = np.argsort(score_key, axis=1, kind='stable')[:, :portfolio_size]
+        selected = np.take_along_axis(universe, by_score, axis=1)
+        selection = np.where(selected, by_score, n_symbols)
+
+        return np.sort(selection, axis=1)
+
+    def nav(self, start_idx: np.ndarray, end_idx: np.ndarray, selection: np.ndarray,
+            portfolio_size: int) -> Tuple[pd.Series, np.ndarray, np.ndarray]:
+        """
+        Chained equal-weight NAV for all months at once.
+
+        Returns the daily series plus, per day, the month it belongs to and the
+        row of the date, matching get_full_portfolio_series.
+        """
+        lengths = end_idx - start_idx
+        month_of_day = np.repeat(np.arange(len(start_idx)), lengths)
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        day_idx = np.repeat(start_idx + 1, lengths) + offsets
+
+        held = selection[month_of_day]
+        closes = self._close_padded[day_idx[:, None], held]
+        first_closes = self._close_padded[start_idx[:, None], selection][month_of_day]
+        adjusted = closes / first_closes
+
+        # Days where none of the held symbols traded are absent from the pivot
+        has_data = ~np.isnan(closes).all(axis=1)
+        total_value = np.where(np.isnan(adjusted), 0.0, adjusted).sum(axis=1)
+
+        month_of_day = month_of_day[has_data]
+        day_idx = day_idx[has_data]
+        total_value = total_value[has_data]
+
+        # Chain the months; same operation order as get_full_portfolio_series
+        last_of_month = np.full(len(start_idx), -1)
+        last_of_month[month_of_day] = np.arange(len(month_of_day))
+        scale = np.empty(len(start_idx))
+        current_portfolio_value = 1
+        for month, last in enumerate(last_of_month):
+            scale[month] = current_portfolio_value / portfolio_size
+            if last >= 0:
+                current_portfolio_value = total_value[last] * scale[month]
+
+        full_portfolio_series = pd.Series(
+            total_value * scale[month_of_day],
+            index=pd.DatetimeIndex(self.dates[day_idx], name='A_Date'),
+            name='Total_Value'
+        )
+        return full_portfolio_series, month_of_day, day_idx
+
+    def run(self, years: List[int], portfolio_size: int, universe_size: int = 500,
+            rank_column: str = 'Sharpe_365') -> Tuple[pd.Series, pd.DataFrame]:
+        """
+        Full backtest over years. Returns the chained daily NAV series and the
+        symbols held each month, as written by get_full_portfolio_series.
+        """
+        start_idx, end_idx = self.rebalance_windows(years)
+        selection = self.select(start_idx, portfolio_size, universe_size, rank_column)
+        full_portfolio_series, month_of_day, day_idx = self.nav(start_idx, end_idx, selection, portfolio_size)
+
+        # Symbols actually priced in each month, named by the month's first date
+        symbols_by_month_list = []
+        months, first_day = np.unique(month_of_day, return_index=True)
+        window_closes = ~np.isnan(self._close_padded)
+        for month, first in zip(months, first_day):
+            held = selection[month][selection[month] < len(self.symbols)]
+            traded = window_closes[start_idx[month]:end_idx[month] + 1, held].any(axis=0)
+            symbols_by_month_list.append(pd.Series(self.symbols[held[traded]], name=self.dates[day_idx[first]]))
+
+        symbols_by_month = pd.concat(symbols_by_month_list, axis=1) if symbols_by_month_list else pd.DataFrame()
+        return full_portfolio_series, symbols_by_month
+
+
+def main():
+    store_path = '../data/accord_store'
+
+    #enter the period and portfolio size
+    years = list(range(2011, 2024))
+    portfolio_size = 10
+
+    load_start_time = time.time()
+    backtest = VectorizedBacktest.from_store(store_path, years[0], years[-1])
+    logger.info(f"Loaded {len(backtest.dates)} dates x {len(backtest.symbols)} symbols | Processing Time: {time.time() - load_start_time:.2f} seconds")
+
+    run_start_time = time.time()
+    full_portfolio_series, symbols_by_month = backtest.run(years, portfolio_size)
+    logger.info(f"Backtest processing time: {time.time() - run_start_time:.2f} seconds")
+
+    full_portfolio_series.to_csv('../results/daily_portfolio_returns.csv', index=True)
+    symbols_by_month.to_csv('../results/symbols_by_month.csv', index=True)
+
+    summary = portfolio_summary(full_portfolio_series)
+    logger.info(f"For the period {years[0]}-{years[-1]}:")
+    logger.info(f"Total Return: {summary['total_return']:.2f}%")
+    logger.info(f"CAGR: {summary['cagr']:.2f}%")
+    logger.info(f"Maximum Drawdown: {summary['max_drawdown']:.2f}%")
+
+
+if __name__ == "__main__":
+    main()
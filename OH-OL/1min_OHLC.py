@@ -1,6 +1,6 @@
 import requests
 import json
-import pandas as pd
+from expiry_calendar import expiry_map
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Top 10 NSE symbols by market cap
@@ -10,29 +10,8 @@ year = 2024
 optType = 'C'
 strike = 2500
 exp_date = '25JAN24'
-# Method to get the last Thursday of each month
-def get_last_thursday(year):
-    last_thursdays = []
-    for month in range(1, 13):
-        for day in range(31, 0, -1):
-            try:
-                date = f"{year}-{month:02d}-{day:02d}"
-                if pd.to_datetime(date).weekday() == 3:
-                    last_thursdays.append(date)
-                    break
-            except ValueError:
-                pass
-    # Adding first month's last Thursday of next year
-    month = 1
-    for day in range(31, 0, -1):
-        try:
-            date = f"{year+1}-{month:02d}-{day:02d}"
-            if pd.to_datetime(date).weekday() == 3:
-                last_thursdays.append(date)
-                break
-        except ValueError:
-            pass
-    return last_thursdays
+# Map every NSE trading day of the year to its monthly expiry (holiday-shifted)
+dates_expiry_map = expiry_map(year)
 
 
 url = f'https://www.icharts.in/opt/hcharts/stx8req/php/getdataForOptions_curr_atp_tj.php?mode=INTRA&symbol={symbol}-{strike}{optType}-{exp_date}&timeframe=1min&u=Levitas&sid=ajeeq8spmpa5h4tspmq8ald2rm'
@@ -0,0 +1,153 @@
+import json
+import sys
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+# NSE equity derivatives trading holidays (weekday closures only). Years not
+# listed here are treated as having no holidays besides weekends.
+NSE_HOLIDAYS = {
+    2023: ["2023-01-26", "2023-03-07", "2023-03-30", "2023-04-04", "2023-04-07", "2023-04-14",
+           "2023-05-01", "2023-06-29", "2023-08-15", "2023-09-19", "2023-10-02", "2023-10-24",
+           "2023-11-14", "2023-11-27", "2023-12-25"],
+    2024: ["2024-01-22", "2024-01-26", "2024-03-08", "2024-03-25", "2024-03-29", "2024-04-11",
+           "2024-04-17", "2024-05-01", "2024-05-20", "2024-06-17", "2024-07-17", "2024-08-15",
+           "2024-10-02", "2024-11-01", "2024-11-15", "2024-11-20", "2024-12-25"],
+    2025: ["2025-02-26", "2025-03-14", "2025-03-31", "2025-04-10", "2025-04-14", "2025-04-18",
+           "2025-05-01", "2025-08-15", "2025-08-27", "2025-10-02", "2025-10-21", "2025-10-22",
+           "2025-11-05", "2025-12-25"],
+}
+
+# Expiry weekday (Monday=0) and the date it took effect: Thursday until NSE
+# moved F&O expiries to Tuesday from September 2025
+EXPIRY_WEEKDAYS = [("1970-01-01", 3), ("2025-09-01", 1)]
+
+SERIES = ("monthly", "weekly")
+
+
+def weekday(days):
+    """Weekday (Monday=0) of datetime64[D] values; 1970-01-01 was a Thursday."""
+    return (days.astype("int64") + 3) % 7
+
+
+def to_days(dates):
+    return np.asarray(pd.to_datetime(np.atleast_1d(dates)).values, dtype="datetime64[D]")
+
+
+class ExpiryCalendar:
+    """
+    NSE trading days and holiday-shifted expiries for a range of years,
+    computed once with numpy business-day arithmetic.
+
+    Monthly expiries fall on the last expiry weekday of each month and weekly
+    expiries on every expiry weekday; an expiry that lands on a holiday moves
+    to the previous trading day. Weekly series are listed only for index
+    options, so use them only for symbols that have weeklies.
+    """
+    def __init__(self, start_year, end_year, holidays=None):
+        if holidays is None:
+            holidays = [day for year in range(start_year, end_year + 2) for day in NSE_HOLIDAYS.get(year, [])]
+        self.start_year = start_year
+        self.end_year = end_year
+        self.busdaycal = np.busdaycalendar(weekmask="1111100", holidays=to_days(holidays) if holidays else [])
+
+        # One year past end_year so dates late in end_year still map to an expiry
+        first = np.datetime64(f"{start_year}-01-01", "D")
+        last = np.datetime64(f"{end_year + 1}-12-31", "D")
+        days = np.arange(first, last + 1, dtype="datetime64[D]")
+        self.days = days[np.is_busday(days, busdaycal=self.busdaycal)]
+
+        expiry_weekday = self.expiry_weekday(days)
+        weekly = days[weekday(days) == expiry_weekday]
+        month_ends = (np.arange(first.astype("datetime64[M]"), last.astype("datetime64[M]") + 1)
+                      + 1).astype("datetime64[D]") - 1
+        monthly = month_ends - (weekday(month_ends) - self.expiry_weekday(month_ends)) % 7
+        self.expiries = {
+            "weekly": self.shift_holidays(weekly),
+            "monthly": self.shift_holidays(monthly),
+        }
+
+    def expiry_weekday(self, days):
+        changes = np.array([day for day, _ in EXPIRY_WEEKDAYS], dtype="datetime64[D]")
+        weekdays = np.array([number for _, number in EXPIRY_WEEKDAYS])
+        return weekdays[np.searchsorted(changes, days, side="right") - 1]
+
+    def shift_holidays(self, expiries):
+        return np.unique(np.busday_offset(expiries, 0, roll="backward", busdaycal=self.busdaycal))
+
+    def trading_days(self, start, end):
+        start, end = to_days(start)[0], to_days(end)[0]
+        return pd.DatetimeIndex(self.days[(self.days >= start) & (self.days <= end)])
+
+    def expiry_series(self, series="monthly", start=None, end=None):
+        if series not in SERIES:
+            raise ValueError(f"Unknown series {series}; expected one of {SERIES}")
+        expiries = self.expiries[series]
+        if start is not None:
+            expiries = expiries[expiries >= to_days(start)[0]]
+        if end is not None:
+            expiries = expiries[expiries <= to_days(end)[0]]
+        return pd.DatetimeIndex(expiries)
+
+    def next_expiry(self, dates, series="monthly"):
+        """
+        Vectorised date -> first expiry on or after it, for any array of
+        dates (times are ignored). Dates past the calendar map to NaT.
+        """
+        if series not in SERIES:
+            raise ValueError(f"Unknown series {series}; expected one of {SERIES}")
+        expiries = self.expiries[series]
+        days = to_days(dates)
+        index = np.searchsorted(expiries, days, side="left")
+        result = np.full(len(days), np.datetime64("NaT"), dtype="datetime64[D]")
+        found = index < len(expiries)
+        result[found] = expiries[index[found]]
+        return pd.DatetimeIndex(result)
+
+
+@lru_cache(maxsize=None)
+def nse_calendar(start_year, end_year=None):
+    """Shared ExpiryCalendar for the given years, built once per process."""
+    return ExpiryCalendar(start_year, end_year or start_year)
+
+
+def expiry_map(year, series="monthly"):
+    """
+    {trading day: expiry} for every NSE trading day of `year`, both as
+    YYYY-MM-DD strings. Replaces the per-script get_expiry_dates loops.
+    """
+    calendar = nse_calendar(year)
+    days = calendar.trading_days(f"{year}-01-01", f"{year}-12-31")
+    expiries = calendar.next_expiry(days, series)
+    return dict(zip(days.strftime("%Y-%m-%d"), expiries.strftime("%Y-%m-%d")))
+
+
+def icharts_expiry(dates):
+    """icharts expiry codes such as 25JAN24."""
+    return pd.DatetimeIndex(pd.to_datetime(np.atleast_1d(dates))).strftime("%d%b%y").str.upper().tolist()
+
+
+def write_expiry_file(path, year, series="monthly"):
+    """
+    Write the expiries that the trading days of `year` map to, newest first
+    as icharts codes, in the expiry_dates.json format read by
+    icharts-options-OHLC.
+    """
+    calendar = nse_calendar(year)
+    days = calendar.trading_days(f"{year}-01-01", f"{year}-12-31")
+    expiries = calendar.next_expiry(days, series).unique().sort_values(ascending=False)
+    with open(path, "w") as f:
+        json.dump(icharts_expiry(expiries), f, indent=2)
+        f.write("\n")
+    return expiries
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (3, 4):
+        print("Usage: python expiry_calendar.py YEAR OUTPUT.json [monthly|weekly]")
+        sys.exit(1)
+
+    year = int(sys.argv[1])
+    series = sys.argv[3] if len(sys.argv) == 4 else "monthly"
+    expiries = write_expiry_file(sys.argv[2], year, series)
+    print(f"Wrote {len(expiries)} {series} expiries for {year} to {sys.argv[2]}")
@@ -1,56 +1,23 @@
 import requests
 import json
 import pandas as pd
+from expiry_calendar import expiry_map
+from icharts_cache import ResponseCache
+from result_sink import ResultSink
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
 
+# Historical responses are served from disk on reruns and across scripts
+response_cache = ResponseCache()
+
 # Top 10 NSE symbols by market cap
 nse_top_10 = ["RELIANCE"]
 # nse_top_10 = ["RELIANCE", "TCS", "HDFCBANK", "ICICIBANK", "INFY", "HINDUNILVR", "SBIN", "BHARTIARTL", "ITC", "LICI"]
 
 year = 2024
 
-# Method to get the last Thursday of each month
-def get_last_thursday(year):
-    last_thursdays = []
-    for month in range(1, 13):
-        for day in range(31, 0, -1):
-            try:
-                date = f"{year}-{month:02d}-{day:02d}"
-                if pd.to_datetime(date).weekday() == 3:
-                    last_thursdays.append(date)
-                    break
-            except ValueError:
-                pass
-    # Adding first month's last Thursday of next year
-    month = 1
-    for day in range(31, 0, -1):
-        try:
-            date = f"{year+1}-{month:02d}-{day:02d}"
-            if pd.to_datetime(date).weekday() == 3:
-                last_thursdays.append(date)
-                break
-        except ValueError:
-            pass
-    return last_thursdays
-
-# Method to map each date to the next expiration Thursday
-def get_expiry_dates(year):
-    all_dates = pd.date_range(start=f"{year}-01-01", end=f"{year}-12-31", freq="B").strftime("%Y-%m-%d").tolist()
-    last_thursdays = get_last_thursday(year)
-    
-    dates_expiry_map = {}
-    j = 0
-    for i in range(len(all_dates) - 1):
-        if all_dates[i] <= last_thursdays[j]:
-            dates_expiry_map[all_dates[i]] = last_thursdays[j]
-        else:
-            j += 1
-            dates_expiry_map[all_dates[i]] = last_thursdays[j]
-    return dates_expiry_map
-
-# Fetch all expiry dates
-dates_expiry_map = get_expiry_dates(year)
+# Map every NSE trading day of the year to its monthly expiry (holiday-shifted)
+dates_expiry_map = expiry_map(year)
 
 # API details
 url = "https://www.icharts.in/opt/hcharts/stx8req/php/getHistoricalSpotPrice_v10.php"
@@ -78,7 +45,7 @@ def get_payload(date, expdate, optSymbol):
 def fetch_data(symbol, date, expdate, retries=3, backoff_factor=0.3):
     for attempt in range(retries):
         try:
-            response = requests.post(url, headers=headers, data=get_payload(date, expdate, symbol))
+            response = response_cache.post(url, headers=headers, data=get_payload(date, expdate, symbol))
             if response.status_code == 200:
                 try:
                     if not response.text.strip():
@@ -97,33 +64,25 @@ def fetch_data(symbol, date, expdate, retries=3, backoff_factor=0.3):
             time.sleep(backoff_factor * (2 ** attempt))
     return symbol, date, expdate, []
 
-# Parallel execution
-data_store = []
-with ThreadPoolExecutor(max_workers=50) as executor:  # Increase max_workers for more parallelism
-    futures = [executor.submit(fetch_data, symbol, date, expdate) for symbol in nse_top_10 for date, expdate in dates_expiry_map.items()]
-    for future in as_completed(futures):
-        symbol, date, expdate, options_data = future.result()
-        for record in options_data:
-            if record:  # Ensure record is not None
-                data_store.append([symbol, *record, expdate])
-
-# Inspect the first few rows to understand the structure
-print(data_store[:5])
-
-# Convert to DataFrame
 columns = ["Symbol", "Spot price", "Date", "Change", "Change%", "Type", "Random", "Lot size", "Expiry Date"]
-df = pd.DataFrame(data_store)
-
-# Ensure the DataFrame has the correct columns
-df = df.iloc[:, :len(columns)]
-df.columns = columns
 
-# Save the DataFrame to a JSON file
-# append time to file name
+# Write each record as it arrives; put() blocks while the sink's queue is
+# full, so memory stays flat however many dates are fetched
+def fetch_and_store(sink, symbol, date, expdate):
+    symbol, date, expdate, options_data = fetch_data(symbol, date, expdate)
+    for record in options_data:
+        if record:  # Ensure record is not None
+            row = [symbol, *record, expdate][:len(columns)]
+            sink.put(dict(zip(columns, row + [None] * (len(columns) - len(row)))))
 
-time = pd.Timestamp.now()
+# Save to a JSON lines file, with time appended to the file name
+filename = f"nse_top_10_spot_data_{pd.Timestamp.now()}.json"
 
-filename = (f"nse_top_10_spot_data_{time}.json")
-df.to_json(filename, orient="records", lines=True)
+# Parallel execution
+with ResultSink(filename) as sink, ThreadPoolExecutor(max_workers=50) as executor:  # Increase max_workers for more parallelism
+    futures = [executor.submit(fetch_and_store, sink, symbol, date, expdate) for symbol in nse_top_10 for date, expdate in dates_expiry_map.items()]
+    for future in as_completed(futures):
+        future.result()
 
-print("Data saved to 'nse_top_10_spot_data.json'.")
\ No newline at end of file
+print(f"Data saved to '{filename}' ({sink.written} records).")
+print(response_cache.report())
\ No newline at end of file
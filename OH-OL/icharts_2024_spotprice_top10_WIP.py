@@ -1,9 +1,14 @@
 import requests
 import json
 import pandas as pd
+from expiry_calendar import expiry_map
+from icharts_cache import ResponseCache
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
 
+# Historical responses are served from disk on reruns and across scripts
+response_cache = ResponseCache()
+
 # Top 10 NSE symbols by market cap
 # nse_top_10 = ["RELIANCE"]
 # Uncomment below for full list
@@ -11,48 +16,8 @@ nse_top_10 = ["RELIANCE", "TCS", "HDFCBANK", "ICICIBANK", "INFY", "HINDUNILVR",
 
 year = 2024
 
-def get_last_thursday(year):
-    """Get last Thursday of each month for a given year."""
-    last_thursdays = []
-    for month in range(1, 13):
-        for day in range(31, 0, -1):
-            try:
-                date = f"{year}-{month:02d}-{day:02d}"
-                if pd.to_datetime(date).weekday() == 3:
-                    last_thursdays.append(date)
-                    break
-            except ValueError:
-                pass
-    
-    # Adding first month's last Thursday of next year
-    month = 1
-    for day in range(31, 0, -1):
-        try:
-            date = f"{year+1}-{month:02d}-{day:02d}"
-            if pd.to_datetime(date).weekday() == 3:
-                last_thursdays.append(date)
-                break
-        except ValueError:
-            pass
-    return last_thursdays
-
-def get_expiry_dates(year):
-    """Map business dates to their corresponding expiry dates."""
-    all_dates = pd.date_range(start=f"{year}-01-01", end=f"{year}-12-31", freq="B").strftime("%Y-%m-%d").tolist()
-    last_thursdays = get_last_thursday(year)
-    
-    dates_expiry_map = {}
-    j = 0
-    for i in range(len(all_dates) - 1):
-        if all_dates[i] <= last_thursdays[j]:
-            dates_expiry_map[all_dates[i]] = last_thursdays[j]
-        else:
-            j += 1
-            dates_expiry_map[all_dates[i]] = last_thursdays[j]
-    return dates_expiry_map
-
-# Fetch all expiry dates
-dates_expiry_map = get_expiry_dates(year)
+# Map every NSE trading day of the year to its monthly expiry (holiday-shifted)
+dates_expiry_map = expiry_map(year)
 
 # API details
 url = "https://www.icharts.in/opt/hcharts/stx8req/php/getHistPriceInfo.php"
@@ -89,7 +54,7 @@ def fetch_option_data(date, expdate, symbol):
     """
     try:
         payload = get_payload(date, expdate, symbol)
-        response = requests.post(url, headers=headers, data=payload, timeout=10)
+        response = response_cache.post(url, headers=headers, data=payload, timeout=10)
         
         if response.status_code == 200:
             json_data = response.json()
@@ -154,4 +119,5 @@ if __name__ == "__main__":
     with open(f"nse_top_10_options_data_{current_time}.json", "w") as f:
         json.dump(data_store, f, indent=4)
 
-    print(f"Data saved to 'nse_top_10_options_data_{current_time}.json'.")
\ No newline at end of file
+    print(f"Data saved to 'nse_top_10_options_data_{current_time}.json'.")
+    print(response_cache.report())
\ No newline at end of file
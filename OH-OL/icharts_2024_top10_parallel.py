@@ -1,58 +1,20 @@
-import requests
 import json
-import pandas as pd
+from expiry_calendar import expiry_map
+from icharts_cache import ResponseCache
+from result_sink import ResultSink
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+# Historical responses are served from disk on reruns and across scripts
+response_cache = ResponseCache()
+
 # Top 10 NSE symbols by market cap
 nse_top_10 = ["RELIANCE", "TCS", "HDFCBANK", "ICICIBANK", "INFY", "HINDUNILVR", "SBIN", "BHARTIARTL", "ITC", "LICI"]
 
 year = 2024
 opt_types = {1: "open_high_calls", 2: "open_high_puts", 3: "open_low_calls", 4: "open_low_puts"}
 
-# Method to get the last Thursday of each month
-
-def get_last_thursday(year):
-    last_thursdays = []
-    for month in range(1, 13):
-        for day in range(31, 0, -1):
-            try:
-                date = f"{year}-{month:02d}-{day:02d}"
-                if pd.to_datetime(date).weekday() == 3:
-                    last_thursdays.append(date)
-                    break
-            except ValueError:
-                pass
-    # Adding first month's last Thursday of next year
-    month = 1
-    for day in range(31, 0, -1):
-        try:
-            date = f"{year+1}-{month:02d}-{day:02d}"
-            if pd.to_datetime(date).weekday() == 3:
-                last_thursdays.append(date)
-                break
-        except ValueError:
-            pass
-    return last_thursdays
-
-# Method to map each date to the next expiration Thursday
-
-def get_expiry_dates(year):
-    all_dates = pd.date_range(start=f"{year}-01-01", end=f"{year}-12-31", freq="B").strftime("%Y-%m-%d").tolist()
-    last_thursdays = get_last_thursday(year)
-    
-    dates_expiry_map = {}
-    j = 0
-    for i in range(len(all_dates) - 1):
-        if all_dates[i] <= last_thursdays[j]:
-            dates_expiry_map[all_dates[i]] = last_thursdays[j]
-        else:
-            j += 1
-            dates_expiry_map[all_dates[i]] = last_thursdays[j]
-    return dates_expiry_map
-
-# Fetch all expiry dates
-
-dates_expiry_map = get_expiry_dates(year)
+# Map every NSE trading day of the year to its monthly expiry (holiday-shifted)
+dates_expiry_map = expiry_map(year)
 
 # API details
 url = "https://www.icharts.in/opt/hcharts/stx8req/php/getDataForOpenHighLowScanOptions_v2.php"
@@ -87,7 +49,7 @@ def get_payload(date, expdate, optSymbol, optType):
 # Function to fetch data
 
 def fetch_data(symbol, date, expdate, optType):
-    response = requests.post(url, headers=headers, data=get_payload(date, expdate, symbol, optType))
+    response = response_cache.post(url, headers=headers, data=get_payload(date, expdate, symbol, optType))
     if response.status_code == 200:
         try:
             if not response.text.strip():
@@ -103,17 +65,19 @@ def fetch_data(symbol, date, expdate, optType):
         print(f"Error fetching data for {symbol}, optType {optType} on {date}: {response.status_code}, Response: {response.text}")
     return symbol, date, optType, []
 
-# Parallel execution
+# Hand each result to the sink as soon as it arrives; put() blocks while the
+# sink's queue is full, so results never pile up in memory
+def fetch_and_store(sink, symbol, date, expdate, optType):
+    symbol, date, optType, options_data = fetch_data(symbol, date, expdate, optType)
+    sink.put({"Stock": symbol, "Scan": opt_types[optType], "Date": date, "Expiry": expdate, "Data": options_data})
 
-data_store = {symbol: {opt_types[opt]: {} for opt in opt_types} for symbol in nse_top_10}
-with ThreadPoolExecutor(max_workers=10) as executor:
-    futures = [executor.submit(fetch_data, symbol, date, expdate, optType) for symbol in nse_top_10 for date, expdate in dates_expiry_map.items() for optType in opt_types]
-    for future in as_completed(futures):
-        symbol, date, optType, options_data = future.result()
-        data_store[symbol][opt_types[optType]][date] = options_data
+# Parallel execution, one JSON line per symbol, scan type and date
 
-# Save the fetched data to a JSON file
-with open("nse_top_10_options_data.json", "w") as f:
-    json.dump(data_store, f, indent=4)
+output_file = "nse_top_10_options_data.jsonl"
+with ResultSink(output_file) as sink, ThreadPoolExecutor(max_workers=10) as executor:
+    futures = [executor.submit(fetch_and_store, sink, symbol, date, expdate, optType) for symbol in nse_top_10 for date, expdate in dates_expiry_map.items() for optType in opt_types]
+    for future in as_completed(futures):
+        future.result()
 
-print("Data saved to 'nse_top_10_options_data.json'.")
+print(f"Data saved to '{output_file}' ({sink.written} requests).")
+print(response_cache.report())
\ No newline at end of file
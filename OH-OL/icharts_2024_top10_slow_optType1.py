@@ -1,6 +1,9 @@
-import requests
 import json
-import pandas as pd
+from expiry_calendar import expiry_map
+from icharts_cache import ResponseCache
+
+# Historical responses are served from disk on reruns and across scripts
+response_cache = ResponseCache()
 
 # Top 10 NSE symbols by market cap
 nse_top_10 = ["RELIANCE", "TCS", "HDFCBANK", "ICICIBANK", "INFY", "HINDUNILVR", "SBIN", "BHARTIARTL", "ITC", "LICI"]
@@ -8,50 +11,8 @@ nse_top_10 = ["RELIANCE", "TCS", "HDFCBANK", "ICICIBANK", "INFY", "HINDUNILVR",
 year = 2024
 optType = 1  # Assuming this is fixed
 
-# Method to get the last Thursday of each month
-
-def get_last_thursday(year):
-    last_thursdays = []
-    for month in range(1, 13):
-        for day in range(31, 0, -1):
-            try:
-                date = f"{year}-{month:02d}-{day:02d}"
-                if pd.to_datetime(date).weekday() == 3:
-                    last_thursdays.append(date)
-                    break
-            except ValueError:
-                pass
-    # Adding first month's last Thursday of next year
-    month = 1
-    for day in range(31, 0, -1):
-        try:
-            date = f"{year+1}-{month:02d}-{day:02d}"
-            if pd.to_datetime(date).weekday() == 3:
-                last_thursdays.append(date)
-                break
-        except ValueError:
-            pass
-    return last_thursdays
-
-# Method to map each date to the next expiration Thursday
-
-def get_expiry_dates(year):
-    all_dates = pd.date_range(start=f"{year}-01-01", end=f"{year}-12-31", freq="B").strftime("%Y-%m-%d").tolist()
-    last_thursdays = get_last_thursday(year)
-    
-    dates_expiry_map = {}
-    j = 0
-    for i in range(len(all_dates) - 1):
-        if all_dates[i] <= last_thursdays[j]:
-            dates_expiry_map[all_dates[i]] = last_thursdays[j]
-        else:
-            j += 1
-            dates_expiry_map[all_dates[i]] = last_thursdays[j]
-    return dates_expiry_map
-
-# Fetch all expiry dates
-
-dates_expiry_map = get_expiry_dates(year)
+# Map every NSE trading day of the year to its monthly expiry (holiday-shifted)
+dates_expiry_map = expiry_map(year)
 
 # API details
 url = "https://www.icharts.in/opt/hcharts/stx8req/php/getDataForOpenHighLowScanOptions_v2.php"
@@ -90,7 +51,7 @@ data_store = {}
 for symbol in nse_top_10:
     data_store[symbol] = {}
     for date, expdate in dates_expiry_map.items():
-        response = requests.post(url, headers=headers, data=get_payload(date, expdate, symbol))
+        response = response_cache.post(url, headers=headers, data=get_payload(date, expdate, symbol))
         if response.status_code == 200:
             try:
                 if not response.text.strip():  # Check if response is empty
@@ -110,3 +71,4 @@ with open("nse_top_10_options_data.json", "w") as f:
     json.dump(data_store, f, indent=4)
 
 print("Data saved to 'nse_top_10_options_data.json'.")
+print(response_cache.report())
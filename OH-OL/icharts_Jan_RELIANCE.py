@@ -1,6 +1,8 @@
-import requests
 import json
-import pandas as pd
+from icharts_cache import ResponseCache
+
+# Historical responses are served from disk on reruns and across scripts
+response_cache = ResponseCache()
 
 year = 2024
 date = "2024-01-01"
@@ -8,50 +10,6 @@ expdate = "25JAN24"
 optSymbol = "RELIANCE"
 optType = 1
 
-# Method to get the last thursday date of each month of the year and save it to a list
-# Also add the last thursday of the first month of the next year to the list
-def get_last_thursday(year):
-    last_thursdays = []
-    for month in range(1, 13):
-        for day in range(31, 0, -1):
-            try:
-                date = f"{year}-{month:02d}-{day:02d}"
-                if pd.to_datetime(date).weekday() == 3:
-                    last_thursdays.append(date)
-                    break
-            except ValueError:
-                pass
-    month = 1
-    for day in range(31, 0, -1):
-        try:
-            date = f"{year+1}-{month:02d}-{day:02d}"
-            if pd.to_datetime(date).weekday() == 3:
-                last_thursdays.append(date)
-                break
-        except ValueError:
-            pass
-    return last_thursdays
-
-# Method to give a df of all dates mapped to the last thursday of the month that comes right after that date
-def get_expiry_dates(year):
-
-    # List of all weekday dates of the year
-    all_dates = pd.date_range(start=f"{year}-01-01", end=f"{year}-12-31", freq="B").strftime("%Y-%m-%d").tolist()
-
-    last_thursdays_2024 = get_last_thursday(year)
-
-    # Map all dates of the year to the last thursday of the month that comes right after that date
-    dates_expiry_map = pd.Series()
-    j = 0
-    for i in range(len(all_dates) - 1):
-        if all_dates[i] <= last_thursdays_2024[j]:
-            dates_expiry_map[all_dates[i]] = last_thursdays_2024[j]
-        else:
-            j += 1
-            dates_expiry_map[all_dates[i]] = last_thursdays_2024[j]
-
-    return dates_expiry_map
-
 # Method to get payload for each date
 def get_payload(date, expdate):
     payload = {
@@ -84,7 +42,7 @@ headers = {
 }
 
 
-response = requests.post(url, headers=headers, data=get_payload(date, expdate))
+response = response_cache.post(url, headers=headers, data=get_payload(date, expdate))
 
 if response.status_code == 200:
     data = response.json()
@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+import pandas as pd
+import requests
+
+DEFAULT_RESPONSE_CACHE_PATH = "icharts_cache/responses.sqlite"
+
+# Responses about today (or with no date to go by) may still change
+LIVE_TTL = 15 * 60
+
+# Payload fields that identify the login, not the data; left out of the key
+# so a new session id still hits the cache
+SESSION_FIELDS = {"sID", "sid", "userName", "u"}
+
+# Payload fields naming the trading day a response is about, and failing
+# that the expiry, across the icharts endpoints the scripts call
+DATE_FIELDS = ["date", "txtDate", "defaultDate"]
+EXPIRY_FIELDS = ["expdate", "OptExpDate", "optExpDate", "expiry"]
+
+
+def request_key(url, payload):
+    """
+    Content address of a request: sha256 of the endpoint and the payload
+    with sorted keys, so the same query maps to the same entry from any script.
+    """
+    fields = {k: str(v) for k, v in (payload or {}).items() if k not in SESSION_FIELDS}
+    return hashlib.sha256((url + "\n" + json.dumps(fields, sort_keys=True)).encode()).hexdigest()
+
+
+def parse_payload_date(value):
+    """Date from a payload value such as 2024-01-25 or 25JAN24; None if it is not one."""
+    text = str(value).strip()
+    for fmt in ("%Y-%m-%d", "%d%b%y", "%d-%m-%Y"):
+        try:
+            return datetime.strptime(text.upper() if fmt == "%d%b%y" else text, fmt).date()
+        except ValueError:
+            pass
+    parsed = pd.to_datetime(text, errors="coerce")
+    return None if pd.isna(parsed) else parsed.date()
+
+
+def is_valid_json_body(body):
+    """
+    True for a body worth keeping: valid JSON that is not an icharts error
+    (an "error" field, or a bare string such as a session-expired message).
+    HTML error pages fail to parse and are rejected too.
+    """
+    try:
+        data = json.loads(body)
+    except (ValueError, UnicodeDecodeError):
+        return False
+    if isinstance(data, dict):
+        return not any(str(key).lower() == "error" for key in data)
+    return not isinstance(data, str)
+
+
+def is_empty_json_body(body):
+    """
+    True for an empty JSON container ([] or {}), which icharts also sends
+    for expired sessions and transient hiccups.
+    """
+    try:
+        data = json.loads(body)
+    except (ValueError, UnicodeDecodeError):
+        return False
+    return isinstance(data, (list, dict)) and not data
+
+
+class ResponseCache:
+    """
+    Disk cache of icharts POST responses, shared by every script that
+    points at the same SQLite file.
+
+    Entries are keyed by request_key. A response about a trading day before
+    today (IST) never changes, so it is kept permanently; anything else,
+    and any empty [] or {} reply, expires after live_ttl seconds. Only 200 responses whose body passes
+    `validate` (by default: parses as JSON with no error field) are stored,
+    so session-expired or error pages are never replayed. Concurrent threads
+    asking for the same request wait for a single fetch.
+    """
+    def __init__(self, path=DEFAULT_RESPONSE_CACHE_PATH, live_ttl=LIVE_TTL, today=None,
+                 validate=is_valid_json_body):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.live_ttl = live_ttl
+        self.validate = validate
+        self.today = today or datetime.now(ZoneInfo("Asia/Kolkata")).date()
+        self.conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.key_locks = {}
+        self.hits = 0
+        self.misses = 0
+        with self.conn:
+            # WAL lets several scripts read while one writes
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    body BLOB NOT NULL,
+                    encoding TEXT,
+                    fetched_at REAL NOT NULL,
+                    expires_at REAL
+                )
+            """)
+
+    def is_historical(self, payload):
+        payload = payload or {}
+        for fields in (DATE_FIELDS, EXPIRY_FIELDS):
+            for field in fields:
+                if field in payload:
+                    day = parse_payload_date(payload[field])
+                    if day is not None:
+                        return day < self.today
+        return False
+
+    def get(self, url, payload):
+        """
+        Cached (body, encoding) for a request, or None if missing or expired.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT body, encoding, expires_at FROM responses WHERE key = ?", (request_key(url, payload),)
+            ).fetchone()
+        if row is None or (row[2] is not None and row[2] < time.time()):
+            return None
+        return row[0], row[1]
+
+    def put(self, url, payload, body, encoding=None, validate=None):
+        """
+        Store a response body; returns False (and stores nothing) if it is
+        empty or rejected by the validator.
+        """
+        if not body or not body.strip() or not (validate or self.validate)(body):
+            return False
+        now = time.time()
+        # An empty reply may be a hiccup, so even a historical one is only kept briefly
+        permanent = self.is_historical(payload) and not is_empty_json_body(body)
+        expires_at = None if permanent else now + self.live_ttl
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (request_key(url, payload), url, json.dumps(payload, sort_keys=True, default=str),
+                 body, encoding, now, expires_at)
+            )
+        return True
+
+    def _key_lock(self, key):
+        with self.lock:
+            return self.key_locks.setdefault(key, threading.Lock())
+
+    def invalidate(self, url, payload):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (request_key(url, payload),))
+
+    def post(self, url, data=None, session=None, validate=None, **kwargs):
+        """
+        Drop-in for requests.post(url, data=..., headers=..., timeout=...):
+        returns a requests.Response, built from the cache on a hit.
+        `validate(body)` overrides the cache's body check for this call.
+        """
+        cached = self.get(url, data)
+        if cached is None:
+            with self._key_lock(request_key(url, data)):
+                cached = self.get(url, data)
+                if cached is None:
+                    response = (session or requests).post(url, data=data, **kwargs)
+                    if response.status_code == 200:
+                        self.put(url, data, response.content, response.encoding, validate)
+                    with self.lock:
+                        self.misses += 1
+                    return response
+        with self.lock:
+            self.hits += 1
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = cached[0]
+        response.encoding = cached[1]
+        response.headers["X-Cache"] = "HIT"
+        return response
+
+    def purge_expired(self):
+        with self.lock, self.conn:
+            return self.conn.execute(
+                "DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at < ?", (time.time(),)
+            ).rowcount
+
+    def report(self):
+        total = self.hits + self.misses
+        share = self.hits / total * 100 if total else 0.0
+        return f"Response cache: {self.hits} of {total} requests served from {self.path} ({share:.1f}%)"
+
+    def close(self):
+        self.conn.close()
@@ -1,46 +1,139 @@
 import json
-import csv
-from pathlib import Path
-
-def json_to_csv(json_file, csv_output):
-    # Read the JSON file
-    with open(json_file, 'r') as f:
-        data = json.load(f)
-    
-    # Open CSV file for writing
-    with open(csv_output, 'w', newline='') as csvfile:
-        csvwriter = csv.writer(csvfile)
-        
-        # Write header
-        header = [
-            'Stock', 'Date', 'Option_Symbol', 'Open', 'High/Low', 
-            'Latest High/Low', 'LTP', 'Change %', 'Volume', 'OI Change'
-        ]
-        csvwriter.writerow(header)
-        
-        # Iterate through the JSON data
-        for stock, stock_data in data.items():
-            if 'open_high_calls' in stock_data:
-                for date, options in stock_data['open_high_calls'].items():
-                    for option in options:
-                        # Create a row with stock, date, and option details
-                        row = [
-                            stock, 
-                            date, 
-                            option[0],   # Option Symbol
-                            option[1],   # Open
-                            option[2],   # High
-                            option[3],   # Low
-                            option[4],   # Close
-                            option[5],   # Volume/OI Ratio
-                            option[6],   # Volume
-                            option[7]    # Change
-                        ]
-                        csvwriter.writerow(row)
-
-# Example usage
-input_json = 'nse_top_10_options_data.json'
-output_csv = 'output.csv'
-json_to_csv(input_json, output_csv)
-
-print(f"Conversion complete. CSV saved to {output_csv}")
\ No newline at end of file
+import sys
+import ijson
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
+
+# Scan types written by icharts_2024_top10_parallel.py, keyed by its optType
+SCAN_TYPES = ["open_high_calls", "open_high_puts", "open_low_calls", "open_low_puts"]
+
+# aaData row fields, in order
+OPTION_FIELDS = [
+    'Option_Symbol', 'Open', 'High/Low', 'Latest High/Low', 'LTP', 'Change %', 'Volume', 'OI Change'
+]
+NUMERIC_FIELDS = OPTION_FIELDS[1:]
+
+SCHEMA = pa.schema(
+    [('Stock', pa.string()), ('Scan', pa.string()), ('Date', pa.date32()), ('Option_Symbol', pa.string())]
+    + [(field, pa.float64()) for field in NUMERIC_FIELDS]
+)
+
+CHUNK_ROWS = 100_000
+
+
+def iter_scan_rows(f):
+    """
+    Stream (stock, scan, date, row) out of a symbol -> scan type -> date ->
+    [[option fields], ...] dump with an incremental parser, so only the row
+    being read is held in memory.
+    """
+    stock = scan = date = None
+    map_depth = 0
+    array_depth = 0
+    row = None
+    for _, event, value in ijson.parse(f):
+        if event == 'start_map':
+            map_depth += 1
+        elif event == 'end_map':
+            map_depth -= 1
+        elif event == 'map_key':
+            if map_depth == 1:
+                stock = value
+            elif map_depth == 2:
+                scan = value
+            elif map_depth == 3:
+                date = value
+        elif event == 'start_array':
+            array_depth += 1
+            if array_depth == 2:
+                row = []
+        elif event == 'end_array':
+            if array_depth == 2 and row is not None:
+                yield stock, scan, date, row
+                row = None
+            array_depth -= 1
+        elif array_depth == 2 and row is not None:
+            row.append(value)
+
+
+def iter_jsonl_rows(f):
+    """
+    Same rows from the JSON lines written by icharts_2024_top10_parallel.py's
+    result sink: one {Stock, Scan, Date, Expiry, Data} record per request.
+    """
+    for line in f:
+        if line.strip():
+            record = json.loads(line)
+            for row in record["Data"]:
+                yield record["Stock"], record["Scan"], record["Date"], row
+
+
+def to_table(columns):
+    """
+    Typed Arrow table from buffered column lists; numbers sent as text
+    (with thousands separators or a % sign) are parsed, anything else is null.
+    """
+    data = {
+        'Stock': pa.array(columns['Stock'], pa.string()),
+        'Scan': pa.array(columns['Scan'], pa.string()),
+        'Date': pa.array(pd.to_datetime(pd.Series(columns['Date']), errors='coerce').dt.date, pa.date32()),
+        'Option_Symbol': pa.array([None if v is None else str(v) for v in columns['Option_Symbol']], pa.string()),
+    }
+    for field in NUMERIC_FIELDS:
+        text = pd.Series(columns[field], dtype=object).astype(str).str.replace(r'[,%\s]', '', regex=True)
+        data[field] = pa.array(pd.to_numeric(text, errors='coerce'), pa.float64())
+    return pa.Table.from_pydict(data, schema=SCHEMA)
+
+
+def open_writer(output_file):
+    if output_file.endswith('.csv'):
+        return pv.CSVWriter(output_file, SCHEMA)
+    return pq.ParquetWriter(output_file, SCHEMA, compression='zstd')
+
+
+def json_to_columnar(json_file, output_file, chunk_rows=CHUNK_ROWS):
+    """
+    Flatten every scan type of the OH-OL dump (nested JSON, or JSON lines
+    when json_file ends in .jsonl) into one typed table, written
+    as Parquet (or CSV when output_file ends in .csv) in chunks of
+    chunk_rows, so memory stays bounded whatever the size of the dump.
+    Returns the number of rows written, per scan type.
+    """
+    counts = {scan: 0 for scan in SCAN_TYPES}
+    columns = {name: [] for name in SCHEMA.names}
+    buffered = 0
+
+    with open(json_file, 'rb') as f, open_writer(output_file) as writer:
+        rows = iter_jsonl_rows(f) if json_file.endswith('.jsonl') else iter_scan_rows(f)
+        for stock, scan, date, row in rows:
+            columns['Stock'].append(stock)
+            columns['Scan'].append(scan)
+            columns['Date'].append(date)
+            row = row[:len(OPTION_FIELDS)] + [None] * (len(OPTION_FIELDS) - len(row))
+            for field, value in zip(OPTION_FIELDS, row):
+                columns[field].append(value)
+            counts[scan] = counts.get(scan, 0) + 1
+            buffered += 1
+            if buffered >= chunk_rows:
+                writer.write_table(to_table(columns))
+                columns = {name: [] for name in SCHEMA.names}
+                buffered = 0
+        if buffered:
+            writer.write_table(to_table(columns))
+    return counts
+
+
+def main():
+    input_json = sys.argv[1] if len(sys.argv) > 1 else 'nse_top_10_options_data.jsonl'
+    output_file = sys.argv[2] if len(sys.argv) > 2 else 'nse_top_10_options_data.parquet'
+
+    counts = json_to_columnar(input_json, output_file)
+    for scan, rows in counts.items():
+        print(f"{scan}: {rows} rows")
+    print(f"Conversion complete. {sum(counts.values())} rows saved to {output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import json
+import os
+import queue
+import threading
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+_CLOSE = object()
+
+
+class ResultSink:
+    """
+    Writer thread that appends records (dicts) to a JSONL or Parquet file
+    as fetchers produce them.
+
+    Producers call put() from any thread. Records pass through a queue of at
+    most `maxsize` items, so when the writer falls behind put() blocks and
+    the fetchers slow down instead of piling results up in memory. JSONL
+    lines are flushed every `batch_rows` records, so a crashed run keeps
+    what it fetched; Parquet is written in row groups of `batch_rows` and is
+    readable once the sink is closed. Without a schema the Parquet columns
+    are inferred from the first batch, with all-None columns stored as
+    string. The format follows the file extension unless output_format is
+    given.
+    """
+    def __init__(self, path, output_format=None, maxsize=100, batch_rows=10_000, schema=None):
+        self.path = path
+        self.output_format = output_format or ("parquet" if path.endswith(".parquet") else "jsonl")
+        self.batch_rows = batch_rows
+        self.schema = schema
+        self.inferred_schema = False
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.thread = threading.Thread(target=self._run, name="result-sink", daemon=True)
+        self.error = None
+        self.written = 0
+        self.closing = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Still stop the writer, but let an exception already in flight propagate
+        self.close(raise_error=exc_type is None)
+
+    def start(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.thread.start()
+        return self
+
+    def put(self, record):
+        # Blocks while the queue is full; gives up if the writer has died
+        while True:
+            if self.error is not None:
+                raise RuntimeError(f"Result sink for {self.path} failed: {self.error}")
+            try:
+                self.queue.put(record, timeout=1)
+                return
+            except queue.Full:
+                pass
+
+    def put_many(self, records):
+        for record in records:
+            self.put(record)
+
+    def close(self, raise_error=True):
+        if self.thread.is_alive():
+            self.queue.put(_CLOSE)
+            self.thread.join()
+        if self.error is not None and raise_error:
+            raise RuntimeError(f"Result sink for {self.path} failed: {self.error}")
+
+    def _run(self):
+        try:
+            if self.output_format == "parquet":
+                self._write_parquet()
+            else:
+                self._write_jsonl()
+        except Exception as e:
+            self.error = e
+            # Drain so producers blocked in put() see the error, unless the
+            # failure came after close() was already received
+            while not self.closing:
+                try:
+                    if self.queue.get(timeout=1) is _CLOSE:
+                        break
+                except queue.Empty:
+                    pass
+
+    def _records(self):
+        while True:
+            record = self.queue.get()
+            if record is _CLOSE:
+                self.closing = True
+                return
+            yield record
+
+    def _write_jsonl(self):
+        with open(self.path, "w") as f:
+            for record in self._records():
+                f.write(json.dumps(record, default=str) + "\n")
+                self.written += 1
+                if self.written % self.batch_rows == 0:
+                    f.flush()
+
+    def _write_parquet(self):
+        writer = None
+        batch = []
+        try:
+            for record in self._records():
+                batch.append(record)
+                if len(batch) >= self.batch_rows:
+                    writer = self._write_batch(writer, batch)
+                    batch = []
+            if batch or writer is None:
+                writer = self._write_batch(writer, batch)
+        finally:
+            if writer is not None:
+                writer.close()
+
+    def _write_batch(self, writer, batch):
+        if writer is None and self.schema is None:
+            table = pa.Table.from_pylist(batch)
+            # A column that is all None in the first batch would be typed null
+            # and reject real values later, so store it as string instead
+            self.schema = pa.schema([
+                field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                for field in table.schema
+            ])
+            self.inferred_schema = True
+        if self.inferred_schema:
+            table = self._align(pa.Table.from_pylist(batch))
+        else:
+            table = pa.Table.from_pylist(batch, schema=self.schema)
+        if writer is None:
+            writer = pq.ParquetWriter(self.path, self.schema, compression="zstd")
+        writer.write_table(table.cast(self.schema))
+        self.written += len(batch)
+        return writer
+
+    def _align(self, table):
+        """
+        Put an inferred-type batch into the inferred schema's column order,
+        with nulls for columns the batch lacks.
+        """
+        columns = [
+            table[field.name] if field.name in table.column_names else pa.nulls(len(table), field.type)
+            for field in self.schema
+        ]
+        return pa.Table.from_arrays(columns, names=self.schema.names)
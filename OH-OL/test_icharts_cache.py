@@ -0,0 +1,17 @@
+from datetime import date
+from icharts_cache import ResponseCache
+
+URL = "https://www.icharts.in/opt/api/getOHScan.php"
+
+
+def test_historical_reply_is_kept_but_empty_reply_expires(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"), live_ttl=-1, today=date(2024, 6, 1))
+    try:
+        assert cache.put(URL, {"date": "2024-01-25"}, '[{"symbol": "RELIANCE"}]')
+        assert cache.put(URL, {"date": "2024-01-26"}, "[]")
+        assert cache.put(URL, {"date": "2024-01-29"}, "{}")
+        assert cache.get(URL, {"date": "2024-01-25"}) is not None
+        assert cache.get(URL, {"date": "2024-01-26"}) is None
+        assert cache.get(URL, {"date": "2024-01-29"}) is None
+    finally:
+        cache.close()
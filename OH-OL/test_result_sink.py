@@ -0,0 +1,26 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+from result_sink import ResultSink
+
+
+def test_parquet_column_all_none_in_first_batch(tmp_path):
+    path = str(tmp_path / "scan.parquet")
+    with ResultSink(path, batch_rows=2) as sink:
+        sink.put_many([
+            {"symbol": "RELIANCE", "open": 100.0, "note": None},
+            {"symbol": "TCS", "open": 200.0, "note": None},
+            {"symbol": "INFY", "open": 300.0, "note": "gap up"},
+            {"symbol": "ITC", "note": "no open"},
+        ])
+    table = pq.read_table(path)
+    assert sink.written == 4
+    assert table.column("note").to_pylist() == [None, None, "gap up", "no open"]
+    assert table.column("open").to_pylist() == [100.0, 200.0, 300.0, None]
+
+
+def test_parquet_explicit_schema_is_kept(tmp_path):
+    schema = pa.schema([("symbol", pa.string()), ("open", pa.float64())])
+    path = str(tmp_path / "scan.parquet")
+    with ResultSink(path, schema=schema) as sink:
+        sink.put({"symbol": "RELIANCE", "open": None})
+    assert pq.read_schema(path).equals(schema)
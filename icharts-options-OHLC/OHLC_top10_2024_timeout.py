@@ -6,6 +6,10 @@ from datetime import datetime
 import os
 from tqdm import tqdm
 import time as time
+from option_bar_store import write_option_bars, DEFAULT_STORE_ROOT
+from ohlc_parser import ohlc_frame
+from metadata_cache import MetadataCache
+from strike_selection import StrikeSelector
 
 # Global variables
 nse_top_10 = ["ICICIBANK", "INFY", "HINDUNILVR", "SBIN", "BHARTIARTL", "ITC", "LICI"]
@@ -27,6 +31,21 @@ headers = {
 with open('C:\levitas\script\icharts-options-OHLC\expiry_dates.json', 'r') as f:
     expiry_dates = json.load(f)
 
+# dd values and strike lists of past expiries are fetched only once
+metadata_cache = MetadataCache()
+
+# Spot file from OH-OL/icharts_2024_spotprice_top10.py to download only strikes near ATM;
+# None downloads the full chain
+spot_file = None
+strike_selector = StrikeSelector.from_spot_file(spot_file, width=5) if spot_file else None
+
+def dd_from_response(response, sym, expiry_date):
+    # A non-200 reply (e.g. an expired session's login page) is not a dd value
+    if response.status_code != 200:
+        print(f"HTTP {response.status_code} getting dd for {sym} {expiry_date}")
+        return None
+    return response.text
+
 def get_dd(sym, expiry_date):
     url = "https://www.icharts.in/opt/hcharts/stx8req/php/getExpiryTradingDate_Curr.php"
     payload = {
@@ -35,24 +54,27 @@ def get_dd(sym, expiry_date):
     }
     try:
         response = requests.post(url, headers=headers, data=payload)
-        return response.text
+        return dd_from_response(response, sym, expiry_date)
     except Exception as e:
         print(f"Error getting dd for {sym} {expiry_date}: {str(e)}. Retrying now.")
         time.sleep(5)
         try:
             response = requests.post(url, headers=headers, data=payload)
-            return response.text
+            return dd_from_response(response, sym, expiry_date)
         except Exception as e:
             print(f"Still got error getting dd for {sym} {expiry_date}: {str(e)}")
         return None
 
 def get_strikes(symbol, expiry_date, option_type):
+    return metadata_cache.get_or_fetch_strikes(symbol, expiry_date, option_type, fetch_strikes)
+
+def fetch_strikes(symbol, expiry_date, option_type):
     url = "https://www.icharts.in/opt/hcharts/stx8req/php/getStrikesForDateSymExpOT_Currency.php"
     payload = {
         "sym": symbol,
         "ed": expiry_date,
         "ot": option_type,
-        "dd": get_dd(symbol, expiry_date)
+        "dd": metadata_cache.get_or_fetch_dd(symbol, expiry_date, get_dd)
     }
     try:
         response = requests.post(url, headers=headers, data=payload)
@@ -85,45 +107,27 @@ def get_ohlc(params):
     for tryCount in range(tries):
         try:
             response = requests.post(url, headers=headers, data=payload)
-            data_str = response.content.decode("utf-8")
+            data = response.content
             
             # Check for empty or invalid response
-            if not data_str.strip() or "error" in data_str.lower():
+            if not data.strip() or b"error" in data.lower():
                 print(f"No valid data for {option_string}. Retrying now.")
                 if tryCount < tries:
                     time.sleep(5)
                     continue
                 return None
                 
-            # Split the data into rows and filter out empty rows
-            rows = [line.split(",") for line in data_str.strip().split("\n") if line.strip()]
-            
-            # Validate row format
-            valid_rows = [row for row in rows if len(row) == 10]  # We expect 10 columns
+            # Parse the raw bytes straight into typed columns
+            df, malformed = ohlc_frame(data)
+            if malformed:
+                print(f"Skipped {malformed} malformed rows for {option_string}")
             
-            if not valid_rows:
+            if df.empty:
                 print(f"No valid rows found for {option_string}")
                 return None
                 
-            df = pd.DataFrame(valid_rows, columns=[
-                "DateTime", "Open", "High", "Low", "Close", "Volume", 
-                "OI Change", "VWAP", "Day Low", "Day High"
-            ])
-            
-            # Convert numeric columns, handling errors
-            numeric_columns = ["Open", "High", "Low", "Close", "Volume", 
-                            "OI Change", "VWAP", "Day Low", "Day High"]
-            for col in numeric_columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-            
-            # Convert DateTime and handle invalid dates
-            try:
-                df["DateTime"] = pd.to_datetime(df["DateTime"], format="%d.%m.%y %H:%M:%S")
-                df["Date"] = df["DateTime"].dt.date
-                df["Time"] = df["DateTime"].dt.time
-            except Exception as e:
-                print(f"DateTime conversion error for {option_string}: {str(e)}")
-                return None
+            df["Date"] = df["DateTime"].dt.date
+            df["Time"] = df["DateTime"].dt.time
             
             # Add metadata columns
             df["Symbol"] = symbol
@@ -162,10 +166,14 @@ def process_symbol(symbol):
     for expiry in expiry_dates:
         for opt_type in option_type:
             strikes = get_strikes(symbol, expiry, opt_type)
+            if strike_selector is not None:
+                strikes = strike_selector.select(symbol, expiry, strikes)
             for strike in strikes:
                 all_params.append((symbol, expiry, opt_type, strike))
     
     print(f"Total combinations to process for {symbol}: {len(all_params)}")
+    if strike_selector is not None:
+        print(strike_selector.report())
     
     # Initialize an empty list to store all DataFrames
     all_data = []
@@ -197,11 +205,9 @@ def process_symbol(symbol):
         ]
         final_df = final_df[column_order]
         
-        # Save to JSON
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_file = os.path.join(output_dir, f"{symbol}_options_data_{timestamp}.json")
-        final_df.to_json(output_file, orient="records", lines=True)
-        print(f"\nData saved to {output_file}")
+        # Save to the partitioned Parquet store, one file per contract
+        written = write_option_bars(final_df, DEFAULT_STORE_ROOT)
+        print(f"\nData saved to {DEFAULT_STORE_ROOT} ({len(written)} contract files)")
         
         # Print summary statistics
         print("\nSummary:")
@@ -0,0 +1,481 @@
+import asyncio
+import aiohttp
+import json
+import os
+import random
+import time
+import pandas as pd
+from datetime import datetime
+from tqdm import tqdm
+from ohlc_job_manifest import JobManifest, DONE, EMPTY, FAILED
+import option_bar_store
+from ohlc_parser import ohlc_frame
+from metadata_cache import MetadataCache, is_valid_dd
+from strike_selection import StrikeSelector
+
+# Global variables
+nse_top_10 = ["RELIANCE", "TCS", "HDFCBANK", "ICICIBANK", "INFY", "HINDUNILVR", "SBIN", "BHARTIARTL", "ITC", "LICI"]
+option_type = ["C", "P"]
+base_url = "https://www.icharts.in"
+user_name = "Levitas"
+session_id = "ajeeq8spmpa5h4tspmq8ald2rm"
+headers = {
+    "accept": "application/json, text/javascript, */*; q=0.01",
+    "accept-language": "en-US,en;q=0.7",
+    "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
+    "cookie": f"PHPSESSID={session_id}",
+    "origin": "https://www.icharts.in",
+    "referer": "https://www.icharts.in/opt/OpenHighLowScanOptions.php",
+    "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36",
+    "x-requested-with": "XMLHttpRequest"
+}
+
+DD_PATH = "/opt/hcharts/stx8req/php/getExpiryTradingDate_Curr.php"
+STRIKES_PATH = "/opt/hcharts/stx8req/php/getStrikesForDateSymExpOT_Currency.php"
+OHLC_PATH = "/opt/hcharts/stx8req/php/getdataForOptions_curr_atp_tj.php"
+
+OUTPUT_COLUMNS = [
+    'Date', 'Time', 'Symbol', 'Strike', 'Option_Type', 'Expiry_Date',
+    'Open', 'High', 'Low', 'Close', 'Volume', 'OI Change', 'VWAP',
+    'Day Low', 'Day High', 'Option_String'
+]
+
+# Status codes worth retrying; any other non-200 status is a failed request
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header, or None if absent or not a number."""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Async token bucket: allows bursts of up to `capacity` requests and a
+    sustained `rate` requests per second across all tasks.
+    """
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncIchartsClient:
+    """
+    Shared keep-alive session for the icharts option endpoints.
+
+    Concurrency is capped by a semaphore (and the connector's pool size),
+    request starts by a token bucket, and failed requests are retried with
+    full-jitter exponential backoff (or the server's Retry-After) instead
+    of a fixed sleep. dd and strike lookups go through an optional
+    MetadataCache, and concurrent lookups of the same key share one request.
+    """
+    def __init__(self, base_url=base_url, max_concurrency=20, rate=10, burst=20,
+                 max_retries=5, backoff_base=0.5, backoff_cap=30, timeout=60, metadata_cache=None):
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.metadata_cache = metadata_cache
+        self.inflight = {}
+        self.session = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=60)
+        self.session = aiohttp.ClientSession(connector=connector, headers=headers, timeout=self.timeout)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+
+    def backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    async def post(self, path, payload, params=None, empty_retries=0, as_bytes=False):
+        """
+        POST to an icharts endpoint and return the body text (raw bytes with
+        as_bytes), or None once all retries are used up. Empty or "error"
+        bodies are retried at most empty_retries times, since contracts that
+        never traded stay empty. Other 4xx replies (e.g. an expired session)
+        return None straight away; their body is never handed back.
+        """
+        url = self.base_url + path
+        empty_attempts = 0
+        for attempt in range(self.max_retries):
+            await self.bucket.acquire()
+            retry_after = None
+            try:
+                async with self.semaphore:
+                    async with self.session.post(url, data=payload, params=params) as response:
+                        body = await response.read() if as_bytes else await response.text()
+                        status = response.status
+                        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if status in RETRY_STATUSES:
+                    print(f"HTTP {status} from {path} for {payload}. Retrying now.")
+                elif status != 200:
+                    print(f"HTTP {status} from {path} for {payload}. Not retrying.")
+                    return None
+                elif empty_attempts < empty_retries and is_empty_body(body):
+                    empty_attempts += 1
+                    print(f"No valid data from {path} for {payload}. Retrying now.")
+                else:
+                    return body
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"Error calling {path} for {payload}: {str(e)}. Retrying now.")
+            if attempt < self.max_retries - 1:
+                # The server's Retry-After wins over our own backoff schedule
+                await asyncio.sleep(retry_after if retry_after is not None else self.backoff(attempt))
+        print(f"Giving up on {path} for {payload} after {self.max_retries} attempts")
+        return None
+
+    async def shared(self, key, factory):
+        """
+        Await factory() once per key at a time; callers arriving while it
+        runs get the same result.
+        """
+        task = self.inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self.inflight[key] = task
+            task.add_done_callback(lambda _: self.inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def get_dd(self, sym, expiry_date):
+        if self.metadata_cache is not None:
+            dd = self.metadata_cache.get_dd(sym, expiry_date)
+            if dd is not None:
+                return dd
+        dd = await self.shared(("dd", sym, expiry_date),
+                               lambda: self.post(DD_PATH, {"ed": expiry_date, "sym": sym}))
+        if dd is not None and not is_valid_dd(dd):
+            print(f"Invalid dd for {sym} {expiry_date}: {dd[:80]!r}")
+            return None
+        if self.metadata_cache is not None and dd is not None:
+            self.metadata_cache.put_dd(sym, expiry_date, dd)
+        return dd
+
+    async def get_strikes(self, symbol, expiry_date, option_type, dd=None):
+        """
+        Strike ids for one expiry and option type, or None if the request failed.
+        """
+        if self.metadata_cache is not None:
+            strikes = self.metadata_cache.get_strikes(symbol, expiry_date, option_type)
+            if strikes is not None:
+                return strikes
+        strikes = await self.shared(("strikes", symbol, expiry_date, option_type),
+                                    lambda: self.fetch_strikes(symbol, expiry_date, option_type, dd))
+        if self.metadata_cache is not None and strikes is not None:
+            self.metadata_cache.put_strikes(symbol, expiry_date, option_type, strikes)
+        return strikes
+
+    async def fetch_strikes(self, symbol, expiry_date, option_type, dd=None):
+        if dd is None:
+            dd = await self.get_dd(symbol, expiry_date)
+        if dd is None:
+            return None
+        payload = {
+            "sym": symbol,
+            "ed": expiry_date,
+            "ot": option_type,
+            "dd": dd
+        }
+        body = await self.post(STRIKES_PATH, payload)
+        if body is None:
+            return None
+        try:
+            return [item["id"] for item in json.loads(body)]
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"Error getting strikes for {symbol} {expiry_date} {option_type}: {str(e)}")
+            return None
+
+    async def get_ohlc(self, symbol, expiry_date, opt_type, strike):
+        _, df = await self.fetch_contract(symbol, expiry_date, opt_type, strike)
+        return df
+
+    async def fetch_contract(self, symbol, expiry_date, opt_type, strike):
+        """
+        (status, DataFrame) for one contract: FAILED when the request never
+        succeeded, EMPTY when icharts returned no usable bars, DONE otherwise.
+        """
+        option_string = f"{symbol}-{strike}{opt_type}-{expiry_date}"
+        payload = {
+            "mode": "INTRA",
+            "symbol": option_string,
+            "timeframe": "1min",
+            "u": user_name,
+            "sid": session_id
+        }
+        body = await self.post(OHLC_PATH, payload, params=payload, empty_retries=2, as_bytes=True)
+        if body is None:
+            return FAILED, None
+        if is_empty_body(body):
+            print(f"No valid data for {option_string}")
+            return EMPTY, None
+        df = parse_ohlc(body, symbol, expiry_date, opt_type, strike)
+        if df is None or df.empty:
+            return EMPTY, None
+        return DONE, df
+
+
+def is_empty_body(body):
+    if isinstance(body, bytes):
+        return not body.strip() or b"error" in body.lower()
+    return not body.strip() or "error" in body.lower()
+
+
+def parse_ohlc(data, symbol, expiry_date, opt_type, strike):
+    """
+    Turn a getdataForOptions response (bytes or text) into the DataFrame
+    process_symbol writes.
+    """
+    option_string = f"{symbol}-{strike}{opt_type}-{expiry_date}"
+
+    df, malformed = ohlc_frame(data)
+    if malformed:
+        print(f"Skipped {malformed} malformed rows for {option_string}")
+    if df.empty:
+        print(f"No valid rows found for {option_string}")
+        return None
+
+    df["Date"] = df["DateTime"].dt.date
+    df["Time"] = df["DateTime"].dt.time
+
+    df["Symbol"] = symbol
+    df["Strike"] = strike
+    df["Option_Type"] = opt_type
+    df["Expiry_Date"] = expiry_date
+    df["Option_String"] = option_string
+    return df
+
+
+def select_strikes(tasks, strike_selector):
+    """
+    Drop (symbol, expiry, option type, strike) tasks the StrikeSelector prunes.
+    """
+    if strike_selector is None:
+        return tasks
+    groups = {}
+    for task in tasks:
+        groups.setdefault(task[:3], []).append(task[3])
+    kept = {key: set(strike_selector.select(key[0], key[1], strikes)) for key, strikes in groups.items()}
+    return [task for task in tasks if task[3] in kept[task[:3]]]
+
+
+async def download_symbol(client, symbol, expiry_dates, option_types=option_type, progress=None,
+                          strike_selector=None):
+    """
+    Fetch every strike of every expiry and option type for one symbol, or
+    only those near ATM when a StrikeSelector is given.
+    """
+    # Calls and puts of one expiry share a single (cached) dd lookup
+    strike_lists = await asyncio.gather(*[
+        client.get_strikes(symbol, expiry, opt_type)
+        for expiry in expiry_dates for opt_type in option_types
+    ])
+    keys = [(expiry, opt_type) for expiry in expiry_dates for opt_type in option_types]
+    all_params = [
+        (symbol, expiry, opt_type, strike)
+        for (expiry, opt_type), strikes in zip(keys, strike_lists) for strike in strikes or []
+    ]
+    all_params = select_strikes(all_params, strike_selector)
+    print(f"Total combinations to process for {symbol}: {len(all_params)}")
+    if progress is not None:
+        progress.total += len(all_params)
+        progress.refresh()
+
+    async def fetch(params):
+        df = await client.get_ohlc(*params)
+        if progress is not None:
+            progress.update(1)
+        return df
+
+    results = await asyncio.gather(*[fetch(params) for params in all_params])
+    return [df for df in results if df is not None and not df.empty]
+
+
+def contract_file(output_root, task):
+    symbol, expiry, opt_type, strike = task
+    return os.path.join(output_root, symbol, "contracts", f"{symbol}-{strike}{opt_type}-{expiry}.json")
+
+
+def write_contract(df, path):
+    """
+    Write one contract's bars; the rename means a crash never leaves a partial file.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    df[OUTPUT_COLUMNS].to_json(tmp_path, orient="records", lines=True)
+    os.replace(tmp_path, path)
+
+
+async def download_symbol_resumable(client, manifest, symbol, expiry_dates, option_types=option_type,
+                                    progress=None, output_root="options_data", retry_empty=False,
+                                    parquet_root=None, strike_selector=None):
+    """
+    download_symbol driven by a JobManifest. Strike lists already in the
+    manifest are not fetched again, every finished contract is written to
+    disk and marked done as soon as it arrives, and only pending and failed
+    tasks (plus empty ones with retry_empty, e.g. after a session expired)
+    are requested. Contracts go to the Parquet store under parquet_root when
+    it is given, otherwise to JSON-lines files under output_root. Strikes a
+    StrikeSelector prunes stay pending in the manifest, so a wider window
+    later picks them up. Returns the paths of all completed contract files.
+    """
+    missing = [
+        (expiry, opt_type) for expiry in expiry_dates for opt_type in option_types
+        if not manifest.has_strikes(symbol, expiry, opt_type)
+    ]
+    strike_lists = await asyncio.gather(*[
+        client.get_strikes(symbol, expiry, opt_type) for expiry, opt_type in missing
+    ])
+    for (expiry, opt_type), strikes in zip(missing, strike_lists):
+        # A failed or empty lookup is left unrecorded so the next run asks again
+        if strikes:
+            manifest.add_strikes(symbol, expiry, opt_type, strikes)
+
+    tasks = select_strikes(manifest.tasks_to_run(symbol, retry_empty=retry_empty), strike_selector)
+    print(f"Contracts left to download for {symbol}: {len(tasks)} {manifest.summary(symbol)}")
+    if progress is not None:
+        progress.total += len(tasks)
+        progress.refresh()
+
+    async def fetch(task):
+        status, df = await client.fetch_contract(*task)
+        if status == DONE:
+            if parquet_root is not None:
+                path = option_bar_store.write_contract(df, parquet_root, *task)
+            else:
+                path = contract_file(output_root, task)
+                write_contract(df, path)
+            manifest.mark(task, DONE, output_file=path)
+        else:
+            manifest.mark(task, status, error="request failed" if status == FAILED else None)
+        if progress is not None:
+            progress.update(1)
+
+    await asyncio.gather(*[fetch(task) for task in tasks])
+    return manifest.output_files(symbol)
+
+
+def load_contracts(paths):
+    # Keep Date/Time as the strings written by write_contract so the merged file matches save_symbol_data
+    return [pd.read_json(path, orient="records", lines=True, dtype={"Strike": str},
+                         convert_dates=False, keep_default_dates=False) for path in paths]
+
+
+def save_symbol_data(symbol, all_data, output_root="options_data"):
+    output_dir = os.path.join(output_root, symbol)
+    os.makedirs(output_dir, exist_ok=True)
+    if not all_data:
+        print(f"No data was collected for {symbol}. Please check the error messages above.")
+        return None
+
+    final_df = pd.concat(all_data, ignore_index=True)[OUTPUT_COLUMNS]
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_file = os.path.join(output_dir, f"{symbol}_options_data_{timestamp}.json")
+    final_df.to_json(output_file, orient="records", lines=True)
+    print(f"\nData saved to {output_file}")
+    print(f"Total records: {len(final_df)}")
+    print(f"Date range: {final_df['Date'].min()} to {final_df['Date'].max()}")
+    return output_file
+
+
+async def download_all(symbols, expiry_dates, client_kwargs=None, output_root="options_data",
+                       resumable=True, retry_empty=False, output_format="parquet",
+                       parquet_root=option_bar_store.DEFAULT_STORE_ROOT, use_metadata_cache=True,
+                       strike_selector=None):
+    """
+    Download all symbols concurrently over a single shared client.
+
+    With resumable, progress is tracked in output_root/manifest.sqlite and a
+    rerun after a crash or timeout only fetches what is still missing.
+    output_format "parquet" writes the typed, partitioned store under
+    parquet_root (read it back with option_bar_store.read_option_bars);
+    "json" writes the per-symbol JSON-lines file as before. dd values and
+    strike lists of past expiries are kept in output_root/metadata_cache.sqlite.
+    A StrikeSelector limits the download to strikes near ATM.
+    """
+    if output_format not in ("parquet", "json"):
+        raise ValueError(f"Unknown output_format {output_format}")
+    use_parquet = output_format == "parquet"
+    manifest = JobManifest(os.path.join(output_root, "manifest.sqlite")) if resumable else None
+    metadata_cache = MetadataCache(os.path.join(output_root, "metadata_cache.sqlite")) if use_metadata_cache else None
+    try:
+        async with AsyncIchartsClient(**(client_kwargs or {}), metadata_cache=metadata_cache) as client:
+            with tqdm(total=0, desc="Downloading option OHLC") as progress:
+                if manifest is None:
+                    results = await asyncio.gather(*[
+                        download_symbol(client, symbol, expiry_dates, progress=progress,
+                                        strike_selector=strike_selector)
+                        for symbol in symbols
+                    ])
+                else:
+                    results = await asyncio.gather(*[
+                        download_symbol_resumable(client, manifest, symbol, expiry_dates, progress=progress,
+                                                  output_root=output_root, retry_empty=retry_empty,
+                                                  parquet_root=parquet_root if use_parquet else None,
+                                                  strike_selector=strike_selector)
+                        for symbol in symbols
+                    ])
+        if strike_selector is not None:
+            print(strike_selector.report())
+        if manifest is not None:
+            print(f"Manifest status: {manifest.summary()}")
+            if use_parquet:
+                return dict(zip(symbols, results))
+            results = [load_contracts(paths) for paths in results]
+    finally:
+        if manifest is not None:
+            manifest.close()
+        if metadata_cache is not None:
+            metadata_cache.close()
+    if use_parquet:
+        return {
+            symbol: option_bar_store.write_option_bars(pd.concat(all_data, ignore_index=True), parquet_root)
+            if all_data else [] for symbol, all_data in zip(symbols, results)
+        }
+    return {symbol: save_symbol_data(symbol, all_data, output_root) for symbol, all_data in zip(symbols, results)}
+
+
+def main():
+    # Generated with OH-OL/expiry_calendar.py (python expiry_calendar.py 2024 expiry_dates.json)
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'expiry_dates.json'), 'r') as f:
+        expiry_dates = json.load(f)
+
+    client_kwargs = {
+        "max_concurrency": 20,
+        "rate": 10,
+        "burst": 20
+    }
+    # Spot file from OH-OL/icharts_2024_spotprice_top10.py to download only strikes near ATM;
+    # None downloads the full chain
+    spot_file = None
+    strike_selector = StrikeSelector.from_spot_file(spot_file, width=5) if spot_file else None
+
+    # Set retry_empty after renewing an expired session_id to re-request empty contracts
+    asyncio.run(download_all(nse_top_10, expiry_dates, client_kwargs, resumable=True, retry_empty=False,
+                             output_format="parquet", strike_selector=strike_selector))
+
+
+if __name__ == "__main__":
+    main()
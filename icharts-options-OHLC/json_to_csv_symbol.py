@@ -1,46 +1,158 @@
-import json
-import csv
+import glob
+import os
 import pandas as pd
-from datetime import datetime
-
-def convert_json_to_csv(input_file, output_file):
-    """
-    Convert a JSON file containing options data to CSV format
-    
-    Parameters:
-    input_file (str): Path to input JSON file
-    output_file (str): Path to output CSV file
-    """
-    
-    # Read JSON data
-    with open(input_file, 'r') as f:
-        # Read the file line by line as each line is a separate JSON object
-        json_data = [json.loads(line) for line in f]
-    
-    # Convert timestamp to readable date format
-    for row in json_data:
-        # Convert milliseconds timestamp to datetime
-        row['Date'] = datetime.fromtimestamp(row['Date']/1000).strftime('%Y-%m-%d')
-    
-    # Convert to DataFrame
-    df = pd.DataFrame(json_data)
-    
-    # Save to CSV
-    df.to_csv(output_file, index=False)
-    print(f"Successfully converted {input_file} to {output_file}")
+import pyarrow as pa
+import pyarrow.parquet as pq
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from tqdm import tqdm
+
+CHUNK_ROWS = 50_000
+
+# Parquet output keeps these columns as text and writes every other column as float64
+TEXT_COLUMNS = ['Date', 'Time', 'Symbol', 'Strike', 'Option_Type', 'Expiry_Date', 'Option_String']
+
+
+def convert_dates(dates):
+    """
+    Vectorised Date conversion to YYYY-MM-DD. pandas writes dates as epoch
+    milliseconds of UTC midnight, so they are read back as UTC dates (not
+    in the machine's local zone); ISO date strings are accepted as well.
+    Each row is converted on its own, so a null stays NaT without changing
+    how the other rows of the chunk are read.
+    """
+    millis = pd.to_numeric(dates, errors='coerce')
+    converted = pd.to_datetime(millis, unit='ms')
+    text = millis.isna() & dates.notna()
+    if text.any():
+        converted[text] = pd.to_datetime(dates[text].astype(str), errors='coerce')
+    return converted.dt.strftime('%Y-%m-%d')
+
+
+def convert_chunk(df, typed=False):
+    df['Date'] = convert_dates(df['Date'])
+    if not typed:
+        return df
+    # Fixed column types so every chunk matches the Parquet schema of the first
+    for col in df.columns:
+        if col in TEXT_COLUMNS:
+            df[col] = df[col].astype('string')
+        else:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
+    return df
+
+
+def convert_json_to_csv(input_file, output_file, chunk_rows=CHUNK_ROWS):
+    """
+    Convert a line-delimited JSON file of options data to CSV, or to Parquet
+    when output_file ends in .parquet.
+
+    The input is read chunk_rows lines at a time and each chunk is appended
+    to the output as soon as it is converted, so memory stays bounded by the
+    chunk size rather than the file size. Output goes to a temporary file
+    that replaces output_file at the end. Returns the number of rows written.
+    """
+    parquet = output_file.endswith('.parquet')
+    out_dir = os.path.dirname(output_file)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    tmp_file = os.path.join(out_dir, '.' + os.path.basename(output_file) + '.tmp')
+
+    rows = 0
+    writer = None
+    header = None
+    try:
+        reader = pd.read_json(input_file, orient='records', lines=True, chunksize=chunk_rows,
+                              dtype=False, convert_dates=False, keep_default_dates=False,
+                              precise_float=True)
+        with reader:
+            for chunk in reader:
+                # Later chunks may miss a column or list them in another
+                # order; keep them aligned with the columns of the first
+                if header is None:
+                    header = list(chunk.columns)
+                else:
+                    chunk = chunk.reindex(columns=header)
+                chunk = convert_chunk(chunk, typed=parquet)
+                if parquet:
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(tmp_file, table.schema, compression='zstd')
+                    writer.write_table(table.cast(writer.schema))
+                else:
+                    chunk.to_csv(tmp_file, mode='w' if rows == 0 else 'a', header=rows == 0, index=False)
+                rows += len(chunk)
+        if writer is not None:
+            writer.close()
+            writer = None
+        if rows == 0 and parquet:
+            pq.write_table(pa.table({}), tmp_file)
+        elif rows == 0:
+            open(tmp_file, 'w').close()
+        os.replace(tmp_file, output_file)
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+    print(f"Successfully converted {input_file} to {output_file} ({rows} rows)")
+    return rows
+
+
+def find_symbol_files(input_dir):
+    """
+    Per-symbol JSONL files written by process_symbol / save_symbol_data
+    (options_data/<SYMBOL>/<SYMBOL>_options_data_<timestamp>.json).
+    """
+    return sorted(glob.glob(os.path.join(input_dir, '**', '*_options_data_*.json'), recursive=True))
+
+
+def convert_files(input_files, output_dir, output_format='csv', workers=None, chunk_rows=CHUNK_ROWS):
+    """
+    Convert many symbol files in parallel, one file per worker process, so a
+    full year of several symbols scales with the number of cores. Each
+    worker streams its file in chunks, keeping total memory at roughly
+    workers x chunk size. Returns {input_file: rows}, with None for failures.
+    """
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = {}
+        for input_file in input_files:
+            name = os.path.splitext(os.path.basename(input_file))[0] + '.' + output_format
+            futures[executor.submit(convert_json_to_csv, input_file, os.path.join(output_dir, name), chunk_rows)] = input_file
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Converting symbol files"):
+            input_file = futures[future]
+            try:
+                results[input_file] = future.result()
+            except Exception as e:
+                print(f"Error converting {input_file}: {str(e)}")
+                results[input_file] = None
+    return results
+
 
 if __name__ == "__main__":
     import sys
-    
-    if len(sys.argv) != 3:
-        print("Usage: python script.py input.json output.csv")
+
+    if len(sys.argv) not in (3, 4):
+        print("Usage: python script.py input.json output.csv|output.parquet")
+        print("       python script.py input_dir output_dir [csv|parquet]")
         sys.exit(1)
-    
-    input_file = sys.argv[1]
-    output_file = sys.argv[2]
-    
+
+    input_path = sys.argv[1]
+    output_path = sys.argv[2]
+
     try:
-        convert_json_to_csv(input_file, output_file)
+        if os.path.isdir(input_path):
+            output_format = sys.argv[3] if len(sys.argv) == 4 else 'csv'
+            files = find_symbol_files(input_path)
+            print(f"Converting {len(files)} symbol files from {input_path} to {output_path}")
+            results = convert_files(files, output_path, output_format)
+            failed = [path for path, rows in results.items() if rows is None]
+            print(f"Converted {len(results) - len(failed)} files, {sum(r for r in results.values() if r)} rows")
+            if failed:
+                sys.exit(1)
+        else:
+            convert_json_to_csv(input_path, output_path)
     except Exception as e:
         print(f"Error: {str(e)}")
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
@@ -0,0 +1,142 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, date
+from option_bar_store import parse_expiry
+
+DEFAULT_METADATA_CACHE_PATH = "options_data/metadata_cache.sqlite"
+
+# Characters a dd token never contains but HTML and error pages do
+DD_REJECT_CHARS = set("<>{}\"'")
+
+
+def is_valid_dd(dd):
+    """
+    True if dd looks like an expiry trading date token: a single non-empty
+    word without markup, so login pages and error text are never cached.
+    """
+    if not isinstance(dd, str):
+        return False
+    dd = dd.strip()
+    return bool(dd) and len(dd.split()) == 1 and not DD_REJECT_CHARS & set(dd) and "error" not in dd.lower()
+
+
+class MetadataCache:
+    """
+    Cache of icharts expiry trading dates (dd) and strike lists.
+
+    Both are fixed once an expiry has passed, so entries for past expiries
+    are kept in SQLite and never fetched again; entries for live expiries
+    only last for the current process. The get_or_fetch_* methods make
+    concurrent threads asking for the same key wait for a single fetch.
+    """
+    def __init__(self, path=DEFAULT_METADATA_CACHE_PATH, today=None):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.today = today or date.today()
+        self.conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.key_locks = {}
+        self.memory = {}
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS dd (
+                    symbol TEXT NOT NULL,
+                    expiry TEXT NOT NULL,
+                    dd TEXT NOT NULL,
+                    fetched_at TEXT NOT NULL,
+                    PRIMARY KEY (symbol, expiry)
+                )
+            """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS strikes (
+                    symbol TEXT NOT NULL,
+                    expiry TEXT NOT NULL,
+                    option_type TEXT NOT NULL,
+                    strikes TEXT NOT NULL,
+                    fetched_at TEXT NOT NULL,
+                    PRIMARY KEY (symbol, expiry, option_type)
+                )
+            """)
+
+    def is_historical(self, expiry):
+        return parse_expiry(expiry) < self.today
+
+    def get_dd(self, symbol, expiry):
+        key = ("dd", symbol, expiry)
+        if key in self.memory:
+            return self.memory[key]
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT dd FROM dd WHERE symbol = ? AND expiry = ?", (symbol, expiry)
+            ).fetchone()
+        # Rows stored before dd values were validated may hold an error page
+        return row[0] if row and is_valid_dd(row[0]) else None
+
+    def put_dd(self, symbol, expiry, dd):
+        if not is_valid_dd(dd):
+            print(f"Not caching invalid dd for {symbol} {expiry}: {str(dd)[:80]!r}")
+            return
+        self.memory[("dd", symbol, expiry)] = dd
+        if self.is_historical(expiry):
+            with self.lock, self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO dd VALUES (?, ?, ?, ?)",
+                    (symbol, expiry, dd, datetime.now().isoformat())
+                )
+
+    def get_strikes(self, symbol, expiry, option_type):
+        key = ("strikes", symbol, expiry, option_type)
+        if key in self.memory:
+            return list(self.memory[key])
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT strikes FROM strikes WHERE symbol = ? AND expiry = ? AND option_type = ?",
+                (symbol, expiry, option_type)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_strikes(self, symbol, expiry, option_type, strikes):
+        # An empty list is as likely to be a failed request as a real answer
+        if not strikes:
+            return
+        self.memory[("strikes", symbol, expiry, option_type)] = list(strikes)
+        if self.is_historical(expiry):
+            with self.lock, self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO strikes VALUES (?, ?, ?, ?, ?)",
+                    (symbol, expiry, option_type, json.dumps(list(strikes)), datetime.now().isoformat())
+                )
+
+    def _key_lock(self, key):
+        with self.lock:
+            return self.key_locks.setdefault(key, threading.Lock())
+
+    def get_or_fetch_dd(self, symbol, expiry, fetch):
+        """
+        Cached dd, or fetch(symbol, expiry) called once however many threads ask.
+        """
+        dd = self.get_dd(symbol, expiry)
+        if dd is not None:
+            return dd
+        with self._key_lock(("dd", symbol, expiry)):
+            dd = self.get_dd(symbol, expiry)
+            if dd is None:
+                dd = fetch(symbol, expiry)
+                self.put_dd(symbol, expiry, dd)
+        return dd
+
+    def get_or_fetch_strikes(self, symbol, expiry, option_type, fetch):
+        strikes = self.get_strikes(symbol, expiry, option_type)
+        if strikes is not None:
+            return strikes
+        with self._key_lock(("strikes", symbol, expiry, option_type)):
+            strikes = self.get_strikes(symbol, expiry, option_type)
+            if strikes is None:
+                strikes = fetch(symbol, expiry, option_type)
+                self.put_strikes(symbol, expiry, option_type, strikes)
+        return strikes
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,118 @@
+import sqlite3
+import os
+from datetime import datetime
+
+# Task states. "empty" means icharts answered but the contract has no bars.
+PENDING = "pending"
+DONE = "done"
+EMPTY = "empty"
+FAILED = "failed"
+
+
+class JobManifest:
+    """
+    SQLite record of every (symbol, expiry, option type, strike) download task.
+
+    Strike lists are recorded per (symbol, expiry, option type) once fetched,
+    so a rerun neither re-discovers strikes nor re-downloads contracts that
+    are already on disk; it only picks up pending and failed tasks.
+    """
+    def __init__(self, path="options_data/manifest.sqlite"):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS strike_lists (
+                    symbol TEXT NOT NULL,
+                    expiry TEXT NOT NULL,
+                    option_type TEXT NOT NULL,
+                    strike_count INTEGER NOT NULL,
+                    fetched_at TEXT NOT NULL,
+                    PRIMARY KEY (symbol, expiry, option_type)
+                )
+            """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS tasks (
+                    symbol TEXT NOT NULL,
+                    expiry TEXT NOT NULL,
+                    option_type TEXT NOT NULL,
+                    strike TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    output_file TEXT,
+                    error TEXT,
+                    updated_at TEXT NOT NULL,
+                    PRIMARY KEY (symbol, expiry, option_type, strike)
+                )
+            """)
+
+    def has_strikes(self, symbol, expiry, option_type):
+        # An empty list (e.g. from a bad dd) is not trusted; the next run asks again
+        row = self.conn.execute(
+            "SELECT 1 FROM strike_lists WHERE symbol = ? AND expiry = ? AND option_type = ? AND strike_count > 0",
+            (symbol, expiry, option_type)
+        ).fetchone()
+        return row is not None
+
+    def add_strikes(self, symbol, expiry, option_type, strikes):
+        """
+        Register the tasks for one strike list; existing tasks keep their status.
+        """
+        now = datetime.now().isoformat()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO tasks (symbol, expiry, option_type, strike, status, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [(symbol, expiry, option_type, str(strike), PENDING, now) for strike in strikes]
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO strike_lists VALUES (?, ?, ?, ?, ?)",
+                (symbol, expiry, option_type, len(strikes), now)
+            )
+
+    def tasks_to_run(self, symbol, retry_empty=False):
+        """
+        (symbol, expiry, option_type, strike) tuples that still need downloading.
+        """
+        statuses = [PENDING, FAILED] + ([EMPTY] if retry_empty else [])
+        placeholders = ", ".join("?" * len(statuses))
+        rows = self.conn.execute(
+            f"SELECT symbol, expiry, option_type, strike FROM tasks WHERE symbol = ? AND status IN ({placeholders}) "
+            "ORDER BY expiry, option_type, strike",
+            (symbol, *statuses)
+        ).fetchall()
+        return [tuple(row) for row in rows]
+
+    def mark(self, task, status, output_file=None, error=None):
+        symbol, expiry, option_type, strike = task
+        with self.conn:
+            self.conn.execute(
+                """
+                UPDATE tasks SET status = ?, attempts = attempts + 1, output_file = ?, error = ?, updated_at = ?
+                WHERE symbol = ? AND expiry = ? AND option_type = ? AND strike = ?
+                """,
+                (status, output_file, error, datetime.now().isoformat(), symbol, expiry, option_type, str(strike))
+            )
+
+    def output_files(self, symbol):
+        rows = self.conn.execute(
+            "SELECT output_file FROM tasks WHERE symbol = ? AND status = ? ORDER BY expiry, option_type, strike",
+            (symbol, DONE)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def summary(self, symbol=None):
+        """
+        Task counts by status, optionally for one symbol.
+        """
+        query = "SELECT status, COUNT(*) FROM tasks"
+        params = ()
+        if symbol is not None:
+            query += " WHERE symbol = ?"
+            params = (symbol,)
+        return dict(self.conn.execute(query + " GROUP BY status", params).fetchall())
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+OHLC_COLUMNS = [
+    "DateTime", "Open", "High", "Low", "Close", "Volume",
+    "OI Change", "VWAP", "Day Low", "Day High"
+]
+DATETIME_FORMAT = "%d.%m.%y %H:%M:%S"
+
+READ_OPTIONS = pacsv.ReadOptions(column_names=OHLC_COLUMNS)
+CONVERT_OPTIONS = pacsv.ConvertOptions(
+    column_types={"DateTime": pa.timestamp("s"), **{col: pa.float64() for col in OHLC_COLUMNS[1:]}},
+    timestamp_parsers=[DATETIME_FORMAT],
+)
+
+
+def parse_ohlc_bytes(data):
+    """
+    Parse a getdataForOptions response body into typed NumPy arrays.
+
+    Returns ({column: array}, malformed_rows): DateTime is datetime64[s] and
+    the other columns float64 (NaN for blanks). Rows without exactly ten
+    fields, or with values that do not parse, are counted in malformed_rows
+    instead of disappearing silently.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+
+    malformed = 0
+
+    def skip_row(row):
+        nonlocal malformed
+        malformed += 1
+        return "skip"
+
+    try:
+        # py_buffer wraps the response bytes without copying them
+        table = pacsv.read_csv(
+            pa.py_buffer(data),
+            read_options=READ_OPTIONS,
+            parse_options=pacsv.ParseOptions(invalid_row_handler=skip_row),
+            convert_options=CONVERT_OPTIONS,
+        )
+    except pa.ArrowInvalid:
+        # A bad value somewhere in a well-formed row; redo it row by row
+        return _parse_ohlc_rows(data)
+
+    arrays = {
+        name: table.column(name).to_numpy()
+        for name in OHLC_COLUMNS
+    }
+    return arrays, malformed
+
+
+def _parse_ohlc_rows(data):
+    rows = [line.split(",") for line in data.decode("utf-8", errors="replace").splitlines() if line.strip()]
+    valid_rows = [row for row in rows if len(row) == len(OHLC_COLUMNS)]
+    malformed = len(rows) - len(valid_rows)
+    if not valid_rows:
+        return {name: np.array([], dtype="datetime64[s]" if name == "DateTime" else float)
+                for name in OHLC_COLUMNS}, malformed
+
+    columns = list(zip(*valid_rows))
+    datetimes = pd.to_datetime(pd.Series(columns[0]), format=DATETIME_FORMAT, errors="coerce")
+    values = [pd.to_numeric(pd.Series(column), errors="coerce").to_numpy(dtype=float) for column in columns[1:]]
+    # A row is malformed if its timestamp or any present value failed to parse
+    bad = datetimes.isna().to_numpy().copy()
+    for raw, parsed in zip(columns[1:], values):
+        bad |= np.isnan(parsed) & (np.char.str_len(np.char.strip(np.array(raw, dtype=str))) > 0)
+    malformed += int(bad.sum())
+
+    keep = ~bad
+    arrays = {"DateTime": datetimes.to_numpy(dtype="datetime64[s]")[keep]}
+    for name, parsed in zip(OHLC_COLUMNS[1:], values):
+        arrays[name] = parsed[keep]
+    return arrays, malformed
+
+
+def ohlc_frame(data):
+    """
+    parse_ohlc_bytes as a DataFrame with the OHLC columns, plus the malformed row count.
+    """
+    arrays, malformed = parse_ohlc_bytes(data)
+    df = pd.DataFrame(arrays, columns=OHLC_COLUMNS)
+    df["DateTime"] = df["DateTime"].astype("datetime64[ns]")
+    return df, malformed
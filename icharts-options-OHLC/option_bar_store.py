@@ -0,0 +1,146 @@
+import os
+from datetime import datetime, date
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+DEFAULT_STORE_ROOT = "options_parquet"
+
+# Partition keys live in the directory names: Symbol=X/Expiry_Date=YYYY-MM-DD/Option_Type=C
+PARTITION_SCHEMA = pa.schema([
+    ("Symbol", pa.string()),
+    ("Expiry_Date", pa.date32()),
+    ("Option_Type", pa.string()),
+])
+FILE_SCHEMA = pa.schema([
+    ("DateTime", pa.timestamp("s")),
+    ("Date", pa.date32()),
+    ("Time", pa.time32("s")),
+    ("Strike", pa.float64()),
+    ("Open", pa.float64()),
+    ("High", pa.float64()),
+    ("Low", pa.float64()),
+    ("Close", pa.float64()),
+    ("Volume", pa.int64()),
+    ("OI Change", pa.float64()),
+    ("VWAP", pa.float64()),
+    ("Day Low", pa.float64()),
+    ("Day High", pa.float64()),
+    ("Option_String", pa.string()),
+])
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "OI Change", "VWAP", "Day Low", "Day High"]
+
+
+def parse_expiry(expiry):
+    """
+    icharts expiry strings ("25JAN24"), ISO strings and dates all map to a date.
+    """
+    if isinstance(expiry, datetime):
+        return expiry.date()
+    if isinstance(expiry, date):
+        return expiry
+    try:
+        return datetime.strptime(expiry, "%d%b%y").date()
+    except ValueError:
+        return datetime.strptime(expiry, "%Y-%m-%d").date()
+
+
+def contract_path(root, symbol, expiry, opt_type, strike):
+    return os.path.join(
+        root,
+        f"Symbol={symbol}",
+        f"Expiry_Date={parse_expiry(expiry).isoformat()}",
+        f"Option_Type={opt_type}",
+        f"{strike}.parquet"
+    )
+
+
+def to_table(df):
+    """
+    Typed Arrow table for the bars of one contract, sorted by time, without
+    the partition columns.
+    """
+    datetimes = pd.to_datetime(df["DateTime"]) if "DateTime" in df else pd.to_datetime(
+        df["Date"].astype(str) + " " + df["Time"].astype(str)
+    )
+    out = pd.DataFrame({
+        "DateTime": datetimes.dt.floor("s"),
+        "Date": datetimes.dt.date,
+        "Time": datetimes.dt.time,
+        "Strike": pd.to_numeric(df["Strike"], errors="coerce"),
+    })
+    for col in PRICE_COLUMNS[:4]:
+        out[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    out["Volume"] = pd.to_numeric(df["Volume"], errors="coerce").round().astype("Int64")
+    for col in PRICE_COLUMNS[4:]:
+        out[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    out["Option_String"] = df["Option_String"].astype(str)
+    out = out.sort_values("DateTime", kind="stable")
+    return pa.Table.from_pandas(out, schema=FILE_SCHEMA, preserve_index=False)
+
+
+def write_contract(df, root, symbol, expiry, opt_type, strike, compression="zstd"):
+    """
+    Write one contract's bars to its own file and return the path. The file
+    is renamed into place, so readers never see a partial write and a rerun
+    simply replaces it.
+    """
+    path = contract_path(root, symbol, expiry, opt_type, strike)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Hidden temp name, so dataset discovery skips it while it is being written
+    tmp_path = os.path.join(os.path.dirname(path), "." + os.path.basename(path) + ".tmp")
+    pq.write_table(to_table(df), tmp_path, compression=compression)
+    os.replace(tmp_path, path)
+    return path
+
+
+def write_option_bars(df, root=DEFAULT_STORE_ROOT, compression="zstd"):
+    """
+    Write a frame holding many contracts (e.g. a whole process_symbol result),
+    one file per contract. Returns the written paths.
+    """
+    paths = []
+    for (symbol, expiry, opt_type, strike), contract in df.groupby(
+            ["Symbol", "Expiry_Date", "Option_Type", "Strike"], sort=False):
+        paths.append(write_contract(contract, root, symbol, expiry, opt_type, strike, compression))
+    return paths
+
+
+def option_dataset(root=DEFAULT_STORE_ROOT):
+    return ds.dataset(
+        root,
+        format="parquet",
+        partitioning=ds.partitioning(PARTITION_SCHEMA, flavor="hive"),
+        exclude_invalid_files=False,
+        ignore_prefixes=[".", "_"],
+    )
+
+
+def read_option_bars(root=DEFAULT_STORE_ROOT, symbol=None, expiry=None, option_type=None,
+                     strikes=None, start=None, end=None, columns=None):
+    """
+    Load bars as a DataFrame. Symbol, expiry and option type prune whole
+    directories; strikes and the start/end dates (inclusive) are pushed down
+    to the Parquet row-group statistics.
+    """
+    dataset = option_dataset(root)
+    filters = []
+    if symbol is not None:
+        filters.append(ds.field("Symbol") == symbol)
+    if expiry is not None:
+        filters.append(ds.field("Expiry_Date") == pa.scalar(parse_expiry(expiry), pa.date32()))
+    if option_type is not None:
+        filters.append(ds.field("Option_Type") == option_type)
+    if strikes is not None:
+        filters.append(ds.field("Strike").isin([float(strike) for strike in strikes]))
+    if start is not None:
+        filters.append(ds.field("Date") >= pa.scalar(pd.Timestamp(start).date(), pa.date32()))
+    if end is not None:
+        filters.append(ds.field("Date") <= pa.scalar(pd.Timestamp(end).date(), pa.date32()))
+
+    expression = None
+    for condition in filters:
+        expression = condition if expression is None else expression & condition
+    table = dataset.to_table(columns=columns, filter=expression)
+    return table.to_pandas()
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+from option_bar_store import parse_expiry
+
+
+def load_spot_prices(path):
+    """
+    Spot prices written by OH-OL/icharts_2024_spotprice_top10.py (JSON lines
+    with Symbol, Spot price, Date, ..., Expiry Date columns) as a frame of
+    Symbol, Date, Expiry, Spot.
+    """
+    raw = pd.read_json(path, orient="records", lines=True, convert_dates=False)
+    spots = pd.DataFrame({
+        "Symbol": raw["Symbol"].astype(str),
+        "Date": pd.to_datetime(raw["Date"], errors="coerce").dt.normalize(),
+        "Expiry": pd.to_datetime(raw["Expiry Date"], errors="coerce").dt.date,
+        "Spot": pd.to_numeric(raw["Spot price"], errors="coerce"),
+    })
+    return spots.dropna(subset=["Spot", "Expiry"]).reset_index(drop=True)
+
+
+def atm_window(strikes, spots, width):
+    """
+    Boolean mask over strikes keeping, for every spot price, the strike
+    nearest to it plus `width` strikes on each side.
+    """
+    values = pd.to_numeric(pd.Series(strikes, dtype=object).astype(str), errors="coerce").to_numpy(dtype=float)
+    order = np.argsort(values, kind="stable")
+    valid = order[~np.isnan(values[order])]
+    sorted_values = values[valid]
+    keep = np.zeros(len(values), dtype=bool)
+    spots = np.asarray(spots, dtype=float)
+    spots = spots[~np.isnan(spots)]
+    if len(sorted_values) == 0 or len(spots) == 0:
+        return keep
+
+    # Nearest strike for every spot, then mark the window around it
+    right = np.clip(np.searchsorted(sorted_values, spots), 1, len(sorted_values) - 1) if len(sorted_values) > 1 \
+        else np.zeros(len(spots), dtype=int)
+    left = np.maximum(right - 1, 0)
+    atm = np.where(np.abs(spots - sorted_values[left]) <= np.abs(sorted_values[right] - spots), left, right)
+    marks = np.zeros(len(sorted_values) + 1, dtype=int)
+    np.add.at(marks, np.maximum(atm - width, 0), 1)
+    np.add.at(marks, np.minimum(atm + width + 1, len(sorted_values)), -1)
+    keep[valid] = np.cumsum(marks[:-1]) > 0
+    return keep
+
+
+class StrikeSelector:
+    """
+    Keeps only the strikes within `width` strikes of ATM on any day the
+    expiry is the front month, using the icharts spot series. Expiries with
+    no spot data keep their full chain. Counts the OHLC requests avoided.
+    """
+    def __init__(self, spots, width=5):
+        self.width = width
+        self.spots = {
+            key: group["Spot"].to_numpy()
+            for key, group in spots.groupby(["Symbol", "Expiry"])
+        }
+        self.total = 0
+        self.kept = 0
+        self.unfiltered = set()
+
+    @classmethod
+    def from_spot_file(cls, path, width=5):
+        return cls(load_spot_prices(path), width)
+
+    def select(self, symbol, expiry, strikes):
+        strikes = list(strikes)
+        self.total += len(strikes)
+        spots = self.spots.get((symbol, parse_expiry(expiry)))
+        if spots is None:
+            self.unfiltered.add((symbol, expiry))
+            self.kept += len(strikes)
+            return strikes
+        mask = atm_window(strikes, spots, self.width)
+        selected = [strike for strike, keep in zip(strikes, mask) if keep]
+        self.kept += len(selected)
+        return selected
+
+    @property
+    def avoided(self):
+        return self.total - self.kept
+
+    def report(self):
+        share = self.avoided / self.total * 100 if self.total else 0.0
+        message = (f"Strike selection (ATM +/- {self.width}): kept {self.kept} of {self.total} contracts, "
+                   f"avoided {self.avoided} requests ({share:.1f}%)")
+        if self.unfiltered:
+            message += f"; {len(self.unfiltered)} symbol/expiry pairs had no spot data and were kept in full"
+        return message
@@ -0,0 +1,195 @@
+import asyncio
+import time
+from aiohttp import web
+from async_ohlc_downloader import (AsyncIchartsClient, DD_PATH, STRIKES_PATH, OHLC_PATH, TokenBucket,
+                                   download_symbol_resumable)
+from ohlc_job_manifest import JobManifest, DONE, FAILED
+
+OHLC_BODY = (
+    "02.01.24 09:15:00,100,101,99,100.5,10,1,100.2,98,110\n"
+    "02.01.24 09:16:00,100.5,102,100,101.5,20,2,100.9,98,110\n"
+    "garbage,row\n"
+)
+
+
+class StubIcharts:
+    """
+    Local icharts stand-in. Each path plays back a script of responses:
+    (status, body, headers) tuples, the last one repeating.
+    """
+    def __init__(self, scripts):
+        self.scripts = scripts
+        self.calls = {path: [] for path in scripts}
+
+    async def handle(self, request):
+        await request.post()
+        path = request.path
+        self.calls[path].append(time.monotonic())
+        script = self.scripts[path]
+        status, body, headers = script[min(len(self.calls[path]), len(script)) - 1]
+        return web.Response(status=status, text=body, headers=headers)
+
+    async def start(self):
+        app = web.Application()
+        for path in self.scripts:
+            app.router.add_post(path, self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+def run_with_stub(scripts, scenario, **client_kwargs):
+    async def main():
+        stub = StubIcharts(scripts)
+        url = await stub.start()
+        try:
+            async with AsyncIchartsClient(base_url=url, **client_kwargs) as client:
+                return stub, await scenario(client)
+        finally:
+            await stub.stop()
+    return asyncio.run(main())
+
+
+def test_token_bucket_caps_request_rate():
+    rate = 40
+
+    async def scenario(client):
+        started = time.monotonic()
+        await asyncio.gather(*(client.post(DD_PATH, {"ed": "25JAN24", "sym": str(i)}) for i in range(41)))
+        return time.monotonic() - started
+
+    stub, elapsed = run_with_stub({DD_PATH: [(200, "2024-01-25", {})]}, scenario,
+                                  max_concurrency=50, rate=rate, burst=1)
+    calls = stub.calls[DD_PATH]
+    assert len(calls) == 41
+    # 40 tokens at 40/s after the first request: about one second, never a burst
+    assert elapsed >= 0.9
+    assert elapsed < 2.0
+    assert (calls[-1] - calls[0]) >= 40 / rate * 0.9
+
+
+def test_token_bucket_allows_initial_burst():
+    async def scenario():
+        bucket = TokenBucket(rate=1, capacity=5)
+        started = time.monotonic()
+        for _ in range(5):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    assert asyncio.run(scenario()) < 0.1
+
+
+def test_429_honours_retry_after_then_succeeds():
+    script = [(429, "", {"Retry-After": "0.3"}), (429, "", {"Retry-After": "0.3"}), (200, "2024-01-25", {})]
+
+    async def scenario(client):
+        started = time.monotonic()
+        body = await client.post(DD_PATH, {"ed": "25JAN24", "sym": "RELIANCE"})
+        return body, time.monotonic() - started
+
+    # A backoff_base this large would take far longer than Retry-After if it were used
+    stub, (body, elapsed) = run_with_stub({DD_PATH: script}, scenario, backoff_base=30, backoff_cap=30)
+    assert body == "2024-01-25"
+    assert len(stub.calls[DD_PATH]) == 3
+    calls = stub.calls[DD_PATH]
+    assert calls[1] - calls[0] >= 0.28
+    assert calls[2] - calls[1] >= 0.28
+    assert elapsed < 2.0
+
+
+def test_5xx_retries_with_backoff_then_gives_up():
+    async def scenario(client):
+        return await client.post(DD_PATH, {"ed": "25JAN24", "sym": "RELIANCE"})
+
+    stub, body = run_with_stub({DD_PATH: [(503, "unavailable", {})]}, scenario,
+                               max_retries=4, backoff_base=0.01, backoff_cap=0.05)
+    assert body is None
+    assert len(stub.calls[DD_PATH]) == 4
+
+
+def test_5xx_then_success_returns_body():
+    script = [(500, "", {}), (502, "", {}), (200, "2024-01-25", {})]
+
+    async def scenario(client):
+        return await client.post(DD_PATH, {"ed": "25JAN24", "sym": "RELIANCE"})
+
+    stub, body = run_with_stub({DD_PATH: script}, scenario, backoff_base=0.01, backoff_cap=0.05)
+    assert body == "2024-01-25"
+    assert len(stub.calls[DD_PATH]) == 3
+
+
+def test_contract_rows_are_parsed_correctly():
+    scripts = {
+        DD_PATH: [(200, "2024-01-25", {})],
+        STRIKES_PATH: [(200, '[{"id": "2500"}, {"id": "2520"}]', {})],
+        OHLC_PATH: [(429, "", {"Retry-After": "0"}), (200, OHLC_BODY, {})],
+    }
+
+    async def scenario(client):
+        strikes = await client.get_strikes("RELIANCE", "25JAN24", "C")
+        status, df = await client.fetch_contract("RELIANCE", "25JAN24", "C", strikes[0])
+        return strikes, status, df
+
+    stub, (strikes, status, df) = run_with_stub(scripts, scenario, backoff_base=0.01)
+    assert strikes == ["2500", "2520"]
+    assert len(stub.calls[DD_PATH]) == 1
+    assert len(stub.calls[OHLC_PATH]) == 2
+    assert status == DONE
+    assert len(df) == 2
+    first = df.iloc[0]
+    assert str(first["Date"]) == "2024-01-02"
+    assert str(first["Time"]) == "09:15:00"
+    assert first["Option_String"] == "RELIANCE-2500C-25JAN24"
+    assert (first["Strike"], first["Option_Type"], first["Expiry_Date"]) == ("2500", "C", "25JAN24")
+    assert df["Open"].tolist() == [100.0, 100.5]
+    assert df["Close"].tolist() == [100.5, 101.5]
+    assert df["Volume"].tolist() == [10.0, 20.0]
+    assert df["Day High"].tolist() == [110.0, 110.0]
+
+
+def test_4xx_fails_without_retry_or_passing_body_on():
+    session_expired = (403, "<html>Session expired, please login</html>", {})
+    scripts = {
+        DD_PATH: [session_expired],
+        OHLC_PATH: [session_expired],
+    }
+
+    async def scenario(client):
+        dd = await client.get_dd("RELIANCE", "25JAN24")
+        status, df = await client.fetch_contract("RELIANCE", "25JAN24", "C", "2500")
+        return dd, status, df
+
+    stub, (dd, status, df) = run_with_stub(scripts, scenario, backoff_base=0.01)
+    assert dd is None
+    assert (status, df) == (FAILED, None)
+    assert len(stub.calls[DD_PATH]) == 1
+    assert len(stub.calls[OHLC_PATH]) == 1
+
+
+def test_empty_strike_list_is_looked_up_again(tmp_path):
+    scripts = {
+        DD_PATH: [(200, "2024-01-25", {})],
+        STRIKES_PATH: [(200, "[]", {}), (200, '[{"id": "2500"}]', {})],
+        OHLC_PATH: [(200, OHLC_BODY, {})],
+    }
+    manifest = JobManifest(str(tmp_path / "manifest.sqlite"))
+
+    async def scenario(client):
+        for _ in range(2):
+            await download_symbol_resumable(client, manifest, "RELIANCE", ["25JAN24"], option_types=["C"],
+                                            output_root=str(tmp_path))
+        return manifest.summary("RELIANCE")
+
+    try:
+        stub, summary = run_with_stub(scripts, scenario)
+    finally:
+        manifest.close()
+    assert len(stub.calls[STRIKES_PATH]) == 2
+    assert len(stub.calls[OHLC_PATH]) == 1
+    assert summary == {DONE: 1}
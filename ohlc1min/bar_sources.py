@@ -0,0 +1,302 @@
+import io
+from collections import namedtuple
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+
+IST = "Asia/Kolkata"
+
+# Every source is normalised to these columns; timestamp is tz-aware IST
+BAR_COLUMNS = ["timestamp", "symbol", "source", "open", "high", "low", "close", "volume", "oi"]
+
+# One unit of work for a source: bars of one symbol between two dates (inclusive)
+FetchRequest = namedtuple("FetchRequest", ["source", "symbol", "start", "end"])
+
+
+class SourceError(Exception):
+    """
+    A fetch failed; retryable marks errors worth another attempt (429, 5xx,
+    timeouts) and throttled the ones where the source asked us to slow down.
+    """
+    def __init__(self, message, retryable=False, retry_after=None, throttled=False):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+        self.throttled = throttled
+
+
+def month_ranges(start, end):
+    """
+    (first day, last day) of every calendar month overlapping start..end, clipped to it.
+    """
+    start = pd.Timestamp(start).normalize()
+    end = pd.Timestamp(end).normalize()
+    ranges = []
+    month_start = start.replace(day=1)
+    while month_start <= end:
+        month_end = month_start + pd.offsets.MonthEnd(0)
+        ranges.append((max(month_start, start).strftime("%Y-%m-%d"), min(month_end, end).strftime("%Y-%m-%d")))
+        month_start = month_end + timedelta(days=1)
+    return ranges
+
+
+def epoch_to_ist(seconds, naive=False):
+    """
+    Vectorised unix seconds to IST datetimes; naive=True drops the tz but
+    keeps IST wall-clock time, independent of the machine's local zone.
+    """
+    timestamps = pd.to_datetime(np.asarray(seconds, dtype="int64"), unit="s", utc=True).tz_convert(IST)
+    return timestamps.tz_localize(None) if naive else timestamps
+
+
+def moneycontrol_frame(result, naive=False):
+    """
+    moneycontrol techCharts history JSON (parallel t/o/h/l/c/v arrays) as a
+    date/open/high/low/close/volume frame, built straight from the arrays.
+    """
+    if not result or not result.get("t"):
+        return pd.DataFrame(columns=["date", "open", "high", "low", "close", "volume"])
+    return pd.DataFrame({
+        "date": epoch_to_ist(result["t"], naive),
+        "open": np.asarray(result["o"], dtype=float),
+        "high": np.asarray(result["h"], dtype=float),
+        "low": np.asarray(result["l"], dtype=float),
+        "close": np.asarray(result["c"], dtype=float),
+        "volume": np.asarray(result["v"], dtype=float),
+    })
+
+
+def to_bar_frame(timestamps, symbol, source, open_, high, low, close, volume, oi=None):
+    df = pd.DataFrame({
+        "timestamp": timestamps,
+        "symbol": symbol,
+        "source": source,
+        "open": pd.to_numeric(open_, errors="coerce"),
+        "high": pd.to_numeric(high, errors="coerce"),
+        "low": pd.to_numeric(low, errors="coerce"),
+        "close": pd.to_numeric(close, errors="coerce"),
+        "volume": pd.to_numeric(volume, errors="coerce").astype("float64"),
+        "oi": pd.to_numeric(oi, errors="coerce").astype("float64") if oi is not None else np.nan,
+    })
+    df = df.dropna(subset=["timestamp"])
+    return df.sort_values("timestamp", kind="stable").reset_index(drop=True)[BAR_COLUMNS]
+
+
+def check_response(response, source):
+    if response.status_code == 429 or response.status_code >= 500:
+        retry_after = response.headers.get("Retry-After")
+        raise SourceError(f"{source}: HTTP {response.status_code}", retryable=True,
+                          retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None,
+                          throttled=response.status_code == 429)
+    if response.status_code != 200:
+        raise SourceError(f"{source}: HTTP {response.status_code}: {response.text[:200]}")
+
+
+class SourceAdapter:
+    """
+    Interface every market-data source implements.
+
+    requests_for splits a date range into the chunks the source can serve,
+    fetch performs one chunk over the shared requests session and returns
+    the raw payload, and normalize turns that payload into BAR_COLUMNS.
+    max_concurrency and rate (requests per second) are applied per source
+    by the IngestionScheduler; a max_rate makes the rate adaptive, ramping
+    up towards it and backing off whenever the source answers 429.
+    """
+    name = None
+    max_concurrency = 1
+    rate = 1.0
+    max_rate = None
+
+    def symbols(self):
+        """
+        Symbols this source can serve; None means any symbol.
+        """
+        return None
+
+    def requests_for(self, symbol, start, end):
+        return [FetchRequest(self.name, symbol, chunk_start, chunk_end)
+                for chunk_start, chunk_end in month_ranges(start, end)]
+
+    def fetch(self, session, request):
+        raise NotImplementedError
+
+    def normalize(self, payload, request):
+        raise NotImplementedError
+
+
+class UpstoxAdapter(SourceAdapter):
+    """
+    Upstox v2 historical candles, one calendar month per request.
+    """
+    name = "upstox"
+    max_concurrency = 10
+    rate = 5.0
+    max_rate = 25.0
+    base_url = "https://api.upstox.com/v2/historical-candle"
+
+    def __init__(self, instrument_keys, access_token=None):
+        # symbol -> instrument key, e.g. RELIANCE -> NSE_EQ|INE002A01018
+        self.instrument_keys = dict(instrument_keys)
+        self.headers = {"Accept": "application/json"}
+        if access_token:
+            self.headers["Authorization"] = f"Bearer {access_token}"
+
+    @classmethod
+    def from_symbol_file(cls, path="symboltocode.csv", access_token=None):
+        mapping = pd.read_csv(path, header=None, names=["symbol", "instrument_key"])
+        return cls(zip(mapping["symbol"].str.strip(), mapping["instrument_key"].str.strip()), access_token)
+
+    def symbols(self):
+        return list(self.instrument_keys)
+
+    def fetch(self, session, request):
+        key = self.instrument_keys[request.symbol]
+        url = f"{self.base_url}/{key}/1minute/{request.end}/{request.start}"
+        response = session.get(url, headers=self.headers, timeout=60)
+        check_response(response, self.name)
+        return response.json()["data"]["candles"]
+
+    def normalize(self, payload, request):
+        if not payload:
+            return to_bar_frame([], request.symbol, self.name, [], [], [], [], [])
+        candles = pd.DataFrame([row[:7] for row in payload])
+        if candles.shape[1] < 7:
+            candles[6] = np.nan
+        timestamps = pd.to_datetime(candles[0], utc=True).dt.tz_convert(IST)
+        return to_bar_frame(timestamps, request.symbol, self.name,
+                            candles[1], candles[2], candles[3], candles[4], candles[5], candles[6])
+
+
+class MoneycontrolAdapter(SourceAdapter):
+    """
+    moneycontrol techCharts history at 1-minute resolution, one month per request.
+    """
+    name = "moneycontrol"
+    max_concurrency = 2
+    rate = 1.0
+    base_url = "https://priceapi.moneycontrol.com/techCharts/indianMarket/stock/history"
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3"
+    }
+
+    def fetch(self, session, request):
+        start = pd.Timestamp(request.start).tz_localize(IST)
+        end = pd.Timestamp(request.end).tz_localize(IST) + timedelta(days=1)
+        params = {
+            "symbol": request.symbol,
+            "resolution": 1,
+            "from": int(start.timestamp()),
+            "to": int(end.timestamp()),
+            # One month of 1-minute bars is well under this
+            "countback": 15000,
+            "currencyCode": "INR",
+        }
+        response = session.get(self.base_url, params=params, headers=self.headers, timeout=60)
+        check_response(response, self.name)
+        return response.json()
+
+    def normalize(self, payload, request):
+        if not payload or payload.get("s") == "no_data" or not payload.get("t"):
+            return to_bar_frame([], request.symbol, self.name, [], [], [], [], [])
+        bars = moneycontrol_frame(payload)
+        return to_bar_frame(bars["date"], request.symbol, self.name,
+                            bars["open"], bars["high"], bars["low"], bars["close"], bars["volume"])
+
+
+class KaggleAdapter(SourceAdapter):
+    """
+    1-minute history published as Kaggle datasets. Each symbol maps to a
+    (dataset handle, file path) pair; the whole file is loaded once and
+    trimmed to the requested range.
+    """
+    name = "kaggle"
+    max_concurrency = 1
+    rate = 0.5
+
+    def __init__(self, datasets):
+        self.datasets = dict(datasets)
+
+    def symbols(self):
+        return list(self.datasets)
+
+    def requests_for(self, symbol, start, end):
+        start = pd.Timestamp(start).strftime("%Y-%m-%d")
+        end = pd.Timestamp(end).strftime("%Y-%m-%d")
+        return [FetchRequest(self.name, symbol, start, end)]
+
+    def fetch(self, session, request):
+        try:
+            import kagglehub
+            from kagglehub import KaggleDatasetAdapter
+        except ImportError:
+            raise SourceError("kaggle: install kagglehub[pandas-datasets] to use this source")
+        handle, file_path = self.datasets[request.symbol]
+        return kagglehub.load_dataset(KaggleDatasetAdapter.PANDAS, handle, file_path)
+
+    def normalize(self, payload, request):
+        df = payload.rename(columns=str.lower)
+        time_column = next(col for col in ("timestamp", "datetime", "date") if col in df.columns)
+        timestamps = pd.to_datetime(df[time_column], errors="coerce")
+        if timestamps.dt.tz is None:
+            timestamps = timestamps.dt.tz_localize(IST)
+        else:
+            timestamps = timestamps.dt.tz_convert(IST)
+        bars = to_bar_frame(timestamps, request.symbol, self.name,
+                            df["open"], df["high"], df["low"], df["close"],
+                            df["volume"] if "volume" in df.columns else np.nan)
+        day = bars["timestamp"].dt.tz_localize(None).dt.normalize()
+        return bars[(day >= pd.Timestamp(request.start)) & (day <= pd.Timestamp(request.end))].reset_index(drop=True)
+
+
+class IchartsOptionAdapter(SourceAdapter):
+    """
+    icharts intraday 1-minute bars for option contracts; symbols are
+    contract strings such as RELIANCE-2500C-25JAN24. The endpoint serves a
+    contract's whole history, so there is one request per contract.
+    """
+    name = "icharts"
+    max_concurrency = 10
+    rate = 10.0
+    url = "https://www.icharts.in/opt/hcharts/stx8req/php/getdataForOptions_curr_atp_tj.php"
+    columns = ["DateTime", "Open", "High", "Low", "Close", "Volume",
+               "OI Change", "VWAP", "Day Low", "Day High"]
+
+    def __init__(self, user_name, session_id):
+        self.user_name = user_name
+        self.session_id = session_id
+        self.headers = {
+            "accept": "application/json, text/javascript, */*; q=0.01",
+            "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
+            "cookie": f"PHPSESSID={session_id}",
+            "origin": "https://www.icharts.in",
+            "referer": "https://www.icharts.in/opt/OptionsChart.php",
+            "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36",
+            "x-requested-with": "XMLHttpRequest"
+        }
+
+    def requests_for(self, symbol, start, end):
+        return [FetchRequest(self.name, symbol, pd.Timestamp(start).strftime("%Y-%m-%d"),
+                             pd.Timestamp(end).strftime("%Y-%m-%d"))]
+
+    def fetch(self, session, request):
+        payload = {
+            "mode": "INTRA",
+            "symbol": request.symbol,
+            "timeframe": "1min",
+            "u": self.user_name,
+            "sid": self.session_id
+        }
+        response = session.post(self.url, params=payload, data=payload, headers=self.headers, timeout=60)
+        check_response(response, self.name)
+        return response.content
+
+    def normalize(self, payload, request):
+        if not payload.strip() or b"error" in payload.lower():
+            return to_bar_frame([], request.symbol, self.name, [], [], [], [], [])
+        df = pd.read_csv(io.BytesIO(payload), header=None, names=self.columns, on_bad_lines="skip")
+        timestamps = pd.to_datetime(df["DateTime"], format="%d.%m.%y %H:%M:%S", errors="coerce").dt.tz_localize(IST)
+        bars = to_bar_frame(timestamps, request.symbol, self.name,
+                            df["Open"], df["High"], df["Low"], df["Close"], df["Volume"])
+        day = bars["timestamp"].dt.tz_localize(None).dt.normalize()
+        return bars[(day >= pd.Timestamp(request.start)) & (day <= pd.Timestamp(request.end))].reset_index(drop=True)
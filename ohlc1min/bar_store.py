@@ -0,0 +1,179 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from bar_sources import BAR_COLUMNS, IST, to_bar_frame
+
+DEFAULT_BAR_STORE_ROOT = "market_data"
+
+# When a day exists from several sources, read_bars takes the first listed here
+SOURCE_PRIORITY = ["upstox", "moneycontrol", "kaggle", "icharts"]
+
+BAR_SCHEMA = pa.schema([
+    ("timestamp", pa.timestamp("s", tz=IST)),
+    ("symbol", pa.string()),
+    ("source", pa.string()),
+    ("open", pa.float64()),
+    ("high", pa.float64()),
+    ("low", pa.float64()),
+    ("close", pa.float64()),
+    ("volume", pa.float64()),
+    ("oi", pa.float64()),
+])
+
+
+class BarStore:
+    """
+    1-minute bars keyed by symbol with one Parquet file per trading day:
+    root/<symbol>/<source>/<YYYY>/<YYYY-MM-DD>.parquet.
+
+    read_bars builds the paths of the requested days directly, so a query
+    only opens the files of those days (read in parallel) and only the
+    requested columns. Fetched request chunks are recorded under
+    root/_requests so ingestion reruns can skip them, including chunks that
+    returned no bars.
+    """
+    def __init__(self, root=DEFAULT_BAR_STORE_ROOT):
+        self.root = root
+
+    def day_path(self, symbol, source, day):
+        day = pd.Timestamp(day)
+        return os.path.join(self.root, symbol, source, f"{day.year}", f"{day.strftime('%Y-%m-%d')}.parquet")
+
+    def write_bars(self, bars):
+        """
+        Write normalised bars (BAR_COLUMNS), replacing the files of every
+        (symbol, source, day) present in the frame. Returns the number of
+        day files written.
+        """
+        if bars.empty:
+            return 0
+        bars = bars[BAR_COLUMNS]
+        days = bars["timestamp"].dt.tz_convert(IST).dt.strftime("%Y-%m-%d")
+        written = 0
+        for (symbol, source, day), group in bars.groupby([bars["symbol"], bars["source"], days], sort=False):
+            path = self.day_path(symbol, source, day)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = os.path.join(os.path.dirname(path), "." + os.path.basename(path) + ".tmp")
+            table = pa.Table.from_pandas(group.sort_values("timestamp", kind="stable"),
+                                         schema=BAR_SCHEMA, preserve_index=False)
+            pq.write_table(table, tmp_path, compression="zstd")
+            os.replace(tmp_path, path)
+            written += 1
+        return written
+
+    def request_marker(self, request):
+        return os.path.join(self.root, "_requests", request.source, request.symbol,
+                            f"{request.start}_{request.end}.done")
+
+    def has(self, request):
+        return os.path.exists(self.request_marker(request))
+
+    def mark_fetched(self, request, rows):
+        path = self.request_marker(request)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(f"{rows}\n")
+
+    def symbols(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if not name.startswith(("_", ".")) and os.path.isdir(os.path.join(self.root, name)))
+
+    def sources(self, symbol):
+        path = os.path.join(self.root, symbol)
+        if not os.path.isdir(path):
+            return []
+        available = os.listdir(path)
+        ordered = [source for source in SOURCE_PRIORITY if source in available]
+        return ordered + sorted(source for source in available if source not in ordered)
+
+    def day_paths(self, symbol, start, end=None, source=None):
+        """
+        Existing day files of a symbol between two dates, one per day,
+        picking the source the same way read_bars does.
+        """
+        start = pd.Timestamp(start)
+        end = pd.Timestamp(end) if end is not None else start
+        sources = [source] if source is not None else self.sources(symbol)
+        paths = []
+        for day in pd.date_range(start.normalize(), end.normalize(), freq="D"):
+            for candidate in sources:
+                path = self.day_path(symbol, candidate, day)
+                if os.path.exists(path):
+                    paths.append(path)
+                    break
+        return paths
+
+    def read_bars(self, symbol, start, end=None, columns=None, source=None):
+        """
+        Bars of one symbol from start to end. Dates without a time cover the
+        whole day; end defaults to start. Without a source, each day comes
+        from the first source in SOURCE_PRIORITY that has it.
+        """
+        start = pd.Timestamp(start)
+        end = pd.Timestamp(end) if end is not None else start
+        whole_day_end = end == end.normalize()
+
+        read_columns = None
+        if columns is not None:
+            read_columns = list(dict.fromkeys(["timestamp", *columns]))
+
+        paths = self.day_paths(symbol, start, end, source)
+        if not paths:
+            return pd.DataFrame(columns=columns or BAR_COLUMNS)
+
+        df = ds.dataset(paths, schema=BAR_SCHEMA, format="parquet").to_table(columns=read_columns).to_pandas()
+        start_ts = start.tz_localize(IST) if start.tzinfo is None else start
+        end_ts = end.tz_localize(IST) if end.tzinfo is None else end
+        if whole_day_end:
+            df = df[df["timestamp"] >= start_ts]
+        else:
+            df = df[(df["timestamp"] >= start_ts) & (df["timestamp"] <= end_ts)]
+        if columns is not None:
+            df = df[columns]
+        return df.reset_index(drop=True)
+
+
+def import_csv(store, path, symbol, source, timestamp_column="timestamp"):
+    """
+    Load an existing 1-minute CSV (e.g. stock_data_2024.csv from
+    upstox_top10_2024.py or a moneycontrol export) into the store. Naive
+    timestamps are taken as IST. Returns the number of day files written.
+    """
+    df = pd.read_csv(path)
+    if symbol is None:
+        return sum(import_frame(store, group, name, source, timestamp_column)
+                   for name, group in df.groupby("symbol"))
+    return import_frame(store, df, symbol, source, timestamp_column)
+
+
+def import_frame(store, df, symbol, source, timestamp_column="timestamp"):
+    df = df.reset_index(drop=True)
+    if timestamp_column not in df.columns and "date" in df.columns:
+        timestamp_column = "date"
+    timestamps = pd.to_datetime(df[timestamp_column])
+    if timestamps.dt.tz is None:
+        timestamps = timestamps.dt.tz_localize(IST)
+    else:
+        timestamps = timestamps.dt.tz_convert(IST)
+    bars = to_bar_frame(timestamps, symbol, source, df["open"], df["high"], df["low"], df["close"],
+                        df["volume"] if "volume" in df.columns else np.nan,
+                        df["oi"] if "oi" in df.columns else None)
+    return store.write_bars(bars)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (3, 4):
+        print("Usage: python bar_store.py input.csv SOURCE [SYMBOL]")
+        print("Without SYMBOL the CSV's symbol column is used")
+        sys.exit(1)
+
+    input_file, source = sys.argv[1:3]
+    symbol = sys.argv[3] if len(sys.argv) == 4 else None
+    written = import_csv(BarStore(DEFAULT_BAR_STORE_ROOT), input_file, symbol, source)
+    print(f"Imported {input_file} into {DEFAULT_BAR_STORE_ROOT}: {written} day files")
@@ -0,0 +1,199 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from tqdm import tqdm
+
+from bar_sources import SourceError, UpstoxAdapter, MoneycontrolAdapter, KaggleAdapter
+from bar_store import BarStore, DEFAULT_BAR_STORE_ROOT
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket: `rate` request starts per second with bursts
+    of up to `capacity`.
+    """
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self):
+        pass
+
+    def on_throttle(self):
+        pass
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """
+    RateLimiter whose rate follows additive-increase/multiplicative-decrease:
+    every success adds increase/rate, so the rate climbs by about `increase`
+    requests per second each second, and a 429 halves it (at most once per
+    `cooldown` seconds, so a burst of concurrent 429s counts once) and
+    empties the bucket.
+    """
+    def __init__(self, rate, min_rate=0.5, max_rate=50.0, increase=0.5, cooldown=1.0, capacity=None):
+        super().__init__(rate, capacity)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.cooldown = cooldown
+        self.last_throttle = 0.0
+        self.throttles = 0
+
+    def on_success(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def on_throttle(self):
+        with self.lock:
+            now = time.monotonic()
+            self.throttles += 1
+            if now - self.last_throttle < self.cooldown:
+                return
+            self.last_throttle = now
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0
+
+
+class IngestionScheduler:
+    """
+    Runs fetch requests for several sources in one thread pool.
+
+    Each source gets its own concurrency cap (a semaphore) and request rate
+    (a RateLimiter) from its adapter, so a slow or strict source does not
+    hold back the others. All sources share one pooled requests session.
+    Retryable errors (429, 5xx, timeouts) are retried with full-jitter
+    exponential backoff, honouring Retry-After when the server sends it.
+    """
+    def __init__(self, adapters, store, max_workers=16, max_retries=5, backoff_base=1.0, backoff_cap=60):
+        self.adapters = {adapter.name: adapter for adapter in adapters}
+        self.store = store
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.semaphores = {name: threading.BoundedSemaphore(adapter.max_concurrency)
+                           for name, adapter in self.adapters.items()}
+        self.limiters = {
+            name: AdaptiveRateLimiter(adapter.rate, max_rate=adapter.max_rate) if adapter.max_rate
+            else RateLimiter(adapter.rate)
+            for name, adapter in self.adapters.items()
+        }
+        self.session = requests.Session()
+        pool = HTTPAdapter(pool_connections=len(self.adapters) + 1, pool_maxsize=max_workers)
+        self.session.mount("https://", pool)
+        self.session.mount("http://", pool)
+
+    def plan(self, symbols, start, end, skip_existing=True):
+        """
+        Requests for every source and symbol it serves, leaving out chunks
+        already in the store when skip_existing is set.
+        """
+        planned = []
+        for adapter in self.adapters.values():
+            served = adapter.symbols()
+            for symbol in symbols:
+                if served is not None and symbol not in served:
+                    continue
+                planned.extend(adapter.requests_for(symbol, start, end))
+        if skip_existing:
+            planned = [request for request in planned if not self.store.has(request)]
+        return planned
+
+    def fetch_one(self, request):
+        adapter = self.adapters[request.source]
+        limiter = self.limiters[request.source]
+        for attempt in range(self.max_retries):
+            limiter.acquire()
+            try:
+                with self.semaphores[request.source]:
+                    payload = adapter.fetch(self.session, request)
+                limiter.on_success()
+                return adapter.normalize(payload, request)
+            except SourceError as e:
+                if e.throttled:
+                    limiter.on_throttle()
+                if not e.retryable or attempt == self.max_retries - 1:
+                    raise
+                wait = e.retry_after or random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_retries - 1:
+                    raise SourceError(f"{request.source}: {str(e)}", retryable=True)
+                wait = random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+            print(f"Retrying {request} in {wait:.1f}s")
+            time.sleep(wait)
+
+    def run_request(self, request):
+        started = time.time()
+        try:
+            bars = self.fetch_one(request)
+            days = self.store.write_bars(bars)
+            self.store.mark_fetched(request, len(bars))
+            return {**request._asdict(), "status": "ok" if days else "empty", "rows": len(bars),
+                    "days": days, "error": None, "seconds": time.time() - started}
+        except Exception as e:
+            return {**request._asdict(), "status": "failed", "rows": 0, "days": 0,
+                    "error": str(e), "seconds": time.time() - started}
+
+    def run(self, requests_to_run):
+        """
+        Execute the requests in parallel and return one report row per request.
+        """
+        results = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(self.run_request, request) for request in requests_to_run]
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Ingesting bars"):
+                results.append(future.result())
+        return pd.DataFrame(results, columns=["source", "symbol", "start", "end", "status", "rows",
+                                              "days", "error", "seconds"])
+
+
+def main():
+    start_date = "2024-01-01"
+    end_date = "2024-12-31"
+
+    upstox = UpstoxAdapter.from_symbol_file("symboltocode.csv", access_token=os.environ.get("UPSTOX_ACCESS_TOKEN"))
+    symbols = upstox.symbols()
+    adapters = [
+        upstox,
+        MoneycontrolAdapter(),
+        KaggleAdapter({
+            "RELIANCE": ("deltatrup/reliance-1-minute-historical-stock-data-2024-2024", "RELIANCE_1min_2024-2024.csv"),
+        }),
+        # Option contract strings such as RELIANCE-2500C-25JAN24 are served by
+        # IchartsOptionAdapter(user_name, session_id); add it with contract symbols to use it
+    ]
+
+    scheduler = IngestionScheduler(adapters, BarStore(DEFAULT_BAR_STORE_ROOT))
+    planned = scheduler.plan(symbols, start_date, end_date)
+    print(f"{len(planned)} requests to run across {len(adapters)} sources")
+
+    report = scheduler.run(planned)
+    print(report.groupby(["source", "status"]).size())
+    os.makedirs(DEFAULT_BAR_STORE_ROOT, exist_ok=True)
+    report.to_csv(os.path.join(DEFAULT_BAR_STORE_ROOT, "ingestion_report.csv"), index=False)
+
+
+if __name__ == "__main__":
+    main()
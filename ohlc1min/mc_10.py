@@ -1,10 +1,8 @@
 import requests
 import pandas as pd
 import json
-from datetime import datetime
-
-def unix_to_date(timestamp):
-    return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+from bar_sources import moneycontrol_frame
+from resampler import resample_bars
 
 symbols = ['RELIANCE', 'TCS', 'HDFCBANK', 'BHARTIARTL', 'ICICIBANK', 'INFY', 'SBIN', 'HINDUNILVR', 'ITC', 'LICHSGFIN']
 base_url = 'https://priceapi.moneycontrol.com/techCharts/indianMarket/stock/history'  # Replace with the actual URL
@@ -15,33 +13,21 @@ for symbol in symbols:
         response = requests.get(f"{base_url}?symbol={symbol}&resolution=1&countback=805500&currencyCode=INR")
         response.raise_for_status()
         result = response.json()
-        data = pd.DataFrame(result)
-        data['date'] = data['t'].apply(unix_to_date)
-        data = data[['date', 'o', 'h', 'l', 'c', 'v']].rename(columns={'o': 'open', 'h': 'high', 'l': 'low', 'c': 'close', 'v': 'volume'})
-        
-        # Convert to datetime and set as index
-        data['date'] = pd.to_datetime(data['date'])
-        data.set_index('date', inplace=True)
-        
-        # Resample to weekly OHLC
-        weekly_data = data.resample('W').agg({
-            'open': 'first',
-            'high': 'max',
-            'low': 'min',
-            'close': 'last',
-            'volume': 'sum'
-        }).dropna()
-        
-        weekly_data['symbol'] = symbol
-        all_data.append(weekly_data)
+        # Vectorised epoch -> IST datetime64 straight from the JSON arrays;
+        # resampling happens once for all symbols below
+        data = moneycontrol_frame(result)
+        data['timestamp'] = data['date']
+        data['symbol'] = symbol
+        all_data.append(data)
         
     except requests.exceptions.RequestException as e:
         print(f"Error fetching data for {symbol}: {e}")
     except json.JSONDecodeError as e:
         print(f"Error parsing JSON for {symbol}: {e}")
 
-# Concatenate all data into a single DataFrame
-final_data = pd.concat(all_data)
+# Resample every symbol to weekly OHLC at once (weeks start Monday 09:15 IST)
+weekly_data = resample_bars(pd.concat(all_data, ignore_index=True), '1w')
+final_data = weekly_data.rename(columns={'timestamp': 'date'}).set_index('date')[['open', 'high', 'low', 'close', 'volume', 'symbol']]
 
 # Print or save the final data
 print(final_data)
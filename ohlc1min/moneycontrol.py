@@ -1,14 +1,12 @@
 import urllib.request
 import urllib.parse
-import time
 import pandas as pd
 from datetime import datetime
+from bar_sources import IST, moneycontrol_frame
 
 def date_to_unix(date):
-    return int(time.mktime(date.timetuple()))
-
-def unix_to_date(timestamp):
-    return datetime.fromtimestamp(timestamp)
+    # Dates are IST market dates, whatever the machine's time zone
+    return int(pd.Timestamp(date).tz_localize(IST).timestamp())
 
 symbol = 'RELIANCE'
 start_date = datetime(2024, 1, 1)
@@ -31,9 +29,8 @@ if response.getcode() == 200:
         result = response.read().decode('utf-8')
         import json
         result = json.loads(result)
-        data = pd.DataFrame(result)
-        data['date'] = data['t'].apply(unix_to_date)
-        data = data[['date', 'o', 'h', 'l', 'c', 'v']].rename(columns={'o': 'open', 'h': 'high', 'l': 'low', 'c': 'close', 'v': 'volume'})
+        # Vectorised epoch -> IST datetime64 straight from the JSON arrays
+        data = moneycontrol_frame(result, naive=True)
         print(data)
 
         # Save date and close price to a CSV file
@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from bar_sources import IST
+from bar_store import BarStore, DEFAULT_BAR_STORE_ROOT
+
+# Bar length in minutes for intraday timeframes; "1d" and "1w" follow the session calendar
+TIMEFRAMES = {"5m": 5, "15m": 15, "1h": 60, "1d": "day", "1w": "week"}
+
+# NSE cash session 09:15-15:30 IST, as minutes after midnight
+SESSION_OPEN = 9 * 60 + 15
+SESSION_CLOSE = 15 * 60 + 30
+
+NS_PER_MINUTE = 60 * 10**9
+NS_PER_DAY = 24 * 60 * NS_PER_MINUTE
+
+RESAMPLED_COLUMNS = ["timestamp", "symbol", "open", "high", "low", "close", "volume", "oi", "bars"]
+
+
+def local_nanoseconds(timestamps):
+    """
+    IST wall-clock time as int64 nanoseconds; naive timestamps are taken as IST.
+    """
+    timestamps = pd.to_datetime(timestamps)
+    if timestamps.dt.tz is not None:
+        timestamps = timestamps.dt.tz_convert(IST).dt.tz_localize(None)
+    return timestamps.to_numpy(dtype="datetime64[ns]").view("int64")
+
+
+def bin_starts(local, timeframe):
+    """
+    Session-anchored start of the bar every timestamp falls in. Intraday
+    bins count from 09:15 (so the last hourly bar is 15:15-15:30), daily
+    bars start at 09:15 and weekly bars at Monday 09:15.
+    """
+    step = TIMEFRAMES[timeframe]
+    day = local - local % NS_PER_DAY
+    minute = (local - day) // NS_PER_MINUTE
+    if step == "day":
+        start = day
+    elif step == "week":
+        # 1970-01-01 was a Thursday, so day number + 3 is 0 on Mondays
+        weekday = (day // NS_PER_DAY + 3) % 7
+        start = day - weekday * NS_PER_DAY
+    else:
+        return day + (SESSION_OPEN + (minute - SESSION_OPEN) // step * step) * NS_PER_MINUTE
+    return start + SESSION_OPEN * NS_PER_MINUTE
+
+
+def resample_bars(bars, timeframe):
+    """
+    Resample 1-minute bars of any number of symbols to `timeframe` in one
+    pass: rows outside the 09:15-15:30 session are dropped, rows are sorted
+    by (symbol, time) and every output column is a reduceat over the group
+    boundaries. Bars are stamped with their IST start time; volume is summed
+    ignoring gaps, oi is the last value, bars counts the 1-minute inputs.
+    """
+    if timeframe not in TIMEFRAMES:
+        raise ValueError(f"Unknown timeframe {timeframe}; expected one of {list(TIMEFRAMES)}")
+    if bars.empty:
+        return pd.DataFrame(columns=RESAMPLED_COLUMNS)
+
+    local = local_nanoseconds(bars["timestamp"])
+    minute = (local % NS_PER_DAY) // NS_PER_MINUTE
+    in_session = (minute >= SESSION_OPEN) & (minute < SESSION_CLOSE)
+
+    symbol_codes, symbol_names = pd.factorize(bars["symbol"])
+    local = local[in_session]
+    symbol_codes = symbol_codes[in_session]
+    values = {
+        col: bars[col].to_numpy(dtype=float)[in_session] if col in bars.columns else np.full(len(local), np.nan)
+        for col in ("open", "high", "low", "close", "volume", "oi")
+    }
+    if len(local) == 0:
+        return pd.DataFrame(columns=RESAMPLED_COLUMNS)
+
+    order = np.lexsort((local, symbol_codes))
+    local = local[order]
+    symbol_codes = symbol_codes[order]
+    values = {col: array[order] for col, array in values.items()}
+    bins = bin_starts(local, timeframe)
+
+    new_group = np.empty(len(local), dtype=bool)
+    new_group[0] = True
+    new_group[1:] = (symbol_codes[1:] != symbol_codes[:-1]) | (bins[1:] != bins[:-1])
+    starts = np.flatnonzero(new_group)
+    ends = np.append(starts[1:], len(local)) - 1
+
+    result = pd.DataFrame({
+        "timestamp": pd.to_datetime(bins[starts]).tz_localize(IST),
+        "symbol": np.asarray(symbol_names)[symbol_codes[starts]],
+        "open": values["open"][starts],
+        "high": np.fmax.reduceat(values["high"], starts),
+        "low": np.fmin.reduceat(values["low"], starts),
+        "close": values["close"][ends],
+        "volume": np.add.reduceat(np.nan_to_num(values["volume"]), starts),
+        "oi": values["oi"][ends],
+        "bars": np.diff(np.append(starts, len(local))),
+    })
+    return result[RESAMPLED_COLUMNS]
+
+
+class ResampleCache:
+    """
+    Resampled bars read from a BarStore, cached per symbol and timeframe.
+
+    Each result is kept in memory and as Parquet under
+    <store root>/_resampled. The cache key includes the size and mtime of
+    every day file it was built from, so re-ingesting a day invalidates it.
+    """
+    def __init__(self, store, cache_root=None):
+        self.store = store
+        self.cache_root = cache_root or os.path.join(store.root, "_resampled")
+        self.memory = {}
+
+    def fingerprint(self, paths):
+        stats = [(path, os.stat(path).st_mtime_ns, os.stat(path).st_size) for path in paths]
+        return hashlib.md5(json.dumps(stats).encode()).hexdigest()[:16]
+
+    def cache_path(self, symbol, timeframe, start, end, source, fingerprint):
+        name = f"{pd.Timestamp(start):%Y-%m-%d}_{pd.Timestamp(end):%Y-%m-%d}_{source or 'any'}_{fingerprint}.parquet"
+        return os.path.join(self.cache_root, timeframe, symbol, name)
+
+    def get_symbol(self, symbol, timeframe, start, end, source=None):
+        paths = self.store.day_paths(symbol, start, end, source)
+        fingerprint = self.fingerprint(paths)
+        path = self.cache_path(symbol, timeframe, start, end, source, fingerprint)
+        if path in self.memory:
+            return self.memory[path]
+        if os.path.exists(path):
+            result = pq.read_table(path).to_pandas()
+        else:
+            bars = self.store.read_bars(symbol, start, end, source=source)
+            result = resample_bars(bars, timeframe)
+            self.save(path, result)
+        self.memory[path] = result
+        return result
+
+    def save(self, path, result):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # Results for the same range built from older data are stale now
+        prefix = os.path.basename(path).rsplit("_", 1)[0] + "_"
+        for name in os.listdir(directory):
+            if name.startswith(prefix) and name != os.path.basename(path):
+                os.remove(os.path.join(directory, name))
+        tmp_path = os.path.join(directory, "." + os.path.basename(path) + ".tmp")
+        pq.write_table(pa.Table.from_pandas(result, preserve_index=False), tmp_path, compression="zstd")
+        os.replace(tmp_path, path)
+
+    def get(self, symbols, timeframe, start, end, source=None):
+        """
+        Resampled bars of several symbols, one frame sorted by symbol and time.
+        """
+        frames = [self.get_symbol(symbol, timeframe, start, end, source) for symbol in symbols]
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return pd.DataFrame(columns=RESAMPLED_COLUMNS)
+        return pd.concat(frames, ignore_index=True)
+
+
+def main():
+    store = BarStore(DEFAULT_BAR_STORE_ROOT)
+    cache = ResampleCache(store)
+    symbols = store.symbols()
+
+    for timeframe in TIMEFRAMES:
+        resampled = cache.get(symbols, timeframe, "2024-01-01", "2024-12-31")
+        print(f"{timeframe}: {len(resampled)} bars for {resampled['symbol'].nunique() if len(resampled) else 0} symbols")
+
+
+if __name__ == "__main__":
+    main()
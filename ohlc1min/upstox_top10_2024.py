@@ -1,107 +1,88 @@
-import requests
-import json
+import os
+import sys
 import pandas as pd
-from datetime import datetime, timedelta
-import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tqdm import tqdm
+from bar_sources import SourceError, UpstoxAdapter
+from bar_store import BarStore, DEFAULT_BAR_STORE_ROOT
+from ingestion import IngestionScheduler
 
-def get_month_date_ranges(year):
-    """Generate start and end dates for each month of the given year."""
-    date_ranges = []
-    for month in range(1,13):
-        if month > 1:
-            continue
-        # Get the last day of the month
-        if month == 12:
-            start_date = f"{year}-{month:02d}-01"
-            end_date = f"{year}-{month:02d}-31"
-        else:
-            start_date = f"{year}-{month:02d}-01"
-            next_month = datetime(year, month + 1, 1) - timedelta(days=1)
-            end_date = next_month.strftime("%Y-%m-%d")
-        date_ranges.append((start_date, end_date))
-    return date_ranges
+CSV_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume', 'symbol']
 
-def fetch_stock_data(symbol, start_date, end_date, headers):
-    """Fetch data for a single symbol and date range."""
-    url = f"https://api.upstox.com/v2/historical-candle/{symbol}/1minute/{end_date}/{start_date}"
-    
-    try:
-        response = requests.request("GET", url, headers=headers, data={})
-        data_json = json.loads(response.text)
-        data = data_json['data']['candles']
-        
-        # Handle varying number of columns by selecting only the first 6 columns
-        processed_data = [row[:6] for row in data]
-        
-        # Convert to DataFrame
-        df = pd.DataFrame(processed_data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        df['symbol'] = symbol
-        return df
-    
-    except Exception as e:
-        print(f"Error fetching data for {symbol} from {start_date} to {end_date}: {str(e)}")
-        return pd.DataFrame()
+def fetch_year(scheduler, upstox, year):
+    """Fetch every symbol-month of the year through the scheduler.
+
+    Requests share the scheduler's session and adaptive limiter, and are
+    retried on 429/5xx with jittered backoff or the server's Retry-After.
+    Returns (bars, failed) where failed lists (request, error) for every
+    symbol-month that could not be fetched. A non-retryable error (bad
+    token, bad instrument key) would hit every request, so the requests not
+    yet started are cancelled and reported as failed too.
+    """
+    planned = scheduler.plan(upstox.symbols(), f"{year}-01-01", f"{year}-12-31", skip_existing=False)
+    all_data = []
+    failed = []
+    with ThreadPoolExecutor(max_workers=scheduler.max_workers) as executor:
+        futures = {executor.submit(scheduler.fetch_one, request): request for request in planned}
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Fetching Upstox 1-minute bars"):
+            request = futures[future]
+            if future.cancelled():
+                failed.append((request, "cancelled after an earlier non-retryable error"))
+                continue
+            try:
+                bars = future.result()
+            except SourceError as e:
+                failed.append((request, str(e)))
+                if not e.retryable:
+                    for pending in futures:
+                        pending.cancel()
+                continue
+            except Exception as e:
+                failed.append((request, str(e)))
+                continue
+            if not bars.empty:
+                all_data.append(bars)
+    return all_data, failed
 
 def main():
-    
-    # # Load file symboltocode.csv
-    # symboltocode_df = pd.read_csv('symboltocode.csv')
 
-    # symbols = symboltocode_df
+    # Every instrument key in symboltocode.csv (name,instrument_key without a header)
+    upstox = UpstoxAdapter.from_symbol_file('symboltocode.csv', access_token=os.environ.get('UPSTOX_ACCESS_TOKEN'))
+    store = BarStore(DEFAULT_BAR_STORE_ROOT)
+    scheduler = IngestionScheduler([upstox], store)
 
-    # List of symbols
+    all_data, failed = fetch_year(scheduler, upstox, 2024)
 
-    symbols = [
-        'NSE_EQ|INE002A01018'
-        # , 'NSE_EQ|INE467B01029', 'NSE_EQ|INE040A01034',
-        # 'NSE_EQ|INE397D01024', 'NSE_EQ|INE090A01021', 'NSE_EQ|INE009A01021',
-        # 'NSE_EQ|INE062A01020', 'NSE_EQ|INE030A01027', 'NSE_EQ|INE154A01025',
-        # 'NSE_EQ|INE115A01026'
-]
-    
-    headers = {
-        'Accept': 'application/json'
-    }
-    
-    # Get date ranges for each month of 2024
-    date_ranges = get_month_date_ranges(2024)
-    
-    # Initialize empty list to store all DataFrames
-    all_data = []
-    
-    # Fetch data for each symbol and date range
-    for symbol in symbols:
-        print(f"Fetching data for {symbol}")
-        for start_date, end_date in date_ranges:
-            print(f"Processing period: {start_date} to {end_date}")
-            
-            df = fetch_stock_data(symbol, start_date, end_date, headers)
-            if not df.empty:
-                all_data.append(df)
-            
-            # Add delay to avoid hitting rate limits
-            time.sleep(1)
-    
-    # Combine all DataFrames
-    if all_data:
-        final_df = pd.concat(all_data, ignore_index=True)
-        
-        # Convert timestamp to datetime
-        final_df['timestamp'] = pd.to_datetime(final_df['timestamp'])
-        
-        # Sort by timestamp and symbol
-        final_df = final_df.sort_values(['symbol', 'timestamp'])
-        
-        # Save to CSV file stock_data_2024.csv in the current directory
-        import os
-        path = os.path.join(os.getcwd(), 'stock_data_2024_jan_reliance.csv')
-        final_df.to_csv(path, index=False)
-        print(f"Data saved to {path}")
-        
-        return final_df
-    else:
+    print(f"Final request rate: {scheduler.limiters[upstox.name].rate:.1f}/s "
+          f"after {scheduler.limiters[upstox.name].throttles} throttled responses")
+
+    # A partial year must not be saved as if it were complete
+    if failed:
+        print(f"{len(failed)} symbol-months failed; nothing was saved:")
+        for request, error in sorted(failed):
+            print(f"  {request.symbol} {request.start} to {request.end}: {error}")
+        sys.exit(1)
+
+    if not all_data:
         print("No data was collected")
         return pd.DataFrame()
 
+    bars = pd.concat(all_data, ignore_index=True)
+
+    # CSV keeps the instrument key in the symbol column, sorted by symbol and timestamp
+    final_df = bars.assign(symbol=bars['symbol'].map(upstox.instrument_keys))[CSV_COLUMNS]
+    final_df = final_df.sort_values(['symbol', 'timestamp'])
+
+    # Save to CSV file stock_data_2024.csv in the current directory
+    path = os.path.join(os.getcwd(), 'stock_data_2024.csv')
+    final_df.to_csv(path, index=False)
+    print(f"Data saved to {path}")
+
+    # Also write the day-partitioned bar store, keyed by symbol name
+    days = store.write_bars(bars)
+    print(f"Wrote {days} day files to {DEFAULT_BAR_STORE_ROOT}")
+
+    return final_df
+
 if __name__ == "__main__":
-    df = main()
\ No newline at end of file
+    df = main()